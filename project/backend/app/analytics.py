@@ -0,0 +1,110 @@
+"""
+Vectorized spending analytics across months.
+
+Expense columns are loaded once (see crud.get_trend_analytics) and reduced
+with NumPy: a category x month matrix via a single weighted bincount,
+rolling averages via cumulative sums, and share of total spend.
+"""
+from typing import Sequence
+
+import numpy as np
+
+
+def period_index(years, months) -> np.ndarray:
+    """Encode (year, month) pairs as consecutive integers."""
+    return np.asarray(years, dtype=np.int64) * 12 + (np.asarray(months, dtype=np.int64) - 1)
+
+
+def period_label(period: int) -> str:
+    year, month = divmod(int(period), 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+def expense_columns(rows) -> tuple:
+    """Split (year, month, category, amount) rows into NumPy columns."""
+    if not rows:
+        return np.array([], dtype=np.int64), np.array([], dtype=object), np.array([], dtype=np.float64)
+    years, months, categories, amounts = zip(*rows)
+    return (
+        period_index(years, months),
+        np.array(categories, dtype=object),
+        np.fromiter(amounts, dtype=np.float64, count=len(amounts)),
+    )
+
+
+def category_month_matrix(periods: np.ndarray, categories: np.ndarray, amounts: np.ndarray, period_axis: np.ndarray):
+    """Total amounts per (category, period).
+
+    Returns the sorted category labels and a matrix with one row per
+    category and one column per entry of `period_axis`.
+    """
+    if len(amounts) == 0:
+        return np.array([], dtype=object), np.zeros((0, len(period_axis)))
+
+    labels, category_idx = np.unique(categories, return_inverse=True)
+    column_idx = np.searchsorted(period_axis, periods)
+    size = len(labels) * len(period_axis)
+    flat = np.bincount(category_idx * len(period_axis) + column_idx, weights=amounts, minlength=size)
+    return labels, flat.reshape(len(labels), len(period_axis))
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over the last `window` columns of each row.
+
+    The first `window - 1` columns average over the values available so far.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[-1]
+    if n == 0:
+        return values.copy()
+
+    padded = np.concatenate([np.zeros(values.shape[:-1] + (1,)), np.cumsum(values, axis=-1)], axis=-1)
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - window, 0)
+    return (padded[..., end] - padded[..., start]) / (end - start)
+
+
+def build_trend_analytics(
+    periods: np.ndarray,
+    categories: np.ndarray,
+    amounts: np.ndarray,
+    month_periods: Sequence[int],
+    window: int = 3,
+) -> dict:
+    """Build the TrendAnalyticsResponse payload from expense columns.
+
+    `month_periods` lists the periods of the user's months. The period
+    axis runs over every calendar month from the first of them to the last,
+    so months without expenses, and months the user never created, are
+    zero columns and rolling averages step one calendar month at a time.
+    """
+    known = np.union1d(np.asarray(month_periods, dtype=np.int64), periods)
+    period_axis = np.arange(known[0], known[-1] + 1, dtype=np.int64) if len(known) else known
+    labels, matrix = category_month_matrix(periods, categories, amounts, period_axis)
+
+    category_totals = matrix.sum(axis=1)
+    monthly_totals = matrix.sum(axis=0)
+    total = float(category_totals.sum())
+    shares = category_totals / total * 100 if total > 0 else np.zeros_like(category_totals)
+    category_rolling = rolling_mean(matrix, window)
+
+    # Largest categories first, ties by name
+    order = sorted(range(len(labels)), key=lambda i: (-category_totals[i], labels[i]))
+
+    return {
+        "periods": [period_label(p) for p in period_axis],
+        "categories": [
+            {
+                "name": labels[i],
+                "amounts": matrix[i].tolist(),
+                "rolling_average": category_rolling[i].tolist(),
+                "total": float(category_totals[i]),
+                "share": float(shares[i]),
+            }
+            for i in order
+        ],
+        "monthly_totals": monthly_totals.tolist(),
+        "rolling_average": rolling_mean(monthly_totals, window).tolist(),
+        "total": total,
+        "window": window,
+    }
@@ -1,20 +1,26 @@
 from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..database import get_db, get_async_db
 from ..models import User
 from .security import decode_access_token
+from .principal import Principal, principal_cache
 
 COOKIE_NAME = "access_token"
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+def _request_token(request: Request) -> str:
     token = request.cookies.get(COOKIE_NAME)
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
+    return token
 
+
+def _decode_token(token: str) -> dict:
     payload = decode_access_token(token)
     if not payload:
         raise HTTPException(
@@ -22,24 +28,74 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
             detail="Invalid token"
         )
 
-    user_id = payload.get("sub")
-    if not user_id:
+    if not payload.get("sub"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload"
         )
+    return payload
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if not user:
+
+def _cache_principal(token: str, payload: dict, row) -> Principal:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
 
-    if not user.is_active:
+    principal = Principal(id=row.id, is_active=bool(row.is_active))
+    principal_cache.set(token, principal, payload.get("exp"))
+    return principal
+
+
+def _check_active(principal: Principal) -> Principal:
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User is inactive"
         )
+    return principal
+
+
+def get_current_principal(request: Request, db: Session = Depends(get_db)) -> Principal:
+    """Authenticate the request without loading the full User row.
+
+    Served from principal_cache when the token was seen recently; the
+    session is only used (and only connects) on a cache miss.
+    """
+    return principal_for_token(_request_token(request), db)
+
 
+def principal_for_token(token: str, db: Session) -> Principal:
+    """The active principal for an access token, as get_current_principal resolves it."""
+    principal = principal_cache.get(token)
+    if principal is None:
+        payload = _decode_token(token)
+        row = db.query(User.id, User.is_active).filter(User.id == int(payload["sub"])).first()
+        principal = _cache_principal(token, payload, row)
+    return _check_active(principal)
+
+
+async def get_current_principal_async(request: Request, db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """get_current_principal for the async routers."""
+    token = _request_token(request)
+    principal = principal_cache.get(token)
+    if principal is None:
+        payload = _decode_token(token)
+        result = await db.execute(select(User.id, User.is_active).where(User.id == int(payload["sub"])))
+        principal = _cache_principal(token, payload, result.first())
+    return _check_active(principal)
+
+
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+) -> User:
+    """The full User row, for the endpoints that need more than the id."""
+    user = db.get(User, principal.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
     return user
@@ -0,0 +1,96 @@
+"""
+Bounded worker pool for bcrypt hashing and verification.
+
+bcrypt deliberately costs 100-300 ms of CPU per call. Running it inline in
+sync handlers ties up a slot of the shared request threadpool for that
+long, so a burst of logins starves every other endpoint. Here it runs on a
+small dedicated executor instead; once HASH_WORKERS + HASH_QUEUE_DEPTH
+calls are in flight, new ones fail fast with HashingPoolSaturated, which
+the auth router turns into a 503.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from .security import get_password_hash, verify_password
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", "16"))
+
+
+class HashingPoolSaturated(RuntimeError):
+    """Too many password hashes are already running or queued."""
+
+
+class HashingPool:
+    def __init__(self, workers: int = HASH_WORKERS, queue_depth: int = HASH_QUEUE_DEPTH):
+        self.workers = workers
+        self.capacity = workers + queue_depth
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.count = 0
+        self.seconds_total = 0.0
+        self.seconds_max = 0.0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hashing")
+        return self._executor
+
+    def _timed(self, fn: Callable, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.count += 1
+                self.seconds_total += elapsed
+                self.seconds_max = max(self.seconds_max, elapsed)
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable, *args):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise HashingPoolSaturated("Password hashing pool is saturated")
+            self._in_flight += 1
+
+        # The slot is released when the work finishes, even if the request
+        # awaiting it is cancelled first
+        future = self._get_executor().submit(self._timed, fn, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self._in_flight,
+            "count": self.count,
+            "seconds_total": self.seconds_total,
+            "seconds_max": self.seconds_max,
+            "rejected": self.rejected,
+        }
+
+
+hashing_pool = HashingPool()
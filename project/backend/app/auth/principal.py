@@ -0,0 +1,107 @@
+"""
+Short-lived cache of authenticated principals keyed by access token.
+
+A hit skips both JWT decoding and the users SELECT, so most authenticated
+requests reach the router without touching the database. Entries expire
+after PRINCIPAL_CACHE_TTL seconds (or at the token's `exp`, if sooner);
+deactivating a user must call `principal_cache.invalidate_user`, which the
+listeners below do for ORM updates of User.is_active once they commit.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from ..models import User
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as far as most routers need to know."""
+    id: int
+    is_active: bool
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry and time.time() < entry[0]:
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def set(self, token: str, principal: Principal, token_exp: Optional[float] = None) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        expires = time.time() + self.ttl
+        if token_exp is not None:
+            expires = min(expires, token_exp)
+        with self._lock:
+            self._entries[token] = (expires, principal)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in [t for t, (_, p) in self._entries.items() if p.id == user_id]:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+principal_cache = PrincipalCache()
+
+
+# Users whose is_active changed in a session, evicted when it commits. Evicting
+# on the change itself would let a request running before the commit read
+# the old flag and cache it again.
+_PENDING = "principal_cache_invalidations"
+
+
+@event.listens_for(User.is_active, "set")
+def _record_activation_change(target, value, oldvalue, initiator):
+    if target.id is None or value == oldvalue:
+        return
+    session = object_session(target)
+    if session is None:
+        principal_cache.invalidate_user(target.id)
+    else:
+        session.info.setdefault(_PENDING, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for user_id in session.info.pop(_PENDING, ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back(session):
+    session.info.pop(_PENDING, None)
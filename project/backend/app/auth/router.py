@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from ..database import get_db
 from ..models import User
-from .security import get_password_hash, verify_password, create_access_token
+from .security import create_access_token
 from .dependencies import get_current_user, COOKIE_NAME
+from .hashing import hashing_pool, HashingPoolSaturated
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -28,20 +30,43 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+def find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+
+def add_user(db: Session, email: str, hashed_password: str) -> User:
+    user = User(email=email, hashed_password=hashed_password)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+async def run_hashing(coro):
+    """Await a hashing_pool call, turning saturation into a fast 503."""
+    try:
+        return await coro
+    except HashingPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, try again shortly",
+            headers={"Retry-After": "1"}
+        )
+
+
+# register and login are async so bcrypt waits on hashing_pool instead of
+# holding a slot of the shared threadpool; the short queries still run there
 @router.post("/register", response_model=UserResponse)
-def register(user_data: UserRegister, response: Response, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == user_data.email).first()
+async def register(user_data: UserRegister, response: Response, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(find_user, db, user_data.email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
-    hashed_password = get_password_hash(user_data.password)
-    user = User(email=user_data.email, hashed_password=hashed_password)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    hashed_password = await run_hashing(hashing_pool.hash(user_data.password))
+    user = await run_in_threadpool(add_user, db, user_data.email, hashed_password)
 
     token = create_access_token(data={"sub": str(user.id)})
     response.set_cookie(
@@ -57,9 +82,9 @@ def register(user_data: UserRegister, response: Response, db: Session = Depends(
 
 
 @router.post("/login", response_model=UserResponse)
-def login(user_data: UserLogin, response: Response, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == user_data.email).first()
-    if not user or not verify_password(user_data.password, user.hashed_password):
+async def login(user_data: UserLogin, response: Response, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(find_user, db, user_data.email)
+    if not user or not await run_hashing(hashing_pool.verify(user_data.password, user.hashed_password)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
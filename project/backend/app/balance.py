@@ -0,0 +1,89 @@
+from datetime import date
+from calendar import monthrange
+from typing import Mapping, Optional
+
+
+def get_current_day(year: int, month: int, today: Optional[date] = None) -> int:
+    today = today or date.today()
+    days_in_month = monthrange(year, month)[1]
+
+    if today.year == year and today.month == month:
+        return today.day
+    if (today.year > year) or (today.year == year and today.month > month):
+        return days_in_month
+    return 0
+
+
+def summarize_month(
+    year: int,
+    month: int,
+    savings_percent: float,
+    total_income: float,
+    total_fixed: float,
+    actual_spent: float,
+    today: Optional[date] = None,
+) -> dict:
+    """Budget figures for a month without the per-day series."""
+    savings_amount = total_income * (savings_percent / 100)
+    available_budget = total_income - total_fixed - savings_amount
+
+    days_in_month = monthrange(year, month)[1]
+    daily_budget = available_budget / days_in_month if days_in_month > 0 else 0
+    current_day = get_current_day(year, month, today)
+
+    expected_spent = daily_budget * current_day
+    balance = expected_spent - actual_spent
+
+    return {
+        "total_income": total_income,
+        "total_fixed_expenses": total_fixed,
+        "savings_amount": savings_amount,
+        "available_budget": available_budget,
+        "days_in_month": days_in_month,
+        "daily_budget": daily_budget,
+        "current_day": current_day,
+        "expected_spent": expected_spent,
+        "actual_spent": actual_spent,
+        "balance": balance,
+    }
+
+
+def build_balance(
+    year: int,
+    month: int,
+    savings_percent: float,
+    total_income: float,
+    total_fixed: float,
+    daily_totals: Mapping[date, float],
+    today: Optional[date] = None,
+) -> dict:
+    """Build the BalanceResponse payload from pre-aggregated month totals.
+
+    `daily_totals` maps each expense date to the amount spent that day, so the
+    cumulative series is produced in a single pass over the days of the month.
+    """
+    # Expenses dated outside the month still count towards the month total
+    summary = summarize_month(
+        year, month, savings_percent, total_income, total_fixed, sum(daily_totals.values()), today
+    )
+    daily_budget = summary["daily_budget"]
+
+    daily_balances = []
+    cumulative_spent = 0
+
+    for day in range(1, summary["days_in_month"] + 1):
+        day_date = date(year, month, day)
+        day_expenses = daily_totals.get(day_date, 0)
+        cumulative_spent += day_expenses
+        expected_spent = daily_budget * day
+
+        daily_balances.append({
+            "day": day,
+            "date": day_date.isoformat(),
+            "spent": day_expenses,
+            "cumulative_spent": cumulative_spent,
+            "expected_spent": expected_spent,
+            "balance": expected_spent - cumulative_spent
+        })
+
+    return {**summary, "daily_balances": daily_balances}
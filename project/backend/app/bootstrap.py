@@ -0,0 +1,97 @@
+"""
+Database bootstrap: schema migrations and the default categories.
+
+Run once per deploy, before starting the workers:
+
+    python -m app.bootstrap           # migrate to head and seed categories
+    python -m app.bootstrap --check   # exit 1 unless the schema is at head
+
+Importing or starting the app does neither, so N workers don't each repeat
+the DDL inspection and seeding, and a worker starts even while the database
+is slow or down; GET /ready tells the load balancer when it can take
+traffic. A database the app created with create_all (before the app
+stopped doing that at startup) is stamped at head if it matches the models,
+or at the baseline revision and upgraded from there.
+"""
+import argparse
+import os
+import sys
+from functools import lru_cache
+from typing import Optional
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from . import crud, database, models  # noqa: F401  (models registers the tables)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_REVISION = "0001"
+
+
+def alembic_config(connection=None) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+@lru_cache(maxsize=None)
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(connection) -> Optional[str]:
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def migrate(engine=None) -> Optional[str]:
+    """Upgrade the schema to head; returns the revision it started from."""
+    engine = engine or database.get_engine()
+    with engine.begin() as conn:
+        start = current_revision(conn)
+        config = alembic_config(conn)
+        if start is None and inspect(conn).has_table("months"):
+            # Built by create_all: from the current models it is already at
+            # head, from older ones it still needs the later revisions
+            context = MigrationContext.configure(conn)
+            current = not compare_metadata(context, database.Base.metadata)
+            command.stamp(config, "head" if current else BASELINE_REVISION)
+        command.upgrade(config, "head")
+    return start
+
+
+def bootstrap(engine=None) -> Optional[str]:
+    """migrate(), then create the default categories if they are missing."""
+    engine = engine or database.get_engine()
+    start = migrate(engine)
+    with Session(bind=engine) as db:
+        crud.create_default_categories(db)
+    return start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.bootstrap", description="Migrate and seed the database")
+    parser.add_argument("--check", action="store_true", help="only report whether the schema is at head")
+    args = parser.parse_args(argv)
+
+    head = head_revision()
+    if args.check:
+        with database.get_engine().connect() as conn:
+            revision = current_revision(conn)
+        print(f"schema at {revision or 'none'}, head is {head}")
+        return 0 if revision == head else 1
+
+    start = bootstrap()
+    print(f"schema {start or 'none'} -> {head}, default categories present")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
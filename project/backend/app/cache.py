@@ -0,0 +1,165 @@
+"""
+Response cache for per-month computed endpoints (balance, analytics).
+
+Entries are keyed by the month's rollup version (see rollups.py), which is
+bumped in the same transaction as every write to the month, so a stale
+entry can never be served: it simply stops being looked up. The rollup
+row's random token is part of the key too, so a month recreated under a
+reused id starts from fresh keys. Both are exposed as an ETag so clients
+can revalidate with If-None-Match.
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional
+
+from fastapi import Request, Response
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+
+class CacheBackend(ABC):
+    """Interface for response cache storage."""
+
+    @abstractmethod
+    def get(self, key: Hashable):
+        ...
+
+    @abstractmethod
+    def set(self, key: Hashable, value) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class LRUCacheBackend(CacheBackend):
+    """Thread-safe in-process LRU cache."""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: Hashable, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ResponseCache:
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        # The threadpool serves requests concurrently; += is not atomic
+        self._lock = threading.Lock()
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable):
+        value = self.backend.get(key)
+        self._count(value is not None)
+        if value is not None:
+            return value
+        value = compute()
+        if value is not None:
+            self.backend.set(key, value)
+        return value
+
+    async def get_or_compute_async(self, key: Hashable, compute: Callable[[], Awaitable]):
+        value = self.backend.get(key)
+        self._count(value is not None)
+        if value is not None:
+            return value
+        value = await compute()
+        if value is not None:
+            self.backend.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache(LRUCacheBackend())
+
+
+def set_backend(backend: CacheBackend) -> None:
+    response_cache.backend = backend
+
+
+def make_etag(key: tuple) -> str:
+    return '"' + "-".join(str(part) for part in key) + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified(request: Request, response: Response, key: tuple) -> Optional[Response]:
+    etag = make_etag(key)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
+
+def cached_response(request: Request, response: Response, key: Optional[tuple], compute: Callable):
+    """Serve `compute()` through the cache, honouring If-None-Match.
+
+    `key` must include the month's rollup token and version; pass None when
+    the month has no rollups yet to compute without caching.
+    """
+    if key is None:
+        return compute()
+    not_modified = _not_modified(request, response, key)
+    if not_modified is not None:
+        return not_modified
+    return response_cache.get_or_compute(key, compute)
+
+
+async def cached_response_async(
+    request: Request, response: Response, key: Optional[tuple], compute: Callable[[], Awaitable]
+):
+    """cached_response for a coroutine function `compute`."""
+    if key is None:
+        return await compute()
+    not_modified = _not_modified(request, response, key)
+    if not_modified is not None:
+        return not_modified
+    return await response_cache.get_or_compute_async(key, compute)
@@ -0,0 +1,107 @@
+"""
+Per-user cache of compiled category matchers.
+
+Default categories (user_id IS NULL) are loaded once and shared by every
+user; a user's entry only adds their own rows. routers/profile.py
+invalidates a user's entry when they change their categories, and a short
+TTL bounds staleness across worker processes. Each invalidation bumps a
+generation counter, and a miss only stores what it loaded if no
+invalidation landed while it was loading, so a stale list is never cached.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from . import models
+from .category_detector import CategoryMatcher, DEFAULT_CATEGORIES, compile_categories
+
+CATEGORY_CACHE_SIZE = int(os.getenv("CATEGORY_CACHE_SIZE", "10000"))
+CATEGORY_CACHE_TTL = float(os.getenv("CATEGORY_CACHE_TTL", "60"))
+
+
+def _rows(query) -> list:
+    return [(cat.id, cat.name, cat.keywords) for cat in query]
+
+
+class CategoryCache:
+    def __init__(self, maxsize: int = CATEGORY_CACHE_SIZE, ttl: float = CATEGORY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._defaults = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate(): for everything, and per user
+        self._generation = 0
+        self._user_generations: Dict[Optional[int], int] = {}
+
+    def _current_generation(self, user_id: Optional[int]) -> tuple:
+        return self._generation, self._user_generations.get(user_id, 0)
+
+    def _default_rows(self, db: Session, generation: tuple) -> list:
+        defaults = self._defaults
+        if defaults is None or time.monotonic() - defaults[0] > self.ttl:
+            rows = _rows(db.query(models.Category).filter(models.Category.user_id == None))
+            defaults = (time.monotonic(), rows)
+            with self._lock:
+                if self._generation == generation[0]:
+                    self._defaults = defaults
+        return defaults[1]
+
+    def _load(self, db: Session, user_id: Optional[int], generation: tuple) -> CategoryMatcher:
+        rows = list(self._default_rows(db, generation))
+        if user_id:
+            rows += _rows(db.query(models.Category).filter(models.Category.user_id == user_id))
+        if not rows:
+            return compile_categories(DEFAULT_CATEGORIES)
+
+        # Same order and name handling as get_categories_from_db over the
+        # combined query; identical sets share one compiled matcher
+        categories = {}
+        for _, name, keywords in sorted(rows):
+            categories[name] = [k.strip() for k in keywords.split(",")]
+        return compile_categories(categories)
+
+    def get_matcher(self, db: Session, user_id: Optional[int] = None) -> CategoryMatcher:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._current_generation(user_id)
+
+        matcher = self._load(db, user_id, generation)
+        with self._lock:
+            if self._current_generation(user_id) != generation:
+                return matcher
+            self._entries[user_id] = (now, matcher)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return matcher
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drop a user's entry, or everything (including defaults) if None."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                self._defaults = None
+                self._generation += 1
+                self._user_generations.clear()
+            else:
+                self._entries.pop(user_id, None)
+                self._user_generations[user_id] = self._user_generations.get(user_id, 0) + 1
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+category_cache = CategoryCache()
@@ -1,3 +1,6 @@
+from collections import deque
+from functools import lru_cache
+
 DEFAULT_CATEGORIES = {
     "Продукты": ["продукты", "булки", "фрукты", "молоко", "хлеб", "мясо", "овощи", "магазин", "пятерочка", "перекресток", "магнит", "ашан", "лента"],
     "Доставка еды": ["доставка", "додо", "пицца", "роллы", "шава", "шаурма", "бургер", "суши", "яндекс еда", "деливери", "самокат"],
@@ -12,16 +15,103 @@ DEFAULT_CATEGORIES = {
 }
 
 
-def detect_category(description: str, custom_categories: dict = None) -> str:
-    categories = custom_categories if custom_categories else DEFAULT_CATEGORIES
-    description_lower = description.lower()
+DEFAULT_CATEGORY = "Прочее"
+
+
+class CategoryMatcher:
+    """Aho-Corasick automaton over the keywords of a category set.
+
+    `detect` scans the lowercased description once and returns the first
+    category, in dict order, that has any keyword occurring in it, which is
+    the same result as checking every keyword of every category in turn.
+    """
+
+    def __init__(self, categories: dict):
+        self.names = list(categories)
+        no_match = len(self.names)
+        self._no_match = no_match
+
+        goto = [{}]
+        best = [no_match]
+        # An empty keyword is a substring of every description
+        always = no_match
+        for index, keywords in enumerate(categories.values()):
+            for keyword in keywords:
+                if not keyword:
+                    always = min(always, index)
+                    continue
+                node = 0
+                for ch in keyword:
+                    child = goto[node].get(ch)
+                    if child is None:
+                        child = len(goto)
+                        goto[node][ch] = child
+                        goto.append({})
+                        best.append(no_match)
+                    node = child
+                best[node] = min(best[node], index)
+
+        # Breadth-first so a node's fail target is final before the node
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                target = fail[node]
+                while target and ch not in goto[target]:
+                    target = fail[target]
+                target = goto[target].get(ch, 0)
+                fail[child] = target if target != child else 0
+                best[child] = min(best[child], best[fail[child]])
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._best = best
+        self._always = always
+
+    def detect(self, description: str) -> str:
+        goto, fail, best_at = self._goto, self._fail, self._best
+        best = self._always
+        node = 0
+
+        for ch in description.lower():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if best_at[node] < best:
+                best = best_at[node]
+                if best == 0:
+                    break
+
+        return self.names[best] if best < self._no_match else DEFAULT_CATEGORY
+
+
+DEFAULT_MATCHER = CategoryMatcher(DEFAULT_CATEGORIES)
+
+
+@lru_cache(maxsize=256)
+def _compile(frozen: tuple) -> CategoryMatcher:
+    return CategoryMatcher({name: keywords for name, keywords in frozen})
+
+
+def compile_categories(categories: dict) -> CategoryMatcher:
+    """Compiled matcher for a category set, reused for identical sets."""
+    if not categories or categories is DEFAULT_CATEGORIES:
+        return DEFAULT_MATCHER
+    return _compile(tuple((name, tuple(keywords)) for name, keywords in categories.items()))
+
 
-    for category, keywords in categories.items():
-        for keyword in keywords:
-            if keyword in description_lower:
-                return category
+def detect_category(description: str, custom_categories=None) -> str:
+    """Detect the category of a description.
 
-    return "Прочее"
+    `custom_categories` is either a {name: keywords} dict or a matcher
+    compiled with compile_categories; compile once when detecting many
+    descriptions against the same set.
+    """
+    if isinstance(custom_categories, CategoryMatcher):
+        return custom_categories.detect(description)
+    return compile_categories(custom_categories).detect(description)
 
 
 def get_categories_from_db(db_categories) -> dict:
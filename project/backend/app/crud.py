@@ -1,16 +1,26 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, joinedload
 from datetime import date
-from calendar import monthrange
-from typing import Optional
-from . import models, schemas
-from .category_detector import detect_category, get_categories_from_db, DEFAULT_CATEGORIES
+from sqlalchemy import func, or_, and_, insert, select
+from sqlalchemy.exc import IntegrityError
+from typing import Optional, Tuple
+from . import models, schemas, rollups, analytics
+from .balance import build_balance, summarize_month
+from .category_detector import CategoryMatcher, detect_category, DEFAULT_CATEGORIES
+from .category_cache import category_cache
 
 
-def get_months(db: Session, user_id: int):
-    return db.query(models.Month).filter(
-        models.Month.user_id == user_id
-    ).order_by(models.Month.year.desc(), models.Month.month.desc()).all()
+def months_statement(user_id: int, after: Optional[Tuple[int, int]] = None):
+    """The user's months, newest first, starting after the (year, month) `after`."""
+    table = models.Month
+    statement = select(table).where(table.user_id == user_id)
+    if after:
+        year, month = after
+        statement = statement.where(or_(table.year < year, and_(table.year == year, table.month < month)))
+    return statement.order_by(table.year.desc(), table.month.desc())
+
+
+def get_months(db: Session, user_id: int, after: Optional[Tuple[int, int]] = None, limit: Optional[int] = None):
+    return db.scalars(months_statement(user_id, after).limit(limit)).all()
 
 
 def get_month(db: Session, month_id: int, user_id: Optional[int] = None):
@@ -20,6 +30,47 @@ def get_month(db: Session, month_id: int, user_id: Optional[int] = None):
     return query.first()
 
 
+def month_statement(month_id: int, user_id: int, *options):
+    """The user's month `month_id`, with loader `options` (e.g. selectinload) applied."""
+    return select(models.Month).where(
+        models.Month.id == month_id, models.Month.user_id == user_id
+    ).options(*options)
+
+
+def owned_statement(model, row_id: int, user_id: int):
+    """The income/expense row `row_id` if its month belongs to the user."""
+    return select(model).join(models.Month, model.month_id == models.Month.id).where(
+        model.id == row_id, models.Month.user_id == user_id
+    )
+
+
+def get_owned(db: Session, model, row_id: int, user_id: int):
+    return db.scalars(owned_statement(model, row_id, user_id)).first()
+
+
+def _schema_rows(db: Session, schema, model, *criteria) -> list:
+    """Rows of `model` as dicts with the fields of `schema`, in its field order."""
+    columns = [getattr(model, name) for name in schema.model_fields]
+    return [row._asdict() for row in db.execute(select(*columns).where(*criteria).order_by(model.id))]
+
+
+def month_detail(db: Session, month: models.Month) -> dict:
+    """schemas.Month for a loaded month, read as plain rows without ORM objects."""
+    children = {
+        "incomes": _schema_rows(db, schemas.Income, models.Income, models.Income.month_id == month.id),
+        "fixed_expenses": _schema_rows(
+            db, schemas.FixedExpense, models.FixedExpense, models.FixedExpense.month_id == month.id
+        ),
+        "daily_expenses": _schema_rows(
+            db, schemas.DailyExpense, models.DailyExpense, models.DailyExpense.month_id == month.id
+        ),
+    }
+    return {
+        name: children[name] if name in children else getattr(month, name)
+        for name in schemas.Month.model_fields
+    }
+
+
 def get_month_by_date(db: Session, year: int, month: int, user_id: int):
     return db.query(models.Month).filter(
         models.Month.year == year,
@@ -28,13 +79,30 @@ def get_month_by_date(db: Session, year: int, month: int, user_id: int):
     ).first()
 
 
+def add_month(db: Session, month: schemas.MonthCreate, user_id: int) -> models.Month:
+    """Add a month and its rollups to the current transaction. Does not commit.
+
+    Raises IntegrityError if another transaction created the period first.
+    """
+    db_month = models.Month(**month.model_dump(), user_id=user_id)
+    db.add(db_month)
+    db.flush()
+    rollups.init_month(db, db_month.id)
+    db.flush()
+    return db_month
+
+
 def create_month(db: Session, month: schemas.MonthCreate, user_id: int):
     existing = get_month_by_date(db, month.year, month.month, user_id)
     if existing:
         return existing
 
-    db_month = models.Month(**month.model_dump(), user_id=user_id)
-    db.add(db_month)
+    try:
+        db_month = add_month(db, month, user_id)
+    except IntegrityError:
+        # A concurrent request created the same period first
+        db.rollback()
+        return get_month_by_date(db, month.year, month.month, user_id)
     db.commit()
     db.refresh(db_month)
     return db_month
@@ -44,11 +112,16 @@ def update_month(db: Session, month_id: int, month: schemas.MonthUpdate, user_id
     db_month = get_month(db, month_id, user_id)
     if not db_month:
         return None
+    return apply_month_update(db, db_month, month)
 
+
+def apply_month_update(db: Session, db_month: models.Month, month: schemas.MonthUpdate):
     update_data = month.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_month, key, value)
 
+    db.flush()
+    rollups.touch_month(db, db_month.id)
     db.commit()
     db.refresh(db_month)
     return db_month
@@ -61,29 +134,36 @@ def get_incomes(db: Session, month_id: int):
 def create_income(db: Session, month_id: int, income: schemas.IncomeCreate):
     db_income = models.Income(**income.model_dump(), month_id=month_id)
     db.add(db_income)
+    db.flush()
+    rollups.add_income(db, month_id, db_income.amount)
     db.commit()
     db.refresh(db_income)
     return db_income
 
 
 def update_income(db: Session, income_id: int, income: schemas.IncomeUpdate):
-    db_income = db.query(models.Income).filter(models.Income.id == income_id).first()
+    db_income = db.get(models.Income, income_id)
     if not db_income:
         return None
 
+    old_amount = db_income.amount
     update_data = income.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_income, key, value)
 
+    db.flush()
+    rollups.add_income(db, db_income.month_id, db_income.amount - old_amount)
     db.commit()
     db.refresh(db_income)
     return db_income
 
 
 def delete_income(db: Session, income_id: int):
-    db_income = db.query(models.Income).filter(models.Income.id == income_id).first()
+    db_income = db.get(models.Income, income_id)
     if db_income:
         db.delete(db_income)
+        db.flush()
+        rollups.add_income(db, db_income.month_id, -db_income.amount)
         db.commit()
         return True
     return False
@@ -96,50 +176,84 @@ def get_fixed_expenses(db: Session, month_id: int):
 def create_fixed_expense(db: Session, month_id: int, expense: schemas.FixedExpenseCreate):
     db_expense = models.FixedExpense(**expense.model_dump(), month_id=month_id)
     db.add(db_expense)
+    db.flush()
+    rollups.add_fixed_expense(db, month_id, db_expense.amount)
     db.commit()
     db.refresh(db_expense)
     return db_expense
 
 
 def update_fixed_expense(db: Session, expense_id: int, expense: schemas.FixedExpenseUpdate):
-    db_expense = db.query(models.FixedExpense).filter(models.FixedExpense.id == expense_id).first()
+    db_expense = db.get(models.FixedExpense, expense_id)
     if not db_expense:
         return None
 
+    old_amount = db_expense.amount
     update_data = expense.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_expense, key, value)
 
+    db.flush()
+    rollups.add_fixed_expense(db, db_expense.month_id, db_expense.amount - old_amount)
     db.commit()
     db.refresh(db_expense)
     return db_expense
 
 
 def delete_fixed_expense(db: Session, expense_id: int):
-    db_expense = db.query(models.FixedExpense).filter(models.FixedExpense.id == expense_id).first()
+    db_expense = db.get(models.FixedExpense, expense_id)
     if db_expense:
         db.delete(db_expense)
+        db.flush()
+        rollups.add_fixed_expense(db, db_expense.month_id, -db_expense.amount)
         db.commit()
         return True
     return False
 
 
-def get_daily_expenses(db: Session, month_id: int):
-    return db.query(models.DailyExpense).filter(
-        models.DailyExpense.month_id == month_id
-    ).order_by(models.DailyExpense.date).all()
+def daily_expenses_statement(
+    month_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[str] = None,
+    after: Optional[Tuple[date, int]] = None,
+):
+    """A month's daily expenses ordered by (date, id), starting after `after`."""
+    table = models.DailyExpense
+    statement = select(table).where(table.month_id == month_id)
+    if date_from:
+        statement = statement.where(table.date >= date_from)
+    if date_to:
+        statement = statement.where(table.date <= date_to)
+    if category:
+        statement = statement.where(table.category == category)
+    if after:
+        after_date, after_id = after
+        statement = statement.where(or_(table.date > after_date, and_(table.date == after_date, table.id > after_id)))
+    return statement.order_by(table.date, table.id)
+
+
+def get_daily_expenses(
+    db: Session,
+    month_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[str] = None,
+    after: Optional[Tuple[date, int]] = None,
+    limit: Optional[int] = None,
+):
+    statement = daily_expenses_statement(month_id, date_from, date_to, category, after)
+    return db.scalars(statement.limit(limit)).all()
+
+
+def get_category_matcher(db: Session, user_id: Optional[int] = None) -> CategoryMatcher:
+    return category_cache.get_matcher(db, user_id)
 
 
 def create_daily_expense(db: Session, month_id: int, expense: schemas.DailyExpenseCreate, user_id: Optional[int] = None):
-    db_categories = db.query(models.Category).filter(
-        or_(models.Category.user_id == user_id, models.Category.user_id == None)
-    ).all() if user_id else db.query(models.Category).filter(models.Category.user_id == None).all()
-
-    categories = get_categories_from_db(db_categories) if db_categories else DEFAULT_CATEGORIES
-
     category = expense.category
     if not category or category == "Прочее":
-        category = detect_category(expense.description, categories)
+        category = detect_category(expense.description, get_category_matcher(db, user_id))
 
     db_expense = models.DailyExpense(
         month_id=month_id,
@@ -149,104 +263,186 @@ def create_daily_expense(db: Session, month_id: int, expense: schemas.DailyExpen
         category=category
     )
     db.add(db_expense)
+    db.flush()
+    rollups.add_daily_expense(db, month_id, db_expense.date, db_expense.category, db_expense.amount)
     db.commit()
     db.refresh(db_expense)
     return db_expense
 
 
+def insert_daily_expenses(db: Session, month_id: int, expenses: list, matcher: CategoryMatcher):
+    """Insert many daily expenses with one multi-row INSERT ... RETURNING.
+
+    Detects missing categories with `matcher` and updates rollups with one
+    delta per day and category. Does not commit.
+    """
+    rows = []
+    for expense in expenses:
+        category = expense.category
+        if not category or category == "Прочее":
+            category = matcher.detect(expense.description)
+        rows.append({
+            "month_id": month_id,
+            "date": expense.date,
+            "description": expense.description,
+            "amount": expense.amount,
+            "category": category,
+        })
+
+    table = models.DailyExpense
+    # Rows are sorted by id rather than requesting sort_by_parameter_order,
+    # which makes SQLite fall back to one INSERT per row
+    created = sorted(db.execute(
+        insert(table).returning(
+            table.id, table.month_id, table.date, table.description, table.amount, table.category
+        ),
+        rows
+    ).all(), key=lambda row: row.id)
+    rollups.add_daily_expenses(db, month_id, [(row.date, row.category, row.amount) for row in created])
+    return created
+
+
+def create_daily_expenses_bulk(
+    db: Session,
+    month_id: int,
+    expenses: list,
+    user_id: Optional[int] = None,
+):
+    """Create many daily expenses in one transaction; returns them as dicts."""
+    if not expenses:
+        return []
+
+    created = insert_daily_expenses(db, month_id, expenses, get_category_matcher(db, user_id))
+    db.commit()
+    return [row._asdict() for row in created]
+
+
 def update_daily_expense(db: Session, expense_id: int, expense: schemas.DailyExpenseUpdate):
-    db_expense = db.query(models.DailyExpense).filter(models.DailyExpense.id == expense_id).first()
+    db_expense = db.get(models.DailyExpense, expense_id)
     if not db_expense:
         return None
 
+    old = (db_expense.date, db_expense.category, db_expense.amount)
     update_data = expense.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_expense, key, value)
 
+    db.flush()
+    rollups.replace_daily_expense(
+        db, db_expense.month_id, old, (db_expense.date, db_expense.category, db_expense.amount)
+    )
     db.commit()
     db.refresh(db_expense)
     return db_expense
 
 
 def delete_daily_expense(db: Session, expense_id: int):
-    db_expense = db.query(models.DailyExpense).filter(models.DailyExpense.id == expense_id).first()
+    db_expense = db.get(models.DailyExpense, expense_id)
     if db_expense:
         db.delete(db_expense)
+        db.flush()
+        rollups.add_daily_expense(db, db_expense.month_id, db_expense.date, db_expense.category, db_expense.amount, sign=-1)
         db.commit()
         return True
     return False
 
 
 def calculate_balance(db: Session, month_id: int):
-    month = db.query(models.Month).filter(models.Month.id == month_id).first()
+    month = db.scalars(
+        select(models.Month).where(models.Month.id == month_id).options(joinedload(models.Month.totals))
+    ).first()
     if not month:
         return None
+    return month_balance(db, month)
 
-    total_income = sum(i.amount for i in month.incomes)
-    total_fixed = sum(e.amount for e in month.fixed_expenses)
-    savings_amount = total_income * (month.savings_percent / 100)
-    available_budget = total_income - total_fixed - savings_amount
 
-    days_in_month = monthrange(month.year, month.month)[1]
-    daily_budget = available_budget / days_in_month if days_in_month > 0 else 0
-
-    today = date.today()
-    if today.year == month.year and today.month == month.month:
-        current_day = today.day
-    elif (today.year > month.year) or (today.year == month.year and today.month > month.month):
-        current_day = days_in_month
+def month_balance(db: Session, month: models.Month):
+    """Balance for a loaded month; load `Month.totals` with it to save a query."""
+    rolled_up = month.totals is not None
+    if rolled_up:
+        total_income, total_fixed = month.totals.total_income, month.totals.total_fixed
     else:
-        current_day = 0
-
-    daily_expenses = sorted(month.daily_expenses, key=lambda x: x.date)
-
-    daily_balances = []
-    cumulative_spent = 0
-
-    for day in range(1, days_in_month + 1):
-        day_date = date(month.year, month.month, day)
-        day_expenses = sum(e.amount for e in daily_expenses if e.date == day_date)
-        cumulative_spent += day_expenses
-        expected_spent = daily_budget * day
-        balance = expected_spent - cumulative_spent
-
-        daily_balances.append({
-            "day": day,
-            "date": day_date.isoformat(),
-            "spent": day_expenses,
-            "cumulative_spent": cumulative_spent,
-            "expected_spent": expected_spent,
-            "balance": balance
-        })
-
-    actual_spent = sum(e.amount for e in daily_expenses)
-    expected_spent = daily_budget * current_day
-    balance = expected_spent - actual_spent
+        totals = rollups.compute_month_totals(db, month.id)
+        total_income, total_fixed = totals["total_income"], totals["total_fixed"]
+    daily_totals = rollups.get_daily_totals(db, month.id, rolled_up)
+
+    return build_balance(
+        month.year,
+        month.month,
+        month.savings_percent,
+        total_income,
+        total_fixed,
+        daily_totals,
+    )
 
-    return {
-        "total_income": total_income,
-        "total_fixed_expenses": total_fixed,
-        "savings_amount": savings_amount,
-        "available_budget": available_budget,
-        "days_in_month": days_in_month,
-        "daily_budget": daily_budget,
-        "current_day": current_day,
-        "expected_spent": expected_spent,
-        "actual_spent": actual_spent,
-        "balance": balance,
-        "daily_balances": daily_balances
-    }
 
+def get_month_range(
+    db: Session,
+    user_id: int,
+    start: Optional[Tuple[int, int]] = None,
+    end: Optional[Tuple[int, int]] = None,
+):
+    """Budget summary for each of the user's months between start and end.
+
+    Reads every month and its rollup totals in one joined query; months that
+    have not been rolled up yet are aggregated from raw rows in bulk.
+    """
+    query = db.query(
+        models.Month.id,
+        models.Month.year,
+        models.Month.month,
+        models.Month.savings_percent,
+        models.MonthTotals.total_income,
+        models.MonthTotals.total_fixed,
+        models.MonthTotals.total_spent,
+    ).outerjoin(
+        models.MonthTotals, models.MonthTotals.month_id == models.Month.id
+    ).filter(models.Month.user_id == user_id)
+
+    if start:
+        query = query.filter(or_(
+            models.Month.year > start[0],
+            and_(models.Month.year == start[0], models.Month.month >= start[1])
+        ))
+    if end:
+        query = query.filter(or_(
+            models.Month.year < end[0],
+            and_(models.Month.year == end[0], models.Month.month <= end[1])
+        ))
+
+    rows = query.order_by(models.Month.year, models.Month.month).all()
+    raw_totals = rollups.compute_totals_for_months(
+        db, [row.id for row in rows if row.total_income is None]
+    )
 
-def get_analytics(db: Session, month_id: int):
-    expenses = get_daily_expenses(db, month_id)
+    result = []
+    for row in rows:
+        totals = raw_totals.get(row.id) or {
+            "total_income": row.total_income,
+            "total_fixed": row.total_fixed,
+            "total_spent": row.total_spent,
+        }
+        summary = summarize_month(
+            row.year,
+            row.month,
+            row.savings_percent,
+            totals["total_income"],
+            totals["total_fixed"],
+            totals["total_spent"],
+        )
+        result.append({
+            "id": row.id,
+            "year": row.year,
+            "month": row.month,
+            "savings_percent": row.savings_percent,
+            **summary,
+            "end_balance": summary["available_budget"] - summary["actual_spent"],
+        })
+    return result
 
-    category_totals = {}
-    for expense in expenses:
-        if expense.category not in category_totals:
-            category_totals[expense.category] = 0
-        category_totals[expense.category] += expense.amount
 
+def get_analytics(db: Session, month_id: int, rolled_up: Optional[bool] = None):
+    category_totals = rollups.get_category_totals(db, month_id, rolled_up)
     total = sum(category_totals.values())
 
     categories = [
@@ -255,7 +451,7 @@ def get_analytics(db: Session, month_id: int):
             "amount": amount,
             "percentage": (amount / total * 100) if total > 0 else 0
         }
-        for name, amount in sorted(category_totals.items(), key=lambda x: -x[1])
+        for name, amount in sorted(category_totals.items(), key=lambda x: (-x[1], x[0]))
     ]
 
     return {
@@ -264,6 +460,31 @@ def get_analytics(db: Session, month_id: int):
     }
 
 
+def get_trend_analytics(db: Session, user_id: int, year: Optional[int] = None, window: int = 3):
+    months_query = db.query(models.Month.year, models.Month.month).filter(
+        models.Month.user_id == user_id
+    )
+    expenses_query = db.query(
+        models.Month.year,
+        models.Month.month,
+        models.DailyExpense.category,
+        models.DailyExpense.amount,
+    ).join(models.Month, models.DailyExpense.month_id == models.Month.id).filter(
+        models.Month.user_id == user_id
+    )
+    if year is not None:
+        months_query = months_query.filter(models.Month.year == year)
+        expenses_query = expenses_query.filter(models.Month.year == year)
+
+    month_rows = months_query.all()
+    month_periods = analytics.period_index(
+        [row.year for row in month_rows], [row.month for row in month_rows]
+    )
+    return analytics.build_trend_analytics(
+        *analytics.expense_columns(expenses_query.all()), month_periods, window
+    )
+
+
 def get_categories(db: Session, user_id: Optional[int] = None):
     if user_id:
         return db.query(models.Category).filter(
@@ -282,3 +503,4 @@ def create_default_categories(db: Session):
         db.add(db_category)
 
     db.commit()
+    category_cache.invalidate()
@@ -0,0 +1,132 @@
+"""
+Async variants of the crud functions behind the months, expenses and
+categories routers (see routers/aio).
+
+Reads are native AsyncSession queries. Writes and the composite reads
+(balance, analytics, range) run the sync implementations in crud.py through
+AsyncSession.run_sync, so rollup maintenance and the balance engine exist
+only once.
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, models, schemas
+from .category_cache import category_cache
+from .category_detector import CategoryMatcher
+
+
+async def get_months(db: AsyncSession, user_id: int, after: Optional[tuple] = None, limit: Optional[int] = None):
+    return (await db.scalars(crud.months_statement(user_id, after).limit(limit))).all()
+
+
+async def month_detail(db: AsyncSession, month: models.Month):
+    return await db.run_sync(crud.month_detail, month)
+
+
+async def create_month(db: AsyncSession, month: schemas.MonthCreate, user_id: int):
+    return await db.run_sync(crud.create_month, month, user_id)
+
+
+async def apply_month_update(db: AsyncSession, db_month: models.Month, month: schemas.MonthUpdate):
+    return await db.run_sync(crud.apply_month_update, db_month, month)
+
+
+async def get_incomes(db: AsyncSession, month_id: int):
+    return (await db.scalars(select(models.Income).where(models.Income.month_id == month_id))).all()
+
+
+async def create_income(db: AsyncSession, month_id: int, income: schemas.IncomeCreate):
+    return await db.run_sync(crud.create_income, month_id, income)
+
+
+async def update_income(db: AsyncSession, income_id: int, income: schemas.IncomeUpdate):
+    return await db.run_sync(crud.update_income, income_id, income)
+
+
+async def delete_income(db: AsyncSession, income_id: int):
+    return await db.run_sync(crud.delete_income, income_id)
+
+
+async def get_fixed_expenses(db: AsyncSession, month_id: int):
+    return (await db.scalars(
+        select(models.FixedExpense).where(models.FixedExpense.month_id == month_id)
+    )).all()
+
+
+async def create_fixed_expense(db: AsyncSession, month_id: int, expense: schemas.FixedExpenseCreate):
+    return await db.run_sync(crud.create_fixed_expense, month_id, expense)
+
+
+async def update_fixed_expense(db: AsyncSession, expense_id: int, expense: schemas.FixedExpenseUpdate):
+    return await db.run_sync(crud.update_fixed_expense, expense_id, expense)
+
+
+async def delete_fixed_expense(db: AsyncSession, expense_id: int):
+    return await db.run_sync(crud.delete_fixed_expense, expense_id)
+
+
+async def get_daily_expenses(
+    db: AsyncSession,
+    month_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[str] = None,
+    after: Optional[tuple] = None,
+    limit: Optional[int] = None,
+):
+    statement = crud.daily_expenses_statement(month_id, date_from, date_to, category, after)
+    return (await db.scalars(statement.limit(limit))).all()
+
+
+async def create_daily_expense(
+    db: AsyncSession, month_id: int, expense: schemas.DailyExpenseCreate, user_id: Optional[int] = None
+):
+    return await db.run_sync(crud.create_daily_expense, month_id, expense, user_id)
+
+
+async def create_daily_expenses_bulk(db: AsyncSession, month_id: int, expenses: list, user_id: Optional[int] = None):
+    return await db.run_sync(crud.create_daily_expenses_bulk, month_id, expenses, user_id)
+
+
+async def update_daily_expense(db: AsyncSession, expense_id: int, expense: schemas.DailyExpenseUpdate):
+    return await db.run_sync(crud.update_daily_expense, expense_id, expense)
+
+
+async def delete_daily_expense(db: AsyncSession, expense_id: int):
+    return await db.run_sync(crud.delete_daily_expense, expense_id)
+
+
+async def get_owned(db: AsyncSession, model, row_id: int, user_id: int):
+    return (await db.scalars(crud.owned_statement(model, row_id, user_id))).first()
+
+
+async def month_balance(db: AsyncSession, month: models.Month):
+    return await db.run_sync(crud.month_balance, month)
+
+
+async def get_month_range(db: AsyncSession, user_id: int, start=None, end=None):
+    return await db.run_sync(crud.get_month_range, user_id, start, end)
+
+
+async def get_analytics(db: AsyncSession, month_id: int, rolled_up: Optional[bool] = None):
+    return await db.run_sync(crud.get_analytics, month_id, rolled_up)
+
+
+async def get_trend_analytics(db: AsyncSession, user_id: int, year: Optional[int] = None, window: int = 3):
+    return await db.run_sync(crud.get_trend_analytics, user_id, year, window)
+
+
+async def get_categories(db: AsyncSession, user_id: Optional[int] = None):
+    query = select(models.Category)
+    if user_id:
+        query = query.where(or_(models.Category.user_id == user_id, models.Category.user_id == None))
+    else:
+        query = query.where(models.Category.user_id == None)
+    return (await db.scalars(query)).all()
+
+
+async def get_category_matcher(db: AsyncSession, user_id: Optional[int] = None) -> CategoryMatcher:
+    return await db.run_sync(category_cache.get_matcher, user_id)
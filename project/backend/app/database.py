@@ -1,25 +1,270 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Optional
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from . import metrics, query_profile
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./leprecoin.db")
 
-# SQLite requires special settings for multi-threaded access
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False}
-    )
-else:
-    engine = create_engine(DATABASE_URL)
+# An async driver in DATABASE_URL (sqlite+aiosqlite://, postgresql+asyncpg://)
+# switches the months, expenses and categories routers to AsyncSession.
+# Everything else keeps using the sync engine on the same database.
+ASYNC_DRIVERS = {
+    "sqlite+aiosqlite": "sqlite",
+    "postgresql+asyncpg": "postgresql",
+}
+
+# Pool settings; ignored for in-memory SQLite, which keeps a single connection
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer, and busy_timeout makes writers queue instead of failing
+# with "database is locked".
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))  # negative = KiB
+
+
+class PoolStats:
+    """Checkout counters and wait times for one engine's connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pool = None
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        stats = {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+        if isinstance(self.pool, QueuePool):
+            stats.update(
+                size=self.pool.size(),
+                checked_out=self.pool.checkedout(),
+                checked_in=self.pool.checkedin(),
+                overflow=self.pool.overflow(),
+            )
+        return stats
+
+
+POOL_STATS = {}
+
+
+def _timed_pool_class(base, stats: PoolStats):
+    class TimedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                stats.timeouts += 1
+                raise
+            finally:
+                stats.record_wait(time.perf_counter() - start)
+
+    return TimedPool
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def sqlite_pragmas(memory: bool = False) -> dict:
+    pragmas = {
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": SQLITE_CACHE_SIZE,
+    }
+    if not memory:
+        pragmas = {"journal_mode": SQLITE_JOURNAL_MODE, "mmap_size": SQLITE_MMAP_SIZE, **pragmas}
+    return pragmas
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: dict) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def _engine_options(url: URL, pool_base, stats: PoolStats, overrides: dict) -> dict:
+    options = {}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False} if url.get_driver_name() == "pysqlite" else {}
+    if not _is_memory_sqlite(url):
+        options.update(
+            poolclass=_timed_pool_class(pool_base, stats),
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+    options.update(overrides)
+    return options
+
+
+def _instrument(sync_engine, url: URL, stats: PoolStats, name: str, pragmas: Optional[dict]) -> None:
+    if url.get_backend_name() == "sqlite":
+        pragmas = {**sqlite_pragmas(memory=_is_memory_sqlite(url)), **(pragmas or {})}
+    stats.pool = sync_engine.pool
+    POOL_STATS[name] = stats
+    metrics.instrument_engine(sync_engine, name)
+    query_profile.instrument_engine(sync_engine)
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+        if url.get_backend_name() == "sqlite":
+            apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        stats.checkins += 1
+
+    @event.listens_for(sync_engine, "engine_disposed")
+    def on_disposed(engine):
+        stats.pool = engine.pool
+
+
+def create_db_engine(url, name: str = "sync", pragmas: Optional[dict] = None, **overrides):
+    """Sync engine with pool settings from the environment and SQLite pragmas.
+
+    `pragmas` overrides individual SQLite pragmas; other keyword arguments
+    go to create_engine. Pool stats and query metrics are published under
+    `name`.
+    """
+    url = make_url(url)
+    stats = PoolStats()
+    engine = create_engine(url, **_engine_options(url, QueuePool, stats, overrides))
+    _instrument(engine, url, stats, name, pragmas)
+    return engine
+
+
+def create_async_db_engine(url, name: str = "async", pragmas: Optional[dict] = None, **overrides):
+    """create_db_engine for an async driver."""
+    url = make_url(url)
+    stats = PoolStats()
+    engine = create_async_engine(url, **_engine_options(url, AsyncAdaptedQueuePool, stats, overrides))
+    _instrument(engine.sync_engine, url, stats, name, pragmas)
+    return engine
+
+
+def pool_stats() -> dict:
+    return {name: stats.snapshot() for name, stats in POOL_STATS.items()}
+
+
+url = make_url(DATABASE_URL)
+ASYNC_MODE = url.drivername in ASYNC_DRIVERS
+SYNC_DATABASE_URL = url.set(drivername=ASYNC_DRIVERS[url.drivername]) if ASYNC_MODE else url
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# The engines and session factories are built on first use rather than on
+# import, so importing the app never touches the database. Access them as
+# database.engine / database.SessionLocal (or get_engine() etc.).
+_engine = None
+_async_engine = None
+_SessionLocal = None
+_AsyncSessionLocal = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_db_engine(SYNC_DATABASE_URL)
+    return _engine
+
+
+def get_async_engine():
+    """The async engine in async mode, None otherwise."""
+    global _async_engine
+    if ASYNC_MODE and _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = create_async_db_engine(DATABASE_URL)
+    return _async_engine
+
+
+def get_sessionmaker() -> sessionmaker:
+    global _SessionLocal
+    if _SessionLocal is None:
+        _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _SessionLocal
+
+
+def get_async_sessionmaker() -> Optional[async_sessionmaker]:
+    global _AsyncSessionLocal
+    if ASYNC_MODE and _AsyncSessionLocal is None:
+        _AsyncSessionLocal = async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _AsyncSessionLocal
+
+
+_LAZY = {
+    "engine": get_engine,
+    "async_engine": get_async_engine,
+    "SessionLocal": get_sessionmaker,
+    "AsyncSessionLocal": get_async_sessionmaker,
+}
+
+
+def reset_after_fork() -> None:
+    """Drop connections inherited from a parent process without closing them on its behalf."""
+    for engine in (_engine, _async_engine and _async_engine.sync_engine):
+        if engine is not None:
+            engine.dispose(close=False)
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return _LAZY[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def get_db():
-    db = SessionLocal()
+    db = (_SessionLocal or get_sessionmaker())()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with (_AsyncSessionLocal or get_async_sessionmaker())() as db:
+        yield db
@@ -0,0 +1,260 @@
+"""
+Chunked bank statement (CSV) import.
+
+Statements are read line by line and committed every `chunk_size` lines
+together with the job's progress, so memory stays bounded and an import
+that fails part way can be resumed from the last committed line. Missing
+months are created in the transaction of the chunk that needs them, so a
+failed chunk leaves neither its expenses nor its months behind, and
+descriptions are categorized with category_detector.
+
+Import from the command line:
+
+    python -m app.importer statement.csv --email user@example.com \
+        --delimiter ';' --date-format '%d.%m.%Y' --decimal-comma --expenses-negative
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from . import crud, models, schemas
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_ROW_ERRORS = 50
+
+
+class StatementFormatError(ValueError):
+    """The statement header does not match the column mapping."""
+
+
+def parse_amount(value: str, mapping: schemas.StatementMapping) -> float:
+    value = value.replace("\u00a0", "").replace(" ", "").strip()
+    if mapping.decimal_comma:
+        value = value.replace(".", "").replace(",", ".")
+    return float(value)
+
+
+def parse_row(record: dict, mapping: schemas.StatementMapping) -> Optional[schemas.DailyExpenseCreate]:
+    """Turn one CSV record into an expense, or None if it is not spending.
+
+    Raises ValueError for a record that is not a valid expense row, such as
+    a short "Total" footer the reader filled with None.
+    """
+    for column in (mapping.date_column, mapping.description_column, mapping.amount_column):
+        if record.get(column) is None:
+            raise ValueError(f"missing column {column!r}")
+    amount = parse_amount(record[mapping.amount_column], mapping)
+    if mapping.expenses_negative:
+        if amount >= 0:
+            return None
+        amount = -amount
+    if amount == 0:
+        return None
+
+    category = None
+    if mapping.category_column:
+        category = (record.get(mapping.category_column) or "").strip() or None
+
+    return schemas.DailyExpenseCreate(
+        date=datetime.strptime(record[mapping.date_column].strip(), mapping.date_format).date(),
+        description=record[mapping.description_column].strip(),
+        amount=amount,
+        category=category or "Прочее",
+    )
+
+
+def job_report(job: models.ImportJob) -> dict:
+    return {
+        "id": job.id,
+        "filename": job.filename,
+        "status": job.status,
+        "lines_committed": job.lines_committed,
+        "rows_imported": job.rows_imported,
+        "rows_skipped": job.rows_skipped,
+        "months_created": job.months_created,
+        "elapsed_seconds": job.elapsed_seconds,
+        "rows_per_second": job.rows_imported / job.elapsed_seconds if job.elapsed_seconds else 0.0,
+        "row_errors": json.loads(job.row_errors),
+        "error": job.error,
+    }
+
+
+def create_job(db: Session, user_id: int, filename: str) -> models.ImportJob:
+    job = models.ImportJob(user_id=user_id, filename=filename, status="running")
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def import_statement(
+    db: Session,
+    job: models.ImportJob,
+    lines: Iterable[str],
+    mapping: schemas.StatementMapping,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[dict], None]] = None,
+) -> models.ImportJob:
+    """Import `lines` (including the header) into the job owner's months.
+
+    Lines already counted in `job.lines_committed` are skipped, so calling
+    this again with the same file resumes a failed import.
+    """
+    # A resumed job starts over as running; a new failure sets the error again
+    job.status = "running"
+    job.error = None
+    reader = csv.DictReader(lines, delimiter=mapping.delimiter)
+    required = [mapping.date_column, mapping.description_column, mapping.amount_column]
+    missing = [column for column in required if column not in (reader.fieldnames or [])]
+    if missing:
+        job.status = "failed"
+        job.error = f"Missing columns: {', '.join(missing)}"
+        db.commit()
+        raise StatementFormatError(job.error)
+
+    user_id = job.user_id
+    skip = job.lines_committed
+    matcher = crud.get_category_matcher(db, user_id)
+    month_ids = {}
+    row_errors = json.loads(job.row_errors)
+    pending = {}
+    pending_count = skipped = months_created = 0
+    line_no = skip
+    started = time.perf_counter()
+    elapsed_before = job.elapsed_seconds
+
+    def month_id_for(expense):
+        nonlocal months_created
+        key = (expense.date.year, expense.date.month)
+        if key not in month_ids:
+            month = crud.get_month_by_date(db, *key, user_id)
+            if not month:
+                month = crud.add_month(db, schemas.MonthCreate(year=key[0], month=key[1]), user_id)
+                months_created += 1
+            month_ids[key] = month.id
+        return month_ids[key]
+
+    def commit_chunk(status="running"):
+        nonlocal pending, pending_count, skipped, months_created
+        imported = 0
+        for month_id, expenses in pending.items():
+            imported += len(crud.insert_daily_expenses(db, month_id, expenses, matcher))
+
+        job.lines_committed = line_no
+        job.rows_imported += imported
+        job.rows_skipped += skipped
+        job.months_created += months_created
+        job.row_errors = json.dumps(row_errors[:MAX_ROW_ERRORS], ensure_ascii=False)
+        job.elapsed_seconds = elapsed_before + time.perf_counter() - started
+        job.status = status
+        db.commit()
+
+        pending, pending_count, skipped, months_created = {}, 0, 0, 0
+        report = job_report(job)
+        logger.info(
+            "import %s: %d lines, %d rows imported, %.0f rows/s",
+            job.id, report["lines_committed"], report["rows_imported"], report["rows_per_second"]
+        )
+        if on_progress:
+            on_progress(report)
+
+    try:
+        for line_no, record in enumerate(reader, start=1):
+            if line_no <= skip:
+                continue
+            try:
+                expense = parse_row(record, mapping)
+            except (KeyError, TypeError, ValueError) as e:
+                skipped += 1
+                if len(row_errors) < MAX_ROW_ERRORS:
+                    row_errors.append({"line": line_no, "error": str(e)})
+                continue
+            if expense is None:
+                skipped += 1
+                continue
+
+            pending.setdefault(month_id_for(expense), []).append(expense)
+            pending_count += 1
+            if pending_count >= chunk_size:
+                commit_chunk()
+
+        commit_chunk(status="completed")
+    except Exception as e:
+        db.rollback()
+        job.status = "failed"
+        job.error = str(e)
+        db.commit()
+        logger.exception("import %s failed after line %d", job.id, job.lines_committed)
+
+    return job
+
+
+def main(argv=None) -> int:
+    from .bootstrap import migrate
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m app.importer", description="Import a bank statement CSV")
+    parser.add_argument("file")
+    parser.add_argument("--email", required=True, help="owner of the imported expenses")
+    parser.add_argument("--resume", type=int, metavar="JOB_ID", help="continue a failed import")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--encoding", default="utf-8-sig")
+    for field, info in schemas.StatementMapping.model_fields.items():
+        flag = "--" + field.replace("_", "-")
+        if info.annotation is bool:
+            parser.add_argument(flag, action="store_true")
+        else:
+            parser.add_argument(flag, default=info.default)
+    args = parser.parse_args(argv)
+    mapping = schemas.StatementMapping(**{
+        field: getattr(args, field) for field in schemas.StatementMapping.model_fields
+    })
+
+    migrate()
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.email == args.email).first()
+        if not user:
+            print(f"User {args.email} not found", file=sys.stderr)
+            return 1
+
+        if args.resume:
+            job = db.query(models.ImportJob).filter(
+                models.ImportJob.id == args.resume, models.ImportJob.user_id == user.id
+            ).first()
+            if not job:
+                print(f"Import job {args.resume} not found", file=sys.stderr)
+                return 1
+        else:
+            job = create_job(db, user.id, args.file)
+
+        def progress(report):
+            print(f"job {report['id']}: {report['lines_committed']} lines, "
+                  f"{report['rows_imported']} imported, {report['rows_per_second']:.0f} rows/s")
+
+        with io.open(args.file, encoding=args.encoding, newline="") as f:
+            job = import_statement(db, job, f, mapping, args.chunk_size, progress)
+
+        report = job_report(job)
+        print(f"job {report['id']} {report['status']}: {report['rows_imported']} imported, "
+              f"{report['rows_skipped']} skipped, {report['months_created']} months created")
+        if report["error"]:
+            print(f"error: {report['error']} (resume with --resume {report['id']})", file=sys.stderr)
+            return 1
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
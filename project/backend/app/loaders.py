@@ -0,0 +1,60 @@
+"""
+Request-scoped month loaders.
+
+A month sub-route depends on one of these instead of calling crud.get_month
+itself: the month is resolved and checked against the current user in one
+query, with the eager loading the endpoint needs, and FastAPI hands the same
+instance to everything else in the request that depends on it.
+"""
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from . import crud, models
+from .auth.dependencies import get_current_principal, get_current_principal_async
+from .auth.principal import Principal
+from .database import get_async_db, get_db
+
+# Rollup totals and version, for the balance and analytics endpoints
+TOTALS = (joinedload(models.Month.totals),)
+
+
+def _not_found():
+    return HTTPException(status_code=404, detail="Month not found")
+
+
+def month_loader(*options):
+    """Dependency returning the current user's month `month_id`, loaded with `options`."""
+    def load_month(
+        month_id: int,
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(get_current_principal)
+    ) -> models.Month:
+        month = db.scalars(crud.month_statement(month_id, current_user.id, *options)).first()
+        if not month:
+            raise _not_found()
+        return month
+
+    return load_month
+
+
+def month_loader_async(*options):
+    """month_loader for the AsyncSession routers."""
+    async def load_month(
+        month_id: int,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: Principal = Depends(get_current_principal_async)
+    ) -> models.Month:
+        month = (await db.scalars(crud.month_statement(month_id, current_user.id, *options))).first()
+        if not month:
+            raise _not_found()
+        return month
+
+    return load_month
+
+
+load_month = month_loader()
+load_month_totals = month_loader(*TOTALS)
+
+load_month_async = month_loader_async()
+load_month_totals_async = month_loader_async(*TOTALS)
@@ -1,50 +1,174 @@
-from fastapi import FastAPI
+from fastapi import APIRouter, Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base, SessionLocal
-from .routers import months, expenses, categories, profile
+from sqlalchemy.exc import SQLAlchemyError
+from .database import ASYNC_MODE, get_engine, pool_stats
+from .routers import months, expenses, categories, profile, export, imports, admin
+from .routers.aio import months as aio_months, expenses as aio_expenses, categories as aio_categories
 from .auth import router as auth_router
-from . import crud
+from . import bootstrap, metrics, profiler, query_profile
+from .cache import response_cache
+from .category_cache import category_cache
+from .auth.principal import principal_cache
+from .auth.hashing import hashing_pool
 
-Base.metadata.create_all(bind=engine)
+service_router = APIRouter()
 
-app = FastAPI(title="Leprecoin API", description="API для учёта личных финансов")
+# Schema creation and seeding run in `python -m app.bootstrap`, once per
+# deploy; workers only check for them in /ready.
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-app.include_router(auth_router.router)
-app.include_router(months.router)
-app.include_router(expenses.router)
-app.include_router(categories.router)
-app.include_router(profile.router)
+def shutdown():
+    hashing_pool.shutdown()
 
 
-@app.on_event("startup")
-def startup():
-    db = SessionLocal()
-    try:
-        crud.create_default_categories(db)
-    finally:
-        db.close()
-
-
-@app.get("/")
+@service_router.get("/")
 def root():
     return {"message": "Leprecoin API", "docs": "/docs"}
 
 
-@app.get("/health")
+@service_router.get("/health")
 def health_check():
     """Health check endpoint for monitoring and container orchestration."""
     return {"status": "healthy", "service": "leprecoin-api"}
 
 
-@app.get("/openapi.json", include_in_schema=False)
-def get_openapi_spec():
+@service_router.get("/ready")
+def readiness(response: Response, engine=Depends(get_engine)):
+    """Readiness probe: the database answers and its schema is at the head revision.
+
+    /health only says the process is up; route traffic here once this is 200.
+    """
+    try:
+        with engine.connect() as conn:
+            revision = bootstrap.current_revision(conn)
+    except SQLAlchemyError:
+        response.status_code = 503
+        return {"status": "unavailable", "database": "unreachable"}
+
+    head = bootstrap.head_revision()
+    if revision != head:
+        response.status_code = 503
+        return {"status": "unavailable", "schema": revision, "expected": head}
+    return {"status": "ready", "schema": revision}
+
+
+@service_router.get("/health/cache")
+def cache_stats():
+    """Hit/miss counters of the in-process caches."""
+    return {
+        "responses": response_cache.stats(),
+        "categories": category_cache.stats(),
+        "principals": principal_cache.stats(),
+    }
+
+
+@service_router.get("/health/hashing")
+def hashing_stats():
+    """Password hashing pool load and bcrypt timings."""
+    return hashing_pool.stats()
+
+
+@service_router.get("/health/db")
+def db_pool_stats():
+    """Connection pool checkouts, wait times and current usage per engine."""
+    return pool_stats()
+
+
+def service_metrics():
+    """Pool, cache and password hashing counters for /metrics, read when it is scraped."""
+    pools = pool_stats()
+    yield "db_pool_checkouts_total", "counter", "Connection checkouts by engine.", [
+        ({"engine": name}, stats["checkouts"]) for name, stats in pools.items()
+    ]
+    yield "db_pool_timeouts_total", "counter", "Checkouts that timed out waiting for a connection.", [
+        ({"engine": name}, stats["timeouts"]) for name, stats in pools.items()
+    ]
+    yield "db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection.", [
+        ({"engine": name}, stats["wait_seconds_total"]) for name, stats in pools.items()
+    ]
+    yield "db_pool_checked_out", "gauge", "Connections currently checked out.", [
+        ({"engine": name}, stats["checked_out"]) for name, stats in pools.items() if "checked_out" in stats
+    ]
+    caches = {
+        "responses": response_cache.stats(),
+        "categories": category_cache.stats(),
+        "principals": principal_cache.stats(),
+    }
+    yield "cache_hits_total", "counter", "In-process cache hits.", [
+        ({"cache": name}, stats["hits"]) for name, stats in caches.items()
+    ]
+    yield "cache_misses_total", "counter", "In-process cache misses.", [
+        ({"cache": name}, stats["misses"]) for name, stats in caches.items()
+    ]
+    hashing = hashing_pool.stats()
+    yield "password_hashing_in_flight", "gauge", "Hashes running or queued in the hashing pool.", [
+        ({}, hashing["in_flight"])
+    ]
+    yield "password_hashing_capacity", "gauge", "Hashing pool workers plus queue slots.", [({}, hashing["capacity"])]
+    yield "password_hashing_rejected_total", "counter", "Hashes rejected because the pool was full.", [
+        ({}, hashing["rejected"])
+    ]
+    yield "password_hashing_total", "counter", "Completed bcrypt hashes and verifications.", [({}, hashing["count"])]
+    yield "password_hashing_seconds_total", "counter", "Time spent in bcrypt.", [({}, hashing["seconds_total"])]
+    yield "password_hashing_seconds_max", "gauge", "Slowest bcrypt call since startup.", [({}, hashing["seconds_max"])]
+
+
+metrics.registry.add_collector(service_metrics)
+
+
+@service_router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Request, query, pool and cache metrics in the Prometheus text format.
+
+    Per process: under app.serve this is the answering worker's share,
+    labelled with its worker number.
+    """
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@service_router.get("/openapi.json", include_in_schema=False)
+def get_openapi_spec(request: Request):
     """Export OpenAPI specification."""
-    return app.openapi()
+    return request.app.openapi()
+
+
+def create_app(async_mode: bool = ASYNC_MODE) -> FastAPI:
+    """Build the API; `async_mode` serves the hot routers from AsyncSession."""
+    app = FastAPI(title="Leprecoin API", description="API для учёта личных финансов")
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor", query_profile.HEADER],
+    )
+    if profiler.enabled():
+        app.add_middleware(profiler.ProfilerMiddleware)
+    if query_profile.MODE != "off":
+        app.add_middleware(query_profile.QueryProfileMiddleware)
+    if metrics.ENABLED:
+        app.add_middleware(metrics.MetricsMiddleware)
+
+    app.include_router(auth_router.router)
+    if async_mode:
+        app.include_router(aio_months.router)
+        app.include_router(aio_expenses.router)
+        app.include_router(aio_categories.router)
+    else:
+        app.include_router(months.router)
+        app.include_router(expenses.router)
+        app.include_router(categories.router)
+    app.include_router(profile.router)
+    app.include_router(export.router)
+    app.include_router(imports.router)
+    if profiler.enabled():
+        app.include_router(admin.router)
+    app.include_router(service_router)
+
+    app.add_event_handler("shutdown", shutdown)
+    return app
+
+
+app = create_app()
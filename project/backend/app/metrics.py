@@ -0,0 +1,305 @@
+"""
+Request and query metrics in the Prometheus text exposition format.
+
+MetricsMiddleware records per-route request counts, latency histograms and
+in-flight gauges, labelled by the route template (/api/months/{month_id})
+so ids don't multiply the series. Engines created by app.database report
+every statement to record_query, which adds it to the engine totals and to
+the query count and database time of the request it ran in. GET /metrics
+renders everything, together with the collectors registered by main.py
+(pool and cache stats).
+
+Metrics live in the memory of one process. Under `python -m app.serve`
+each pre-forked worker has its own registry and /metrics answers from
+whichever worker took the request, so every series carries a `worker`
+label (set by set_worker); sum over it in queries. A recycled worker
+starts again from zero under the same label, which Prometheus reads as a
+counter reset.
+
+Set METRICS_ENABLED=false to leave out the middleware and the query hooks;
+benchmarks/bench_metrics.py measures what they cost.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 50, 100)
+
+Labels = Tuple[str, ...]
+
+# Label pairs added to every sample, e.g. 'worker="2"'
+_constant_pairs: List[str] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def set_worker(number: int) -> None:
+    """Label every series this process renders with its app.serve worker number."""
+    _constant_pairs[:] = [f'worker="{number}"']
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = _constant_pairs + [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def sum(self, labels: Labels = ()) -> float:
+        series = self._series.get(labels)
+        return series[1] if series else 0.0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        lines = self.header()
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+# A collector returns (name, type, help, [(labels dict, value), ...]) tuples
+Collector = Callable[[], Iterable[Tuple[str, str, str, list]]]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Collector] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector) -> None:
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for name, type_, help, samples in collector():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {type_}"]
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "Requests by route template and status.", ["method", "route", "status"]
+))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route template.", ["method", "route"]
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requests being served by route template.", ["method", "route"]
+))
+http_queries = registry.register(Histogram(
+    "http_request_db_queries", "Database statements per request.", ["method", "route"], QUERY_COUNT_BUCKETS
+))
+http_db_time = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent in database statements per request.", ["method", "route"]
+))
+db_queries = registry.register(Counter(
+    "db_queries_total", "Statements executed by engine.", ["engine"]
+))
+db_query_time = registry.register(Histogram(
+    "db_query_duration_seconds", "Statement execution time by engine.", ["engine"], QUERY_BUCKETS
+))
+
+
+class RequestQueries:
+    """Statements run on behalf of one request."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Set by the middleware; sync endpoints see it too, as the threadpool copies the context
+current_request: ContextVar[Optional[RequestQueries]] = ContextVar("current_request", default=None)
+
+
+def record_query(engine: str, seconds: float) -> None:
+    db_queries.inc((engine,))
+    db_query_time.observe(seconds, (engine,))
+    request = current_request.get()
+    if request is not None:
+        request.count += 1
+        request.seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def instrument_engine(sync_engine, name: str) -> None:
+    """Report the statements of `sync_engine` to record_query as `name`."""
+    if not ENABLED or event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_metrics_start", None)
+        if start is not None:
+            record_query(name, time.perf_counter() - start)
+
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the request metrics above."""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: List[tuple] = []
+        self._route_count = -1
+
+    def route_template(self, scope) -> str:
+        """The path template of the route `scope` resolves to, or "unmatched".
+
+        Only the path patterns are tried, which costs a fraction of the full
+        route matching the router does afterwards.
+        """
+        routes = scope["app"].router.routes
+        if len(routes) != self._route_count:
+            self._routes = [(route.path_regex.match, route.path, getattr(route, "methods", None)) for route in routes]
+            self._route_count = len(routes)
+
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        partial = None
+        for match, template, methods in self._routes:
+            if match(path):
+                if methods is None or scope["method"] in methods:
+                    return template
+                partial = partial or template
+        return partial or "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        labels = (scope["method"], self.route_template(scope))
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        queries = RequestQueries()
+        token = current_request.set(queries)
+        http_in_flight.inc(labels)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_latency.observe(time.perf_counter() - start, labels)
+            http_in_flight.dec(labels)
+            http_requests.inc(labels + (str(status),))
+            http_queries.observe(queries.count, labels)
+            http_db_time.observe(queries.seconds, labels)
+            current_request.reset(token)
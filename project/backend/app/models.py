@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, DateTime, Text, Boolean
+import secrets
+
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, DateTime, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -19,6 +21,11 @@ class User(Base):
 
 class Month(Base):
     __tablename__ = "months"
+    __table_args__ = (
+        # One month per user and period; also backs listing a user's months
+        # and their (year, month) keyset pagination
+        Index("uq_months_user_period", "user_id", "year", "month", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -31,13 +38,16 @@ class Month(Base):
     incomes = relationship("Income", back_populates="month", cascade="all, delete-orphan")
     fixed_expenses = relationship("FixedExpense", back_populates="month", cascade="all, delete-orphan")
     daily_expenses = relationship("DailyExpense", back_populates="month", cascade="all, delete-orphan")
+    totals = relationship("MonthTotals", back_populates="month", uselist=False, cascade="all, delete-orphan")
+    daily_totals = relationship("DailyTotals", back_populates="month", cascade="all, delete-orphan")
+    category_totals = relationship("CategoryTotals", back_populates="month", cascade="all, delete-orphan")
 
 
 class Income(Base):
     __tablename__ = "incomes"
 
     id = Column(Integer, primary_key=True, index=True)
-    month_id = Column(Integer, ForeignKey("months.id", ondelete="CASCADE"), nullable=False)
+    month_id = Column(Integer, ForeignKey("months.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String(255), nullable=False)
     amount = Column(Float, nullable=False)
 
@@ -48,7 +58,7 @@ class FixedExpense(Base):
     __tablename__ = "fixed_expenses"
 
     id = Column(Integer, primary_key=True, index=True)
-    month_id = Column(Integer, ForeignKey("months.id", ondelete="CASCADE"), nullable=False)
+    month_id = Column(Integer, ForeignKey("months.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String(255), nullable=False)
     amount = Column(Float, nullable=False)
 
@@ -57,6 +67,10 @@ class FixedExpense(Base):
 
 class DailyExpense(Base):
     __tablename__ = "daily_expenses"
+    __table_args__ = (
+        # Backs the (date, id) keyset pagination of a month's expenses
+        Index("ix_daily_expenses_month_date", "month_id", "date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     month_id = Column(Integer, ForeignKey("months.id", ondelete="CASCADE"), nullable=False)
@@ -68,12 +82,75 @@ class DailyExpense(Base):
     month = relationship("Month", back_populates="daily_expenses")
 
 
+class MonthTotals(Base):
+    """Rollup of a month's income, fixed and daily expense totals.
+
+    Maintained by the write functions in crud.py; see app/rollups.py.
+    """
+    __tablename__ = "month_totals"
+
+    month_id = Column(Integer, ForeignKey("months.id", ondelete="CASCADE"), primary_key=True)
+    total_income = Column(Float, nullable=False, default=0)
+    total_fixed = Column(Float, nullable=False, default=0)
+    total_spent = Column(Float, nullable=False, default=0)
+    # Bumped on every change that affects the month's balance or analytics
+    version = Column(Integer, nullable=False, default=1)
+    # Random per row and part of the cache key and ETag with the version: a
+    # month deleted and recreated under the same id (SQLite reuses the
+    # highest id) starts over at version 1 but never matches the old entries
+    token = Column(String(16), nullable=False, default=lambda: secrets.token_hex(8))
+
+    month = relationship("Month", back_populates="totals")
+
+
+class DailyTotals(Base):
+    __tablename__ = "daily_totals"
+
+    month_id = Column(Integer, ForeignKey("months.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    amount = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    month = relationship("Month", back_populates="daily_totals")
+
+
+class CategoryTotals(Base):
+    __tablename__ = "category_totals"
+
+    month_id = Column(Integer, ForeignKey("months.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(String(100), primary_key=True)
+    amount = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    month = relationship("Month", back_populates="category_totals")
+
+
 class Category(Base):
     __tablename__ = "categories"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
     name = Column(String(100), nullable=False)
     keywords = Column(Text, nullable=False)
 
     user = relationship("User", back_populates="categories")
+
+
+class ImportJob(Base):
+    """Progress of a bank statement import; see app/importer.py."""
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    status = Column(String(20), nullable=False, default="running")
+    # Data lines (excluding the header) committed so far; resuming skips them
+    lines_committed = Column(Integer, nullable=False, default=0)
+    rows_imported = Column(Integer, nullable=False, default=0)
+    rows_skipped = Column(Integer, nullable=False, default=0)
+    months_created = Column(Integer, nullable=False, default=0)
+    elapsed_seconds = Column(Float, nullable=False, default=0)
+    row_errors = Column(Text, nullable=False, default="[]")
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,46 @@
+"""
+Keyset pagination helpers.
+
+Cursors are the sort key of the last row on a page, base64-encoded so
+clients treat them as opaque. Routers fetch `limit + 1` rows: the extra row
+only tells us whether there is a next page, whose cursor is returned in the
+X-Next-Cursor header so list response bodies keep their shape.
+"""
+import base64
+from typing import Callable, Optional, Sequence
+
+from fastapi import HTTPException, Response
+
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    raw = ",".join(str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], *types: Callable) -> Optional[tuple]:
+    """Decode a cursor into a tuple of `types`; 400 if it is malformed."""
+    if cursor is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        parts = raw.split(",")
+        if len(parts) != len(types):
+            raise ValueError(raw)
+        return tuple(convert(part) for convert, part in zip(types, parts))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def fetch_limit(limit: Optional[int]) -> Optional[int]:
+    return limit + 1 if limit else None
+
+
+def paginate(response: Response, rows: Sequence, limit: Optional[int], key: Callable) -> Sequence:
+    """Trim the look-ahead row and set the next-page cursor header."""
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(rows[-1]))
+    return rows
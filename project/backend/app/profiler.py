@@ -0,0 +1,267 @@
+"""
+On-demand sampling profiler.
+
+A background thread samples the Python stacks of every thread with
+sys._current_frames() and counts them, so the profiled code runs unchanged
+at full speed between samples. Stacks are reported in the collapsed format
+flamegraph.pl, speedscope and inferno read:
+
+    run (anyio/_backends/_asyncio.py:851);get_month (app/routers/months.py:73);month_detail (app/crud.py:210) 12
+
+or as a self-contained HTML flame graph. Idle threads (waiting on a queue,
+a lock or the event loop selector) are left out.
+
+Only the users listed in PROFILER_USERS (comma-separated ids) can profile;
+with none listed the middleware and the admin routes are not installed,
+so the profiler costs nothing. Allowed users can
+
+- add `?profile=1` (or `?profile=html`) to any request to get its profile
+  instead of its response; the original status is in X-Profile-Status, and
+- GET /api/admin/profile?seconds=10 to sample the whole process.
+
+Samples cover every busy thread, so requests running concurrently in the
+same worker show up in a request profile too.
+"""
+import html
+import os
+import sys
+import sysconfig
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from .auth.dependencies import COOKIE_NAME, principal_for_token
+from .auth.security import decode_access_token
+from .database import get_db
+
+ALLOWED_USERS = frozenset(int(i) for i in os.getenv("PROFILER_USERS", "").replace(" ", "").split(",") if i)
+DEFAULT_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.005"))
+REQUEST_INTERVAL = 0.001
+MAX_SECONDS = 60
+
+# A thread whose innermost Python frame is in one of these is waiting, not working
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+# Stripped from file names in frame labels, longest first
+_PATH_PREFIXES = sorted({
+    *(path + os.sep for path in sysconfig.get_paths().values()),
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep,
+}, key=len, reverse=True)
+
+
+def enabled() -> bool:
+    return bool(ALLOWED_USERS)
+
+
+def _frame_name(code) -> str:
+    filename = code.co_filename
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class Sampler:
+    """Counts the stacks of all other threads every `interval` seconds."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.ticks = 0
+        self._names: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _name(self, code) -> str:
+        name = self._names.get(code)
+        if name is None:
+            name = self._names[code] = _frame_name(code)
+        return name
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or frame.f_code.co_filename.endswith(IDLE_FILES):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._name(frame.f_code))
+                frame = frame.f_back
+            self.samples[tuple(reversed(stack))] += 1
+        self.ticks += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> "Sampler":
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+# One profile at a time; overlapping samplers would slow each other down
+_busy = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def acquire() -> None:
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy()
+
+
+def release() -> None:
+    _busy.release()
+
+
+def collapsed(samples: Counter) -> str:
+    """Stacks in the collapsed format, one `frame;frame;... count` per line."""
+    return "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(samples.items()))
+
+
+def _tree(samples: Counter) -> dict:
+    root = {"count": 0, "children": {}}
+    for stack, count in samples.items():
+        root["count"] += count
+        node = root
+        for frame in stack:
+            node = node["children"].setdefault(frame, {"count": 0, "children": {}})
+            node["count"] += count
+    return root
+
+
+def flamegraph_html(samples: Counter, title: str = "Profile", min_share: float = 0.002) -> str:
+    """A self-contained HTML flame graph (root at the top) of `samples`."""
+    root = _tree(samples)
+    total = root["count"] or 1
+
+    def render(node: dict) -> str:
+        parts = []
+        for frame, child in sorted(node["children"].items(), key=lambda item: -item[1]["count"]):
+            if child["count"] / total < min_share:
+                continue
+            label = html.escape(frame)
+            # Frames of one file share a colour
+            hue = 15 + zlib.crc32(frame.split(" (", 1)[-1].encode()) % 45
+            parts.append(
+                f'<div class="f" style="width:{child["count"] / node["count"] * 100:.3f}%">'
+                f'<div class="n" style="background:hsl({hue},85%,62%)" '
+                f'title="{label}: {child["count"]} samples, {child["count"] / total:.1%}">{label}</div>'
+                f'<div class="c">{render(child)}</div></div>'
+            )
+        return "".join(parts)
+
+    body = render(root)
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title><style>
+body{{font:11px monospace;margin:8px}}
+.c{{display:flex}}
+.f{{overflow:hidden}}
+.n{{white-space:nowrap;overflow:hidden;text-overflow:ellipsis;border:1px solid #fff;padding:1px 2px}}
+</style></head><body>
+<h3>{html.escape(title)}: {root["count"]} samples</h3>
+<div class="c">{body}</div>
+</body></html>
+"""
+
+
+def render(samples: Counter, output: str, title: str) -> Tuple[bytes, str]:
+    """The profile as (body, media type) for `output` "collapsed" or "html"."""
+    if output == "html":
+        return flamegraph_html(samples, title).encode(), "text/html; charset=utf-8"
+    return collapsed(samples).encode(), "text/plain; charset=utf-8"
+
+
+def _cookie_token(scope) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key != b"cookie":
+            continue
+        for part in value.decode("latin-1").split(";"):
+            name, _, token = part.strip().partition("=")
+            if name == COOKIE_NAME:
+                return token
+    return None
+
+
+def _allowed_user(scope) -> bool:
+    """Whether the request comes from an active user in ALLOWED_USERS.
+
+    Decodes the token first, so other users never touch the database; an
+    allowed one is then checked like any authenticated request, through
+    the principal cache and the app's get_db (blocking, run it in a thread).
+    """
+    token = _cookie_token(scope)
+    payload = decode_access_token(token) if token else None
+    if not payload or not str(payload.get("sub", "")).isdigit() or int(payload["sub"]) not in ALLOWED_USERS:
+        return False
+    app = scope.get("app")
+    db_factory = getattr(app, "dependency_overrides", {}).get(get_db, get_db)
+    try:
+        with contextmanager(db_factory)() as db:
+            return principal_for_token(token, db).id in ALLOWED_USERS
+    except HTTPException:
+        return False
+
+
+class ProfilerMiddleware:
+    """Replaces the response of a `?profile=1` request from an allowed user with its profile."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        output = None
+        if scope["type"] == "http" and b"profile=" in scope["query_string"]:
+            value = parse_qs(scope["query_string"].decode("latin-1")).get("profile", [""])[-1]
+            if value in ("1", "html") and await run_in_threadpool(_allowed_user, scope):
+                output = "html" if value == "html" else "collapsed"
+        if output is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            acquire()
+        except ProfilerBusy:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        sampler = Sampler(REQUEST_INTERVAL).start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            samples = sampler.stop()
+            release()
+        elapsed = time.perf_counter() - started
+
+        body, media_type = render(samples, output, f"{scope['method']} {scope['path']} ({elapsed * 1000:.1f} ms)")
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", media_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+            (b"x-profile-status", str(status).encode()),
+            (b"x-profile-samples", str(sampler.ticks).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
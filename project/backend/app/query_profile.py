@@ -0,0 +1,173 @@
+"""
+Per-request SQL profiling and N+1 detection.
+
+With SQL_PROFILE=all every request is profiled; with SQL_PROFILE=header
+only requests sending `X-SQL-Profile: 1` are. A profiled request records
+each statement it runs with its time. Statements are grouped by shape (the
+SQL with literals and IN lists collapsed), and a SELECT shape that runs
+SQL_PROFILE_REPEAT times or more is flagged as a probable N+1, e.g. a lazy
+load of Month.incomes inside a loop. The response gets a summary header:
+
+    X-SQL-Profile: queries=12; time_ms=4.1; n_plus_one=1
+
+and the full breakdown is logged to the "app.query_profile" logger.
+Statements run after the response has started (streaming exports) are only
+in the log. Tests use capture() through the sql_profile and max_queries
+fixtures instead.
+"""
+import logging
+import os
+import re
+import time
+from collections import Counter as Tally
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+MODE = os.getenv("SQL_PROFILE", "off").lower()
+REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILE_REPEAT", "3"))
+
+HEADER = "X-SQL-Profile"
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*(?:\?|%\([^)]*\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\([^)]*\)s|:\w+|\$\d+))*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """`statement` with literals and parameter lists collapsed, for grouping."""
+    shape = _IN_LISTS.sub("(?)", statement)
+    shape = _LITERALS.sub("?", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+class QueryProfile:
+    """Statements and timings of one request (or one capture() block)."""
+
+    def __init__(self):
+        self.statements: List[Tuple[str, float]] = []
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.statements.append((statement, seconds))
+
+    def clear(self) -> None:
+        self.statements.clear()
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for _, seconds in self.statements)
+
+    def shapes(self) -> Dict[str, Tuple[int, float]]:
+        """Shape -> (count, total seconds), most frequent first."""
+        counts, times = Tally(), Tally()
+        for statement, seconds in self.statements:
+            shape = statement_shape(statement)
+            counts[shape] += 1
+            times[shape] += seconds
+        return {shape: (count, times[shape]) for shape, count in counts.most_common()}
+
+    def repeated(self, threshold: Optional[int] = None) -> Dict[str, Tuple[int, float]]:
+        """SELECT shapes run at least `threshold` times: probable N+1 queries."""
+        threshold = threshold or REPEAT_THRESHOLD
+        return {
+            shape: stats for shape, stats in self.shapes().items()
+            if stats[0] >= threshold and shape.upper().startswith("SELECT")
+        }
+
+    def summary(self) -> str:
+        return f"queries={self.count}; time_ms={self.seconds * 1000:.1f}; n_plus_one={len(self.repeated())}"
+
+    def report(self) -> str:
+        lines = [self.summary()]
+        repeated = self.repeated()
+        for shape, (count, seconds) in self.shapes().items():
+            flag = "  <- probable N+1" if shape in repeated else ""
+            lines.append(f"  {count:4d}x {seconds * 1000:8.2f} ms  {shape[:200]}{flag}")
+        return "\n".join(lines)
+
+
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("current_profile", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        context._profile_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    start = getattr(context, "_profile_start", None)
+    if profile is not None and start is not None:
+        profile.add(statement, time.perf_counter() - start)
+
+
+def instrument_engine(sync_engine) -> None:
+    """Record the statements of `sync_engine` into the current request's profile."""
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def capture(sync_engine):
+    """Profile every statement `sync_engine` runs in the block, from any thread."""
+    profile = QueryProfile()
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        context._capture_start = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        profile.add(statement, time.perf_counter() - context._capture_start)
+
+    event.listen(sync_engine, "before_cursor_execute", before)
+    event.listen(sync_engine, "after_cursor_execute", after)
+    try:
+        yield profile
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before)
+        event.remove(sync_engine, "after_cursor_execute", after)
+
+
+def _requested(scope) -> bool:
+    if MODE == "all":
+        return True
+    if MODE == "header":
+        name = HEADER.lower().encode()
+        return any(key == name and value not in (b"", b"0") for key, value in scope["headers"])
+    return False
+
+
+class QueryProfileMiddleware:
+    """ASGI middleware profiling the requests SQL_PROFILE selects."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+
+        async def send_with_summary(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", [])) + [(HEADER.encode(), profile.summary().encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_summary)
+        finally:
+            current_profile.reset(token)
+            log = logger.warning if profile.repeated() else logger.info
+            log("%s %s %s", scope["method"], scope["path"], profile.report())
@@ -0,0 +1,345 @@
+"""
+Incrementally maintained per-month rollups.
+
+The write functions in crud.py call into this module inside the same
+transaction as the raw row change, so `month_totals`, `daily_totals` and
+`category_totals` always match `incomes`, `fixed_expenses` and
+`daily_expenses` once the transaction commits. Months created before the
+rollup tables existed are read from raw rows until they are rebuilt.
+
+Rebuild or verify from the command line:
+
+    python -m app.rollups verify
+    python -m app.rollups rebuild [--month-id ID ...]
+"""
+import argparse
+import sys
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+
+TOLERANCE = 1e-6
+
+
+def compute_month_totals(db: Session, month_id: int) -> dict:
+    total_income = db.query(func.coalesce(func.sum(models.Income.amount), 0)).filter(
+        models.Income.month_id == month_id
+    ).scalar()
+    total_fixed = db.query(func.coalesce(func.sum(models.FixedExpense.amount), 0)).filter(
+        models.FixedExpense.month_id == month_id
+    ).scalar()
+    total_spent = db.query(func.coalesce(func.sum(models.DailyExpense.amount), 0)).filter(
+        models.DailyExpense.month_id == month_id
+    ).scalar()
+    return {"total_income": total_income, "total_fixed": total_fixed, "total_spent": total_spent}
+
+
+def compute_totals_for_months(db: Session, month_ids: list) -> dict:
+    """Raw totals for several months at once, one grouped query per table."""
+    result = {
+        month_id: {"total_income": 0, "total_fixed": 0, "total_spent": 0}
+        for month_id in month_ids
+    }
+    if not month_ids:
+        return result
+
+    for model, field in (
+        (models.Income, "total_income"),
+        (models.FixedExpense, "total_fixed"),
+        (models.DailyExpense, "total_spent"),
+    ):
+        rows = db.query(model.month_id, func.sum(model.amount)).filter(
+            model.month_id.in_(month_ids)
+        ).group_by(model.month_id).all()
+        for month_id, amount in rows:
+            result[month_id][field] = amount
+    return result
+
+
+def _raw_grouped(db: Session, month_id: int, column) -> dict:
+    rows = db.query(
+        column, func.sum(models.DailyExpense.amount), func.count(models.DailyExpense.id)
+    ).filter(models.DailyExpense.month_id == month_id).group_by(column).all()
+    return {key: (amount, count) for key, amount, count in rows}
+
+
+def _has_totals(db: Session, month_id: int) -> bool:
+    return db.query(models.MonthTotals.month_id).filter(
+        models.MonthTotals.month_id == month_id
+    ).first() is not None
+
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _add_row(db: Session, model, keys: dict, amount: float, count: int):
+    """Insert the key's row or add to it, safe against a concurrent insert of the same key."""
+    insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        stmt = insert(model).values(**keys, amount=amount, count=count)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={"amount": model.amount + stmt.excluded.amount, "count": model.count + stmt.excluded.count},
+        ))
+        return
+
+    increment = {model.amount: model.amount + amount, model.count: model.count + count}
+    if db.query(model).filter_by(**keys).update(increment, synchronize_session=False):
+        return
+    try:
+        with db.begin_nested():
+            db.add(model(**keys, amount=amount, count=count))
+    except IntegrityError:
+        # Another transaction inserted the key first
+        db.query(model).filter_by(**keys).update(increment, synchronize_session=False)
+
+
+def _bump(db: Session, model, keys: dict, amount: float, count: int):
+    if count > 0:
+        _add_row(db, model, keys, amount, count)
+        return
+    db.query(model).filter_by(**keys).update(
+        {model.amount: model.amount + amount, model.count: model.count + count},
+        synchronize_session=False
+    )
+    db.query(model).filter_by(**keys).filter(model.count <= 0).delete(synchronize_session=False)
+
+
+def _update_month(db: Session, month_id: int, values: dict):
+    values[models.MonthTotals.version] = models.MonthTotals.version + 1
+    db.query(models.MonthTotals).filter(models.MonthTotals.month_id == month_id).update(
+        values, synchronize_session=False
+    )
+
+
+def init_month(db: Session, month_id: int):
+    db.add(models.MonthTotals(month_id=month_id, total_income=0, total_fixed=0, total_spent=0, version=1))
+
+
+def touch_month(db: Session, month_id: int):
+    """Bump the month version after a change that does not affect totals."""
+    if not _has_totals(db, month_id):
+        rebuild_month(db, month_id)
+        return
+    _update_month(db, month_id, {})
+
+
+def add_income(db: Session, month_id: int, amount: float):
+    """Apply an income delta. Raw rows must already be flushed."""
+    if not _has_totals(db, month_id):
+        rebuild_month(db, month_id)
+        return
+    _update_month(db, month_id, {models.MonthTotals.total_income: models.MonthTotals.total_income + amount})
+
+
+def add_fixed_expense(db: Session, month_id: int, amount: float):
+    """Apply a fixed expense delta. Raw rows must already be flushed."""
+    if not _has_totals(db, month_id):
+        rebuild_month(db, month_id)
+        return
+    _update_month(db, month_id, {models.MonthTotals.total_fixed: models.MonthTotals.total_fixed + amount})
+
+
+def _apply_daily_expense(db: Session, month_id: int, expense_date: date, category: str, amount: float, sign: int):
+    _update_month(db, month_id, {models.MonthTotals.total_spent: models.MonthTotals.total_spent + sign * amount})
+    _bump(db, models.DailyTotals, {"month_id": month_id, "date": expense_date}, sign * amount, sign)
+    _bump(db, models.CategoryTotals, {"month_id": month_id, "category": category}, sign * amount, sign)
+
+
+def add_daily_expense(db: Session, month_id: int, expense_date: date, category: str, amount: float, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) one daily expense from the rollups.
+
+    Raw rows must already be flushed, so a month without rollups can be
+    rebuilt from them instead.
+    """
+    if not _has_totals(db, month_id):
+        rebuild_month(db, month_id)
+        return
+    _apply_daily_expense(db, month_id, expense_date, category, amount, sign)
+
+
+def add_daily_expenses(db: Session, month_id: int, expenses: list):
+    """Add many (date, category, amount) expenses with one delta per key."""
+    if not _has_totals(db, month_id):
+        rebuild_month(db, month_id)
+        return
+
+    by_date, by_category = {}, {}
+    for expense_date, category, amount in expenses:
+        for groups, key in ((by_date, expense_date), (by_category, category)):
+            total, count = groups.get(key, (0, 0))
+            groups[key] = (total + amount, count + 1)
+
+    _update_month(db, month_id, {
+        models.MonthTotals.total_spent: models.MonthTotals.total_spent + sum(a for _, _, a in expenses)
+    })
+    for expense_date, (amount, count) in by_date.items():
+        _bump(db, models.DailyTotals, {"month_id": month_id, "date": expense_date}, amount, count)
+    for category, (amount, count) in by_category.items():
+        _bump(db, models.CategoryTotals, {"month_id": month_id, "category": category}, amount, count)
+
+
+def replace_daily_expense(db: Session, month_id: int, old: tuple, new: tuple):
+    """Move one daily expense from old to new (date, category, amount)."""
+    if not _has_totals(db, month_id):
+        rebuild_month(db, month_id)
+        return
+    _apply_daily_expense(db, month_id, *old, sign=-1)
+    _apply_daily_expense(db, month_id, *new, sign=1)
+
+
+def get_month_totals(db: Session, month_id: int) -> Optional[dict]:
+    """Return the month's rollup totals, or None if it has not been rolled up."""
+    totals = db.query(models.MonthTotals).filter(models.MonthTotals.month_id == month_id).first()
+    if not totals:
+        return None
+    return {
+        "total_income": totals.total_income,
+        "total_fixed": totals.total_fixed,
+        "total_spent": totals.total_spent,
+    }
+
+
+def get_daily_totals(db: Session, month_id: int, rolled_up: Optional[bool] = None) -> dict:
+    """Map each expense date of the month to the amount spent that day."""
+    if rolled_up is None:
+        rolled_up = _has_totals(db, month_id)
+    if not rolled_up:
+        return {key: amount for key, (amount, _) in _raw_grouped(db, month_id, models.DailyExpense.date).items()}
+    return dict(
+        db.query(models.DailyTotals.date, models.DailyTotals.amount).filter(
+            models.DailyTotals.month_id == month_id
+        ).all()
+    )
+
+
+def get_category_totals(db: Session, month_id: int, rolled_up: Optional[bool] = None) -> dict:
+    """Map each category used in the month to its total amount."""
+    if rolled_up is None:
+        rolled_up = _has_totals(db, month_id)
+    if not rolled_up:
+        return {key: amount for key, (amount, _) in _raw_grouped(db, month_id, models.DailyExpense.category).items()}
+    return dict(
+        db.query(models.CategoryTotals.category, models.CategoryTotals.amount).filter(
+            models.CategoryTotals.month_id == month_id
+        ).all()
+    )
+
+
+def rebuild_month(db: Session, month_id: int):
+    """Recompute all rollups for a month from raw rows. Does not commit."""
+    version = db.query(models.MonthTotals.version).filter(
+        models.MonthTotals.month_id == month_id
+    ).scalar()
+    for model in (models.DailyTotals, models.CategoryTotals, models.MonthTotals):
+        db.query(model).filter(model.month_id == month_id).delete()
+
+    db.add(models.MonthTotals(
+        month_id=month_id, version=(version or 0) + 1, **compute_month_totals(db, month_id)
+    ))
+    for expense_date, (amount, count) in _raw_grouped(db, month_id, models.DailyExpense.date).items():
+        db.add(models.DailyTotals(month_id=month_id, date=expense_date, amount=amount, count=count))
+    for category, (amount, count) in _raw_grouped(db, month_id, models.DailyExpense.category).items():
+        db.add(models.CategoryTotals(month_id=month_id, category=category, amount=amount, count=count))
+    db.flush()
+
+
+def _month_ids(db: Session, month_ids: Optional[Iterable[int]]) -> list:
+    if month_ids:
+        return list(month_ids)
+    return [row.id for row in db.query(models.Month.id).order_by(models.Month.id)]
+
+
+def _differs(expected: float, actual: float) -> bool:
+    return abs(expected - actual) > TOLERANCE * max(1.0, abs(expected))
+
+
+def verify_month(db: Session, month_id: int) -> list:
+    """Compare stored rollups with raw rows and return a list of drifts."""
+    drifts = []
+
+    def check(field, expected, actual):
+        if actual is None or _differs(expected, actual):
+            drifts.append({"month_id": month_id, "field": field, "expected": expected, "actual": actual})
+
+    totals = db.query(models.MonthTotals).filter(models.MonthTotals.month_id == month_id).first()
+    if not totals:
+        return [{"month_id": month_id, "field": "month_totals", "expected": "row", "actual": None}]
+
+    for field, expected in compute_month_totals(db, month_id).items():
+        check(field, expected, getattr(totals, field))
+
+    for model, column, key in (
+        (models.DailyTotals, models.DailyExpense.date, "date"),
+        (models.CategoryTotals, models.DailyExpense.category, "category"),
+    ):
+        expected = _raw_grouped(db, month_id, column)
+        stored = {
+            getattr(row, key): (row.amount, row.count)
+            for row in db.query(model).filter(model.month_id == month_id)
+        }
+        for value in sorted(set(expected) | set(stored), key=str):
+            exp_amount, exp_count = expected.get(value, (0, 0))
+            amount, count = stored.get(value, (None, None))
+            check(f"{model.__tablename__}[{value}].amount", exp_amount, amount)
+            if count != exp_count:
+                drifts.append({
+                    "month_id": month_id,
+                    "field": f"{model.__tablename__}[{value}].count",
+                    "expected": exp_count,
+                    "actual": count,
+                })
+
+    return drifts
+
+
+def verify(db: Session, month_ids: Optional[Iterable[int]] = None) -> list:
+    drifts = []
+    for month_id in _month_ids(db, month_ids):
+        drifts.extend(verify_month(db, month_id))
+    return drifts
+
+
+def rebuild(db: Session, month_ids: Optional[Iterable[int]] = None) -> int:
+    ids = _month_ids(db, month_ids)
+    for month_id in ids:
+        rebuild_month(db, month_id)
+    db.commit()
+    return len(ids)
+
+
+def main(argv=None) -> int:
+    from .bootstrap import migrate
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m app.rollups", description="Maintain month rollup tables")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--month-id", type=int, action="append", dest="month_ids", help="limit to a month (repeatable)")
+    args = parser.parse_args(argv)
+
+    migrate()
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            count = rebuild(db, args.month_ids)
+            print(f"Rebuilt rollups for {count} month(s)")
+            return 0
+
+        drifts = verify(db, args.month_ids)
+        for drift in drifts:
+            print(f"month {drift['month_id']}: {drift['field']} expected {drift['expected']}, got {drift['actual']}")
+        print(f"{len(drifts)} drift(s) found")
+        return 1 if drifts else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from .. import profiler
+from ..auth.dependencies import get_current_principal
+from ..auth.principal import Principal
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+def require_profiler_user(current_user: Principal = Depends(get_current_principal)) -> Principal:
+    if current_user.id not in profiler.ALLOWED_USERS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to profile")
+    return current_user
+
+
+@router.get("/profile")
+async def profile_process(
+    seconds: float = Query(10, gt=0, le=profiler.MAX_SECONDS),
+    interval: float = Query(profiler.DEFAULT_INTERVAL, ge=0.001, le=1),
+    format: Literal["collapsed", "html"] = "collapsed",
+    current_user: Principal = Depends(require_profiler_user)
+):
+    """Sample every thread of this worker for `seconds` and return the stacks.
+
+    The collapsed output feeds flamegraph.pl, speedscope or inferno; html is
+    a flame graph to open in a browser.
+    """
+    try:
+        profiler.acquire()
+    except profiler.ProfilerBusy:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+
+    sampler = profiler.Sampler(interval).start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        samples = sampler.stop()
+        profiler.release()
+
+    body, media_type = profiler.render(samples, format, f"Process, {seconds:g} s")
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    extension = "html" if format == "html" else "folded"
+    return Response(content=body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="profile-{stamp}.{extension}"',
+        "X-Profile-Samples": str(sampler.ticks),
+    })
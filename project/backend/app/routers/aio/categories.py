@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from ... import schemas, crud_async
+from ...database import get_async_db
+from ...category_detector import detect_category
+from ...auth.dependencies import get_current_principal_async
+from ...auth.principal import Principal
+
+router = APIRouter(prefix="/api", tags=["categories"])
+
+
+@router.get("/categories", response_model=List[schemas.Category])
+async def get_categories(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    return await crud_async.get_categories(db, current_user.id)
+
+
+@router.post("/detect-category", response_model=schemas.DetectCategoryResponse)
+async def detect_category_endpoint(
+    request: schemas.DetectCategoryRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    matcher = await crud_async.get_category_matcher(db, current_user.id)
+    category = detect_category(request.description, matcher)
+    return {"category": category}
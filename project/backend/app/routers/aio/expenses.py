@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from ... import schemas, crud_async
+from ...database import get_async_db
+from ...models import Income, FixedExpense, DailyExpense
+from ...auth.dependencies import get_current_principal_async
+from ...auth.principal import Principal
+
+router = APIRouter(prefix="/api", tags=["expenses"])
+
+
+async def check_ownership(db: AsyncSession, model, row_id: int, user_id: int, detail: str):
+    row = await crud_async.get_owned(db, model, row_id, user_id)
+    if not row:
+        raise HTTPException(status_code=404, detail=detail)
+    return row
+
+
+@router.put("/incomes/{income_id}", response_model=schemas.Income)
+async def update_income(
+    income_id: int,
+    income: schemas.IncomeUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    db_income = await check_ownership(db, Income, income_id, current_user.id, "Income not found")
+    db_income = await crud_async.update_income(db, db_income.id, income)
+    if not db_income:
+        raise HTTPException(status_code=404, detail="Income not found")
+    return db_income
+
+
+@router.delete("/incomes/{income_id}")
+async def delete_income(
+    income_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    db_income = await check_ownership(db, Income, income_id, current_user.id, "Income not found")
+    if not await crud_async.delete_income(db, db_income.id):
+        raise HTTPException(status_code=404, detail="Income not found")
+    return {"message": "Income deleted"}
+
+
+@router.put("/fixed-expenses/{expense_id}", response_model=schemas.FixedExpense)
+async def update_fixed_expense(
+    expense_id: int,
+    expense: schemas.FixedExpenseUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    db_expense = await check_ownership(db, FixedExpense, expense_id, current_user.id, "Fixed expense not found")
+    db_expense = await crud_async.update_fixed_expense(db, db_expense.id, expense)
+    if not db_expense:
+        raise HTTPException(status_code=404, detail="Fixed expense not found")
+    return db_expense
+
+
+@router.delete("/fixed-expenses/{expense_id}")
+async def delete_fixed_expense(
+    expense_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    db_expense = await check_ownership(db, FixedExpense, expense_id, current_user.id, "Fixed expense not found")
+    if not await crud_async.delete_fixed_expense(db, db_expense.id):
+        raise HTTPException(status_code=404, detail="Fixed expense not found")
+    return {"message": "Fixed expense deleted"}
+
+
+@router.put("/daily-expenses/{expense_id}", response_model=schemas.DailyExpense)
+async def update_daily_expense(
+    expense_id: int,
+    expense: schemas.DailyExpenseUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    db_expense = await check_ownership(db, DailyExpense, expense_id, current_user.id, "Daily expense not found")
+    db_expense = await crud_async.update_daily_expense(db, db_expense.id, expense)
+    if not db_expense:
+        raise HTTPException(status_code=404, detail="Daily expense not found")
+    return db_expense
+
+
+@router.delete("/daily-expenses/{expense_id}")
+async def delete_daily_expense(
+    expense_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    db_expense = await check_ownership(db, DailyExpense, expense_id, current_user.id, "Daily expense not found")
+    if not await crud_async.delete_daily_expense(db, db_expense.id):
+        raise HTTPException(status_code=404, detail="Daily expense not found")
+    return {"message": "Daily expense deleted"}
@@ -0,0 +1,185 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from typing import List, Optional
+from datetime import date
+from ... import models, schemas, crud_async
+from ...database import get_async_db
+from ...auth.dependencies import get_current_principal_async
+from ...auth.principal import Principal
+from ...cache import cached_response_async
+from ...serialization import encoded_async, respond
+from ...loaders import load_month_async, load_month_totals_async
+from ...pagination import MAX_PAGE_SIZE, decode_cursor, fetch_limit, paginate
+from ..months import PERIOD_PATTERN, parse_period
+
+router = APIRouter(prefix="/api/months", tags=["months"])
+
+
+@router.get("", response_model=List[schemas.MonthSummary])
+async def get_months(
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    cursor = decode_cursor(after, int, int)
+    months = await crud_async.get_months(db, current_user.id, cursor, fetch_limit(limit))
+    return paginate(response, months, limit, lambda m: (m.year, m.month))
+
+
+@router.post("", response_model=schemas.MonthSummary)
+async def create_month(
+    month: schemas.MonthCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    return await crud_async.create_month(db, month, current_user.id)
+
+
+@router.get("/range", response_model=List[schemas.MonthTrend])
+async def get_month_range(
+    period_from: Optional[str] = Query(None, alias="from", pattern=PERIOD_PATTERN),
+    period_to: Optional[str] = Query(None, alias="to", pattern=PERIOD_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    start, end = parse_period(period_from), parse_period(period_to)
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return await crud_async.get_month_range(db, current_user.id, start, end)
+
+
+@router.get("/analytics", response_model=schemas.TrendAnalyticsResponse)
+async def get_trend_analytics(
+    year: Optional[int] = None,
+    window: int = Query(3, ge=1, le=36),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal_async)
+):
+    return await crud_async.get_trend_analytics(db, current_user.id, year, window)
+
+
+@router.get("/{month_id}", response_model=schemas.Month)
+async def get_month(
+    response: Response,
+    month: models.Month = Depends(load_month_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return respond(await crud_async.month_detail(db, month), response)
+
+
+@router.put("/{month_id}", response_model=schemas.MonthSummary)
+async def update_month(
+    month: schemas.MonthUpdate,
+    db_month: models.Month = Depends(load_month_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await crud_async.apply_month_update(db, db_month, month)
+
+
+@router.get("/{month_id}/incomes", response_model=List[schemas.Income])
+async def get_incomes(month: models.Month = Depends(load_month_async), db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.get_incomes(db, month.id)
+
+
+@router.post("/{month_id}/incomes", response_model=schemas.Income)
+async def create_income(
+    income: schemas.IncomeCreate,
+    month: models.Month = Depends(load_month_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await crud_async.create_income(db, month.id, income)
+
+
+@router.get("/{month_id}/fixed-expenses", response_model=List[schemas.FixedExpense])
+async def get_fixed_expenses(
+    month: models.Month = Depends(load_month_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await crud_async.get_fixed_expenses(db, month.id)
+
+
+@router.post("/{month_id}/fixed-expenses", response_model=schemas.FixedExpense)
+async def create_fixed_expense(
+    expense: schemas.FixedExpenseCreate,
+    month: models.Month = Depends(load_month_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await crud_async.create_fixed_expense(db, month.id, expense)
+
+
+@router.get("/{month_id}/daily-expenses", response_model=List[schemas.DailyExpense])
+async def get_daily_expenses(
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    month: models.Month = Depends(load_month_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    cursor = decode_cursor(after, date.fromisoformat, int)
+    expenses = await crud_async.get_daily_expenses(
+        db, month.id, date_from, date_to, category, cursor, fetch_limit(limit)
+    )
+    return paginate(response, expenses, limit, lambda e: (e.date.isoformat(), e.id))
+
+
+@router.post("/{month_id}/daily-expenses", response_model=schemas.DailyExpense)
+async def create_daily_expense(
+    expense: schemas.DailyExpenseCreate,
+    month: models.Month = Depends(load_month_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await crud_async.create_daily_expense(db, month.id, expense, month.user_id)
+
+
+@router.post("/{month_id}/daily-expenses/bulk", response_model=schemas.DailyExpenseBulkResponse)
+async def create_daily_expenses_bulk(
+    payload: schemas.DailyExpenseBulkCreate,
+    month: models.Month = Depends(load_month_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    expenses, errors = [], []
+    for index, item in enumerate(payload.items):
+        try:
+            expenses.append(schemas.DailyExpenseCreate.model_validate(item))
+        except ValidationError as e:
+            errors.append({"index": index, "errors": e.errors(include_url=False, include_context=False)})
+
+    created = await crud_async.create_daily_expenses_bulk(db, month.id, expenses, month.user_id)
+    return {"created": created, "errors": errors}
+
+
+@router.get("/{month_id}/balance", response_model=schemas.BalanceResponse)
+async def get_balance(
+    request: Request,
+    response: Response,
+    month: models.Month = Depends(load_month_totals_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    key = None
+    if month.totals is not None:
+        key = ("balance", month.user_id, month.id, month.totals.token, month.totals.version, date.today().isoformat())
+    balance = await cached_response_async(
+        request, response, key, encoded_async(lambda: crud_async.month_balance(db, month))
+    )
+    return respond(balance, response)
+
+
+@router.get("/{month_id}/analytics", response_model=schemas.AnalyticsResponse)
+async def get_analytics(
+    request: Request,
+    response: Response,
+    month: models.Month = Depends(load_month_totals_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    key = None
+    if month.totals is not None:
+        key = ("analytics", month.user_id, month.id, month.totals.token, month.totals.version)
+    return await cached_response_async(
+        request, response, key, lambda: crud_async.get_analytics(db, month.id, month.totals is not None)
+    )
@@ -5,8 +5,10 @@ from typing import List, Optional
 from .. import schemas, crud
 from ..database import get_db
 from ..models import User, Category
-from ..category_detector import detect_category, get_categories_from_db, DEFAULT_CATEGORIES
-from ..auth.dependencies import get_current_user
+from ..category_detector import detect_category
+from ..category_cache import category_cache
+from ..auth.dependencies import get_current_principal
+from ..auth.principal import Principal
 
 router = APIRouter(prefix="/api", tags=["categories"])
 
@@ -23,7 +25,7 @@ def get_current_user_optional(request) -> Optional[User]:
 @router.get("/categories", response_model=List[schemas.Category])
 def get_categories(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     return db.query(Category).filter(
         or_(Category.user_id == current_user.id, Category.user_id == None)
@@ -34,11 +36,8 @@ def get_categories(
 def detect_category_endpoint(
     request: schemas.DetectCategoryRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    db_categories = db.query(Category).filter(
-        or_(Category.user_id == current_user.id, Category.user_id == None)
-    ).all()
-    categories = get_categories_from_db(db_categories) if db_categories else DEFAULT_CATEGORIES
-    category = detect_category(request.description, categories)
+    matcher = category_cache.get_matcher(db, current_user.id)
+    category = detect_category(request.description, matcher)
     return {"category": category}
@@ -2,37 +2,23 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from .. import schemas, crud
 from ..database import get_db
-from ..models import User, Income, FixedExpense, DailyExpense
-from ..auth.dependencies import get_current_user
+from ..models import Income, FixedExpense, DailyExpense
+from ..auth.dependencies import get_current_principal
+from ..auth.principal import Principal
 
 router = APIRouter(prefix="/api", tags=["expenses"])
 
 
-def check_income_ownership(db: Session, income_id: int, user_id: int) -> Income:
-    income = db.query(Income).filter(Income.id == income_id).first()
-    if not income:
-        raise HTTPException(status_code=404, detail="Income not found")
-    if income.month.user_id != user_id:
-        raise HTTPException(status_code=404, detail="Income not found")
-    return income
-
+def check_ownership(db: Session, model, row_id: int, user_id: int, detail: str):
+    """The row `row_id` if its month belongs to the user (one JOIN query), else 404.
 
-def check_fixed_expense_ownership(db: Session, expense_id: int, user_id: int) -> FixedExpense:
-    expense = db.query(FixedExpense).filter(FixedExpense.id == expense_id).first()
-    if not expense:
-        raise HTTPException(status_code=404, detail="Fixed expense not found")
-    if expense.month.user_id != user_id:
-        raise HTTPException(status_code=404, detail="Fixed expense not found")
-    return expense
-
-
-def check_daily_expense_ownership(db: Session, expense_id: int, user_id: int) -> DailyExpense:
-    expense = db.query(DailyExpense).filter(DailyExpense.id == expense_id).first()
-    if not expense:
-        raise HTTPException(status_code=404, detail="Daily expense not found")
-    if expense.month.user_id != user_id:
-        raise HTTPException(status_code=404, detail="Daily expense not found")
-    return expense
+    While the caller holds the row, the crud update/delete that follows gets
+    it from the session with db.get instead of querying it again.
+    """
+    row = crud.get_owned(db, model, row_id, user_id)
+    if not row:
+        raise HTTPException(status_code=404, detail=detail)
+    return row
 
 
 @router.put("/incomes/{income_id}", response_model=schemas.Income)
@@ -40,10 +26,10 @@ def update_income(
     income_id: int,
     income: schemas.IncomeUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    check_income_ownership(db, income_id, current_user.id)
-    db_income = crud.update_income(db, income_id, income)
+    db_income = check_ownership(db, Income, income_id, current_user.id, "Income not found")
+    db_income = crud.update_income(db, db_income.id, income)
     if not db_income:
         raise HTTPException(status_code=404, detail="Income not found")
     return db_income
@@ -53,10 +39,10 @@ def update_income(
 def delete_income(
     income_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    check_income_ownership(db, income_id, current_user.id)
-    if not crud.delete_income(db, income_id):
+    db_income = check_ownership(db, Income, income_id, current_user.id, "Income not found")
+    if not crud.delete_income(db, db_income.id):
         raise HTTPException(status_code=404, detail="Income not found")
     return {"message": "Income deleted"}
 
@@ -66,10 +52,10 @@ def update_fixed_expense(
     expense_id: int,
     expense: schemas.FixedExpenseUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    check_fixed_expense_ownership(db, expense_id, current_user.id)
-    db_expense = crud.update_fixed_expense(db, expense_id, expense)
+    db_expense = check_ownership(db, FixedExpense, expense_id, current_user.id, "Fixed expense not found")
+    db_expense = crud.update_fixed_expense(db, db_expense.id, expense)
     if not db_expense:
         raise HTTPException(status_code=404, detail="Fixed expense not found")
     return db_expense
@@ -79,10 +65,10 @@ def update_fixed_expense(
 def delete_fixed_expense(
     expense_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    check_fixed_expense_ownership(db, expense_id, current_user.id)
-    if not crud.delete_fixed_expense(db, expense_id):
+    db_expense = check_ownership(db, FixedExpense, expense_id, current_user.id, "Fixed expense not found")
+    if not crud.delete_fixed_expense(db, db_expense.id):
         raise HTTPException(status_code=404, detail="Fixed expense not found")
     return {"message": "Fixed expense deleted"}
 
@@ -92,10 +78,10 @@ def update_daily_expense(
     expense_id: int,
     expense: schemas.DailyExpenseUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    check_daily_expense_ownership(db, expense_id, current_user.id)
-    db_expense = crud.update_daily_expense(db, expense_id, expense)
+    db_expense = check_ownership(db, DailyExpense, expense_id, current_user.id, "Daily expense not found")
+    db_expense = crud.update_daily_expense(db, db_expense.id, expense)
     if not db_expense:
         raise HTTPException(status_code=404, detail="Daily expense not found")
     return db_expense
@@ -105,9 +91,9 @@ def update_daily_expense(
 def delete_daily_expense(
     expense_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    check_daily_expense_ownership(db, expense_id, current_user.id)
-    if not crud.delete_daily_expense(db, expense_id):
+    db_expense = check_ownership(db, DailyExpense, expense_id, current_user.id, "Daily expense not found")
+    if not crud.delete_daily_expense(db, db_expense.id):
         raise HTTPException(status_code=404, detail="Daily expense not found")
     return {"message": "Daily expense deleted"}
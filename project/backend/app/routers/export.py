@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..models import Month, DailyExpense
+from ..auth.dependencies import get_current_principal
+from ..auth.principal import Principal
+
+router = APIRouter(prefix="/api", tags=["export"])
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ["id", "month_id", "year", "month", "date", "description", "amount", "category"]
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def export_rows(db: Session, user_id: int, since: Optional[date] = None, after_id: Optional[int] = None):
+    """Yield the user's daily expenses in id order without loading them all.
+
+    Uses yield_per, so PostgreSQL streams through a server-side cursor and
+    only one batch of rows is held in memory at a time.
+    """
+    query = db.query(
+        DailyExpense.id,
+        DailyExpense.month_id,
+        Month.year,
+        Month.month,
+        DailyExpense.date,
+        DailyExpense.description,
+        DailyExpense.amount,
+        DailyExpense.category,
+    ).join(Month, DailyExpense.month_id == Month.id).filter(Month.user_id == user_id)
+
+    if since is not None:
+        query = query.filter(DailyExpense.date >= since)
+    if after_id is not None:
+        query = query.filter(DailyExpense.id > after_id)
+
+    yield from query.order_by(DailyExpense.id).yield_per(EXPORT_BATCH_SIZE)
+
+
+def encode_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([row.id, row.month_id, row.year, row.month, row.date.isoformat(),
+                         row.description, row.amount, row.category])
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def encode_ndjson(rows):
+    lines = []
+    for row in rows:
+        record = dict(zip(EXPORT_COLUMNS, row))
+        record["date"] = row.date.isoformat()
+        lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield "".join(lines)
+            lines = []
+
+    if lines:
+        yield "".join(lines)
+
+
+@router.get("/export")
+def export_expenses(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    since: Optional[date] = None,
+    after_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Stream all daily expenses of the current user.
+
+    Rows are ordered by id; to resume an interrupted export pass the last
+    received id as `after_id`. `since` limits the export to expenses dated
+    on or after the given day.
+    """
+    user_id = current_user.id
+    encode = encode_csv if format == "csv" else encode_ndjson
+
+    def stream():
+        # get_db closes the session before the body is streamed; a closed
+        # session reopens a connection on demand, so release it again here
+        try:
+            yield from encode(export_rows(db, user_id, since, after_id))
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="leprecoin-expenses.{format}"'},
+    )
@@ -0,0 +1,79 @@
+import io
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from .. import schemas
+from ..database import get_db
+from ..models import ImportJob
+from ..auth.dependencies import get_current_principal
+from ..auth.principal import Principal
+from ..importer import DEFAULT_CHUNK_SIZE, StatementFormatError, create_job, import_statement, job_report
+
+router = APIRouter(prefix="/api/import", tags=["import"])
+
+
+def get_job(db: Session, job_id: int, user_id: int) -> ImportJob:
+    job = db.query(ImportJob).filter(ImportJob.id == job_id, ImportJob.user_id == user_id).first()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return job
+
+
+@router.post("/statements", response_model=schemas.ImportJob)
+def upload_statement(
+    file: UploadFile = File(...),
+    mapping: str = Form("{}"),
+    chunk_size: int = Form(DEFAULT_CHUNK_SIZE, ge=1, le=50000),
+    encoding: str = Form("utf-8-sig"),
+    resume_job_id: Optional[int] = Form(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Import a CSV bank statement into daily expenses.
+
+    `mapping` is a JSON StatementMapping. The statement is processed in
+    chunks; if the job fails, upload the same file again with
+    `resume_job_id` to continue after the last committed line.
+    """
+    try:
+        column_mapping = schemas.StatementMapping.model_validate_json(mapping)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+    try:
+        lines = io.TextIOWrapper(file.file, encoding=encoding, newline="")
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown encoding: {encoding}")
+
+    if resume_job_id is not None:
+        job = get_job(db, resume_job_id, current_user.id)
+    else:
+        job = create_job(db, current_user.id, file.filename or "statement.csv")
+
+    try:
+        job = import_statement(db, job, lines, column_mapping, chunk_size)
+    except StatementFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        lines.detach()
+
+    return job_report(job)
+
+
+@router.get("/jobs", response_model=List[schemas.ImportJob])
+def get_jobs(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    jobs = db.query(ImportJob).filter(ImportJob.user_id == current_user.id).order_by(ImportJob.id.desc()).all()
+    return [job_report(job) for job in jobs]
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.ImportJob)
+def get_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    return job_report(get_job(db, job_id, current_user.id))
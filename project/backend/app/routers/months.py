@@ -1,145 +1,189 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-from .. import schemas, crud
+from pydantic import ValidationError
+from typing import List, Optional
+from datetime import date
+from .. import models, schemas, crud
 from ..database import get_db
-from ..models import User
-from ..auth.dependencies import get_current_user
+from ..auth.dependencies import get_current_principal
+from ..auth.principal import Principal
+from ..cache import cached_response
+from ..serialization import encoded, respond
+from ..loaders import load_month, load_month_totals
+from ..pagination import MAX_PAGE_SIZE, decode_cursor, fetch_limit, paginate
 
 router = APIRouter(prefix="/api/months", tags=["months"])
 
+PERIOD_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
 
 @router.get("", response_model=List[schemas.MonthSummary])
 def get_months(
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    return crud.get_months(db, current_user.id)
+    cursor = decode_cursor(after, int, int)
+    months = crud.get_months(db, current_user.id, cursor, fetch_limit(limit))
+    return paginate(response, months, limit, lambda m: (m.year, m.month))
 
 
 @router.post("", response_model=schemas.MonthSummary)
 def create_month(
     month: schemas.MonthCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     return crud.create_month(db, month, current_user.id)
 
 
+def parse_period(value: Optional[str]):
+    if value is None:
+        return None
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+@router.get("/range", response_model=List[schemas.MonthTrend])
+def get_month_range(
+    period_from: Optional[str] = Query(None, alias="from", pattern=PERIOD_PATTERN),
+    period_to: Optional[str] = Query(None, alias="to", pattern=PERIOD_PATTERN),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    start, end = parse_period(period_from), parse_period(period_to)
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return crud.get_month_range(db, current_user.id, start, end)
+
+
+@router.get("/analytics", response_model=schemas.TrendAnalyticsResponse)
+def get_trend_analytics(
+    year: Optional[int] = None,
+    window: int = Query(3, ge=1, le=36),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    return crud.get_trend_analytics(db, current_user.id, year, window)
+
+
 @router.get("/{month_id}", response_model=schemas.Month)
 def get_month(
-    month_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    month: models.Month = Depends(load_month),
+    db: Session = Depends(get_db)
 ):
-    db_month = crud.get_month(db, month_id, current_user.id)
-    if not db_month:
-        raise HTTPException(status_code=404, detail="Month not found")
-    return db_month
+    return respond(crud.month_detail(db, month), response)
 
 
 @router.put("/{month_id}", response_model=schemas.MonthSummary)
 def update_month(
-    month_id: int,
     month: schemas.MonthUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db_month: models.Month = Depends(load_month),
+    db: Session = Depends(get_db)
 ):
-    db_month = crud.update_month(db, month_id, month, current_user.id)
-    if not db_month:
-        raise HTTPException(status_code=404, detail="Month not found")
-    return db_month
+    return crud.apply_month_update(db, db_month, month)
 
 
 @router.get("/{month_id}/incomes", response_model=List[schemas.Income])
-def get_incomes(
-    month_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    if not crud.get_month(db, month_id, current_user.id):
-        raise HTTPException(status_code=404, detail="Month not found")
-    return crud.get_incomes(db, month_id)
+def get_incomes(month: models.Month = Depends(load_month), db: Session = Depends(get_db)):
+    return crud.get_incomes(db, month.id)
 
 
 @router.post("/{month_id}/incomes", response_model=schemas.Income)
 def create_income(
-    month_id: int,
     income: schemas.IncomeCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    month: models.Month = Depends(load_month),
+    db: Session = Depends(get_db)
 ):
-    if not crud.get_month(db, month_id, current_user.id):
-        raise HTTPException(status_code=404, detail="Month not found")
-    return crud.create_income(db, month_id, income)
+    return crud.create_income(db, month.id, income)
 
 
 @router.get("/{month_id}/fixed-expenses", response_model=List[schemas.FixedExpense])
-def get_fixed_expenses(
-    month_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    if not crud.get_month(db, month_id, current_user.id):
-        raise HTTPException(status_code=404, detail="Month not found")
-    return crud.get_fixed_expenses(db, month_id)
+def get_fixed_expenses(month: models.Month = Depends(load_month), db: Session = Depends(get_db)):
+    return crud.get_fixed_expenses(db, month.id)
 
 
 @router.post("/{month_id}/fixed-expenses", response_model=schemas.FixedExpense)
 def create_fixed_expense(
-    month_id: int,
     expense: schemas.FixedExpenseCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    month: models.Month = Depends(load_month),
+    db: Session = Depends(get_db)
 ):
-    if not crud.get_month(db, month_id, current_user.id):
-        raise HTTPException(status_code=404, detail="Month not found")
-    return crud.create_fixed_expense(db, month_id, expense)
+    return crud.create_fixed_expense(db, month.id, expense)
 
 
 @router.get("/{month_id}/daily-expenses", response_model=List[schemas.DailyExpense])
 def get_daily_expenses(
-    month_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    month: models.Month = Depends(load_month),
+    db: Session = Depends(get_db)
 ):
-    if not crud.get_month(db, month_id, current_user.id):
-        raise HTTPException(status_code=404, detail="Month not found")
-    return crud.get_daily_expenses(db, month_id)
+    cursor = decode_cursor(after, date.fromisoformat, int)
+    expenses = crud.get_daily_expenses(
+        db, month.id, date_from, date_to, category, cursor, fetch_limit(limit)
+    )
+    return paginate(response, expenses, limit, lambda e: (e.date.isoformat(), e.id))
 
 
 @router.post("/{month_id}/daily-expenses", response_model=schemas.DailyExpense)
 def create_daily_expense(
-    month_id: int,
     expense: schemas.DailyExpenseCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    month: models.Month = Depends(load_month),
+    db: Session = Depends(get_db)
 ):
-    if not crud.get_month(db, month_id, current_user.id):
-        raise HTTPException(status_code=404, detail="Month not found")
-    return crud.create_daily_expense(db, month_id, expense, current_user.id)
+    return crud.create_daily_expense(db, month.id, expense, month.user_id)
+
+
+@router.post("/{month_id}/daily-expenses/bulk", response_model=schemas.DailyExpenseBulkResponse)
+def create_daily_expenses_bulk(
+    payload: schemas.DailyExpenseBulkCreate,
+    month: models.Month = Depends(load_month),
+    db: Session = Depends(get_db)
+):
+    expenses, errors = [], []
+    for index, item in enumerate(payload.items):
+        try:
+            expenses.append(schemas.DailyExpenseCreate.model_validate(item))
+        except ValidationError as e:
+            errors.append({"index": index, "errors": e.errors(include_url=False, include_context=False)})
+
+    created = crud.create_daily_expenses_bulk(db, month.id, expenses, month.user_id)
+    return {"created": created, "errors": errors}
 
 
 @router.get("/{month_id}/balance", response_model=schemas.BalanceResponse)
 def get_balance(
-    month_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    month: models.Month = Depends(load_month_totals),
+    db: Session = Depends(get_db)
 ):
-    if not crud.get_month(db, month_id, current_user.id):
-        raise HTTPException(status_code=404, detail="Month not found")
-    balance = crud.calculate_balance(db, month_id)
-    if not balance:
-        raise HTTPException(status_code=404, detail="Month not found")
-    return balance
+    key = None
+    if month.totals is not None:
+        # The balance depends on today's date as well as the month's data
+        key = ("balance", month.user_id, month.id, month.totals.token, month.totals.version, date.today().isoformat())
+    balance = cached_response(request, response, key, encoded(lambda: crud.month_balance(db, month)))
+    return respond(balance, response)
 
 
 @router.get("/{month_id}/analytics", response_model=schemas.AnalyticsResponse)
 def get_analytics(
-    month_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    month: models.Month = Depends(load_month_totals),
+    db: Session = Depends(get_db)
 ):
-    if not crud.get_month(db, month_id, current_user.id):
-        raise HTTPException(status_code=404, detail="Month not found")
-    return crud.get_analytics(db, month_id)
+    key = None
+    if month.totals is not None:
+        key = ("analytics", month.user_id, month.id, month.totals.token, month.totals.version)
+    return cached_response(
+        request, response, key, lambda: crud.get_analytics(db, month.id, month.totals is not None)
+    )
@@ -4,8 +4,10 @@ from sqlalchemy import or_
 from typing import List
 from pydantic import BaseModel
 from ..database import get_db
-from ..models import Category, User
-from ..auth.dependencies import get_current_user
+from ..models import Category
+from ..auth.dependencies import get_current_principal
+from ..auth.principal import Principal
+from ..category_cache import category_cache
 
 router = APIRouter(prefix="/api/profile", tags=["profile"])
 
@@ -33,7 +35,7 @@ class CategoryResponse(BaseModel):
 @router.get("/categories", response_model=List[CategoryResponse])
 def get_user_categories(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     categories = db.query(Category).filter(
         or_(Category.user_id == current_user.id, Category.user_id == None)
@@ -54,7 +56,7 @@ def get_user_categories(
 def create_category(
     category: CategoryCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     existing = db.query(Category).filter(
         Category.name == category.name,
@@ -75,6 +77,7 @@ def create_category(
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
+    category_cache.invalidate(current_user.id)
 
     return CategoryResponse(
         id=db_category.id,
@@ -89,7 +92,7 @@ def update_category(
     category_id: int,
     category: CategoryUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     db_category = db.query(Category).filter(
         Category.id == category_id,
@@ -109,6 +112,7 @@ def update_category(
 
     db.commit()
     db.refresh(db_category)
+    category_cache.invalidate(current_user.id)
 
     return CategoryResponse(
         id=db_category.id,
@@ -122,7 +126,7 @@ def update_category(
 def delete_category(
     category_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     db_category = db.query(Category).filter(
         Category.id == category_id,
@@ -137,5 +141,6 @@ def delete_category(
 
     db.delete(db_category)
     db.commit()
+    category_cache.invalidate(current_user.id)
 
     return {"message": "Category deleted successfully"}
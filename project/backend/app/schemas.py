@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date, datetime
-from typing import Optional
+from typing import Any, Optional
 
 
 class IncomeBase(BaseModel):
@@ -73,6 +73,24 @@ class DailyExpense(DailyExpenseBase):
         from_attributes = True
 
 
+BULK_MAX_ITEMS = 10000
+
+
+class DailyExpenseBulkCreate(BaseModel):
+    # Items are validated one by one so a bad item does not reject the batch
+    items: list[Any] = Field(..., max_length=BULK_MAX_ITEMS)
+
+
+class DailyExpenseBulkError(BaseModel):
+    index: int
+    errors: list[dict]
+
+
+class DailyExpenseBulkResponse(BaseModel):
+    created: list[DailyExpense]
+    errors: list[DailyExpenseBulkError]
+
+
 class MonthBase(BaseModel):
     year: int
     month: int
@@ -122,6 +140,20 @@ class BalanceResponse(BaseModel):
     daily_balances: list[dict]
 
 
+class MonthTrend(BaseModel):
+    id: int
+    year: int
+    month: int
+    savings_percent: float
+    total_income: float
+    total_fixed_expenses: float
+    savings_amount: float
+    available_budget: float
+    actual_spent: float
+    balance: float
+    end_balance: float
+
+
 class CategoryBase(BaseModel):
     name: str
     keywords: str
@@ -149,3 +181,47 @@ class DetectCategoryResponse(BaseModel):
 class AnalyticsResponse(BaseModel):
     categories: list[dict]
     total: float
+
+
+class CategoryTrend(BaseModel):
+    name: str
+    amounts: list[float]
+    rolling_average: list[float]
+    total: float
+    share: float
+
+
+class TrendAnalyticsResponse(BaseModel):
+    periods: list[str]
+    categories: list[CategoryTrend]
+    monthly_totals: list[float]
+    rolling_average: list[float]
+    total: float
+    window: int
+
+
+class StatementMapping(BaseModel):
+    date_column: str = "date"
+    description_column: str = "description"
+    amount_column: str = "amount"
+    category_column: Optional[str] = None
+    date_format: str = "%Y-%m-%d"
+    delimiter: str = ","
+    decimal_comma: bool = False
+    # Bank exports often list spending as negative amounts; with this set
+    # only negative rows are imported, as positive expenses
+    expenses_negative: bool = False
+
+
+class ImportJob(BaseModel):
+    id: int
+    filename: str
+    status: str
+    lines_committed: int
+    rows_imported: int
+    rows_skipped: int
+    months_created: int
+    elapsed_seconds: float
+    rows_per_second: float
+    row_errors: list[dict]
+    error: Optional[str] = None
@@ -0,0 +1,185 @@
+"""
+Synthetic data for benchmarks and load tests.
+
+Generates N users x M months x K daily expenses. Expense descriptions are
+built from the DEFAULT_CATEGORIES keywords, with a share that matches no
+category, and are categorized by the detector on insert like any other
+expense, so analytics, rollups and category detection see realistic input.
+The output depends only on the arguments (including --seed).
+
+    python -m app.seed --users 10 --months 12 --expenses 300
+"""
+import argparse
+import random
+import sys
+import time
+from calendar import monthrange
+from collections import namedtuple
+from datetime import date
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import crud, models, rollups
+from .auth.security import get_password_hash
+from .category_detector import DEFAULT_CATEGORIES
+
+# How often each category shows up relative to the others, and its
+# usual amount range
+CATEGORY_PROFILES = {
+    "Продукты": (8, 150, 3500),
+    "Доставка еды": (3, 400, 2500),
+    "Такси": (3, 200, 1500),
+    "Подписки": (1, 150, 900),
+    "Аптека": (1, 100, 2500),
+    "Развлечения": (2, 300, 5000),
+    "Одежда": (1, 1000, 12000),
+    "Собаки": (1, 300, 4000),
+    "Транспорт": (4, 40, 300),
+    "Связь": (1, 300, 1000),
+}
+UNMATCHED = ["Перевод другу", "Подарок", "Стрижка", "Химчистка", "Штраф", "Ремонт часов", "Цветы"]
+UNMATCHED_SHARE = 0.1
+SUFFIXES = ["", "", "", " онлайн", " по карте", " заказ", " оплата"]
+
+FIXED_EXPENSES = [("Аренда", 25000, 60000), ("Интернет", 500, 900), ("Спортзал", 2000, 4500)]
+SAVINGS_PERCENTS = [0, 5, 10, 15, 20]
+
+# insert_daily_expenses only reads these attributes, so rows skip model validation
+Expense = namedtuple("Expense", ["date", "description", "amount", "category"])
+
+
+def _periods(start: Tuple[int, int], count: int):
+    year, month = start
+    for _ in range(count):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _description(rng: random.Random) -> Tuple[str, int, int]:
+    if rng.random() < UNMATCHED_SHARE:
+        return rng.choice(UNMATCHED), 100, 3000
+    names = list(CATEGORY_PROFILES)
+    name = rng.choices(names, weights=[CATEGORY_PROFILES[n][0] for n in names])[0]
+    _, low, high = CATEGORY_PROFILES[name]
+    keyword = rng.choice(DEFAULT_CATEGORIES[name])
+    return keyword.capitalize() + rng.choice(SUFFIXES), low, high
+
+
+def month_expenses(rng: random.Random, year: int, month: int, count: int) -> list:
+    days = monthrange(year, month)[1]
+    expenses = []
+    for _ in range(count):
+        description, low, high = _description(rng)
+        expenses.append(Expense(
+            date=date(year, month, rng.randint(1, days)),
+            description=description,
+            amount=round(rng.uniform(low, high), 2),
+            category=None,
+        ))
+    return expenses
+
+
+def generate(
+    db: Session,
+    users: int = 1,
+    months: int = 12,
+    expenses: int = 300,
+    seed: int = 0,
+    start: Tuple[int, int] = (2024, 1),
+    prefix: str = "seed",
+    password: str = "seedpassword",
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> list:
+    """Create the users with their months and expenses; returns the user ids.
+
+    Users are named `{prefix}{n}@example.com` and share `password`. Each
+    user is committed separately and reported to `progress(user_id, rows)`.
+    """
+    crud.create_default_categories(db)
+    emails = [f"{prefix}{n}@example.com" for n in range(users)]
+    if db.query(models.User.id).filter(models.User.email.in_(emails)).first():
+        raise ValueError(f"users with the prefix {prefix!r} already exist")
+
+    rng = random.Random(seed)
+    # bcrypt is slow on purpose; every seeded user gets the same hash
+    hashed_password = get_password_hash(password)
+    user_ids = []
+    for email in emails:
+        user = models.User(email=email, hashed_password=hashed_password, is_active=True)
+        db.add(user)
+        db.flush()
+        matcher = crud.get_category_matcher(db, user.id)
+        salary = rng.randrange(80000, 250000, 5000)
+        fixed = [(name, rng.randint(low, high)) for name, low, high in FIXED_EXPENSES]
+
+        for year, month in _periods(start, months):
+            db_month = models.Month(
+                user_id=user.id, year=year, month=month, savings_percent=rng.choice(SAVINGS_PERCENTS)
+            )
+            db.add(db_month)
+            db.flush()
+            incomes = [("Зарплата", salary)]
+            if rng.random() < 0.3:
+                incomes.append(("Фриланс", rng.randint(5000, 40000)))
+            db.add_all([models.Income(month_id=db_month.id, name=name, amount=amount) for name, amount in incomes])
+            db.add_all([models.FixedExpense(month_id=db_month.id, name=name, amount=amount) for name, amount in fixed])
+            db.flush()
+            # Creates the month totals; the expenses below are applied as deltas
+            rollups.rebuild_month(db, db_month.id)
+            if expenses:
+                crud.insert_daily_expenses(db, db_month.id, month_expenses(rng, year, month, expenses), matcher)
+
+        db.commit()
+        user_ids.append(user.id)
+        if progress:
+            progress(user.id, months * expenses)
+    return user_ids
+
+
+def parse_period(value: str) -> Tuple[int, int]:
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+def main(argv=None) -> int:
+    from .bootstrap import migrate
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m app.seed", description="Generate synthetic users, months and expenses")
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--months", type=int, default=12, help="months per user")
+    parser.add_argument("--expenses", type=int, default=300, help="daily expenses per month")
+    parser.add_argument("--start", type=parse_period, default=(2024, 1), metavar="YYYY-MM", help="first month")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--prefix", default="seed", help="email prefix of the generated users")
+    parser.add_argument("--password", default="seedpassword")
+    args = parser.parse_args(argv)
+
+    migrate()
+    db = SessionLocal()
+    started = time.perf_counter()
+    total = 0
+
+    def progress(user_id, rows):
+        nonlocal total
+        total += rows
+        print(f"user {user_id}: {total} expenses, {total / (time.perf_counter() - started):.0f} rows/s")
+
+    try:
+        generate(
+            db, args.users, args.months, args.expenses, args.seed, args.start,
+            args.prefix, args.password, progress
+        )
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+    print(f"Created {args.users} user(s) x {args.months} month(s) x {args.expenses} expense(s) "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Fast JSON path for large responses.
+
+GET /api/months/{id} builds its payload from plain rows (crud.month_detail)
+instead of ORM objects. With FAST_JSON on (the default), that payload and
+the month balance are encoded with orjson and returned as-is, skipping the
+response-model validation FastAPI would otherwise run over every nested
+row. The balance is cached already encoded. The output has the same shape
+as the schemas.py models, so docs/openapi.json still describes it; set
+FAST_JSON=false to go back through the models.
+"""
+import os
+from typing import Awaitable, Callable, Optional
+
+import orjson
+from fastapi import Response
+
+FAST_JSON = os.getenv("FAST_JSON", "true").lower() in ("1", "true", "yes")
+
+
+def dumps(content) -> bytes:
+    # UTC datetimes end in "Z", as Pydantic writes them
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def respond(content, response: Optional[Response] = None):
+    """Return `content` from a route, encoding it directly in fast mode.
+
+    Bytes are taken as already encoded JSON, and a Response (e.g. a 304 from
+    the cache) is passed through. Headers set on the injected `response`,
+    such as the ETag, are kept.
+    """
+    if content is None or isinstance(content, Response):
+        return content
+    if not isinstance(content, bytes):
+        if not FAST_JSON:
+            return content
+        content = dumps(content)
+
+    result = Response(content=content, media_type="application/json")
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+    return result
+
+
+def encoded(compute: Callable) -> Callable:
+    """`compute` returning its result encoded in fast mode, so caches keep the bytes."""
+    def run():
+        content = compute()
+        return dumps(content) if FAST_JSON and content is not None else content
+
+    return run
+
+
+def encoded_async(compute: Callable[[], Awaitable]) -> Callable[[], Awaitable]:
+    """encoded for a coroutine function `compute`."""
+    async def run():
+        content = await compute()
+        return dumps(content) if FAST_JSON and content is not None else content
+
+    return run
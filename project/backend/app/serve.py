@@ -0,0 +1,208 @@
+"""
+Production server: pre-forked uvicorn workers sharing one listening socket.
+
+    python -m app.bootstrap && python -m app.serve --host 0.0.0.0 --port 8000
+
+The master imports the app once and forks WEB_WORKERS workers from it, so
+the interpreter, FastAPI routes, pydantic models and numpy are loaded once
+and shared copy-on-write (gc.freeze() keeps the collector from touching
+them). The engines are built lazily, after the fork, in each worker.
+
+- Pool sizing: with DB_MAX_CONNECTIONS set, every worker's pools get an
+  equal share of that budget (half kept open, half overflow), so the server
+  as a whole never opens more; otherwise DB_POOL_SIZE / DB_MAX_OVERFLOW
+  apply per worker as before.
+- Recycling: a worker exits after WEB_MAX_REQUESTS requests (plus up to
+  WEB_MAX_REQUESTS_JITTER, so workers don't all restart together) and the
+  master forks a fresh one, bounding memory growth.
+- Shutdown: on SIGTERM or SIGINT the master stops replacing workers and
+  passes SIGTERM on; each worker stops accepting connections and finishes
+  its in-flight requests for up to WEB_GRACEFUL_TIMEOUT seconds. Workers
+  still running WEB_GRACEFUL_TIMEOUT + 5 seconds later are killed.
+- Metrics: every worker keeps its own counters, and /metrics shows those of
+  the worker that answered. Each series is labelled worker="<number>" so
+  scrapes from different workers can be told apart and summed.
+
+Needs fork(), so POSIX only. For development keep `uvicorn --reload`.
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import random
+import signal
+import sys
+import time
+from typing import Dict, Tuple
+
+import uvicorn
+
+from . import database, metrics
+
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1)))
+WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", "10000"))
+WEB_MAX_REQUESTS_JITTER = int(os.getenv("WEB_MAX_REQUESTS_JITTER", "1000"))
+WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "0"))  # 0 = no budget
+
+# Exit code of a worker whose app failed to start; the master gives up then
+STARTUP_FAILURE = 3
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def pool_sizes(max_connections: int, workers: int, engines: int) -> Tuple[int, int]:
+    """(pool_size, max_overflow) per engine keeping `workers` x `engines` pools within `max_connections`."""
+    share = max_connections // (workers * engines)
+    if share < 1:
+        raise ValueError(f"{max_connections} connections cannot cover {workers * engines} pools")
+    pool_size = max(1, share // 2)
+    return pool_size, share - pool_size
+
+
+class WorkerServer(uvicorn.Server):
+    async def shutdown(self, sockets=None) -> None:
+        # uvicorn closes connections that have not sent a request yet. Stop
+        # accepting first and give the ones accepted a moment to send it, so
+        # a recycled worker drains them instead of dropping them.
+        for server in self.servers:
+            server.close()
+        await asyncio.sleep(0.05)
+        await super().shutdown(sockets)
+
+
+class Master:
+    """Forks the workers, replaces the ones that exit, and stops them on a signal."""
+
+    def __init__(self, config: uvicorn.Config, workers: int, max_requests: int, jitter: int, graceful_timeout: int):
+        self.config = config
+        self.workers = workers
+        self.max_requests = max_requests
+        self.jitter = jitter
+        self.graceful_timeout = graceful_timeout
+        self.children: Dict[int, int] = {}  # pid -> worker number
+        self.socket = None
+        self.stopping = False
+        self.failed = False
+
+    def spawn(self, number: int) -> None:
+        limit = self.max_requests + random.randint(0, self.jitter) if self.max_requests else None
+        pid = os.fork()
+        if pid:
+            self.children[pid] = number
+            return
+
+        # Worker: restore default signal handling until uvicorn installs its own
+        code = 1
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            database.reset_after_fork()
+            metrics.set_worker(number)
+            self.config.limit_max_requests = limit
+            server = WorkerServer(self.config)
+            server.run(sockets=[self.socket])
+            code = 0 if server.started else STARTUP_FAILURE
+        except BaseException:
+            logger.exception("Worker %d crashed", number)
+        finally:
+            os._exit(code)
+
+    def reap(self) -> None:
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            number = self.children.pop(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if code == STARTUP_FAILURE and not self.stopping:
+                logger.error("Worker %d (pid %d) failed to start; shutting down", number, pid)
+                self.failed = True
+                self.stop()
+            elif not self.stopping:
+                reason = "recycled" if code == 0 else f"exited with code {code}"
+                logger.info("Worker %d (pid %d) %s; starting a new one", number, pid, reason)
+
+    def stop(self, *_) -> None:
+        self.stopping = True
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+
+    def run(self) -> int:
+        self.socket = self.config.bind_socket()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        # Everything loaded so far is shared with the workers; keep the
+        # collector from writing to (and so copying) those pages
+        gc.collect()
+        gc.freeze()
+        for number in range(self.workers):
+            self.spawn(number)
+        logger.info("Started %d workers (master pid %d)", self.workers, os.getpid())
+
+        while not self.stopping:
+            self.reap()
+            running = set(self.children.values())
+            for number in range(self.workers):
+                if number not in running and not self.stopping:
+                    self.spawn(number)
+            time.sleep(0.1)
+
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in self.children:
+            logger.warning("Worker pid %d did not stop in time; killing it", pid)
+            os.kill(pid, signal.SIGKILL)
+        self.socket.close()
+        logger.info("Stopped")
+        return 1 if self.failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.serve", description="Run the API with pre-forked workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    parser.add_argument("--max-requests", type=int, default=WEB_MAX_REQUESTS, help="recycle a worker after this many requests (0 never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=WEB_MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=int, default=WEB_GRACEFUL_TIMEOUT, help="seconds to drain in-flight requests on shutdown")
+    parser.add_argument("--db-max-connections", type=int, default=DB_MAX_CONNECTIONS, help="connection budget of the whole server (0 none)")
+    parser.add_argument("--no-preload", dest="preload", action="store_false", help="import the app in each worker instead of the master")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    engines = 2 if database.ASYNC_MODE else 1
+    if args.db_max_connections:
+        try:
+            database.DB_POOL_SIZE, database.DB_MAX_OVERFLOW = pool_sizes(args.db_max_connections, args.workers, engines)
+        except ValueError as e:
+            parser.error(str(e))
+
+    config = uvicorn.Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    if args.preload:
+        config.load()
+    logger.info(
+        "Pools per worker: %d engine(s) x %d + %d overflow; at most %d connections in total",
+        engines, database.DB_POOL_SIZE, database.DB_MAX_OVERFLOW,
+        args.workers * engines * (database.DB_POOL_SIZE + database.DB_MAX_OVERFLOW),
+    )
+    master = Master(config, args.workers, args.max_requests, args.max_requests_jitter, args.graceful_timeout)
+    return master.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
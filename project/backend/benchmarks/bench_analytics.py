@@ -0,0 +1,97 @@
+"""
+Benchmark: category x month analytics over a long history.
+
+Compares a per-object loop (the get_analytics approach applied month by
+month) with the NumPy analytics engine. Run from the backend directory:
+
+    python -m benchmarks.bench_analytics --years 10 --expenses 300
+"""
+import argparse
+import math
+
+from app import crud, models
+from .bench_month_range import seed_history
+from .common import make_sessionmaker, timeit
+
+
+def legacy_trend_analytics(db, user_id, year=None, window=3):
+    """Same payload as crud.get_trend_analytics, built from ORM objects."""
+    months = sorted(crud.get_months(db, user_id), key=lambda m: (m.year, m.month))
+    if year is not None:
+        months = [m for m in months if m.year == year]
+
+    per_month = []
+    for month in months:
+        category_totals = {}
+        for expense in crud.get_daily_expenses(db, month.id):
+            if expense.category not in category_totals:
+                category_totals[expense.category] = 0
+            category_totals[expense.category] += expense.amount
+        per_month.append(category_totals)
+
+    def rolling(values):
+        return [
+            sum(values[max(0, i + 1 - window):i + 1]) / (i + 1 - max(0, i + 1 - window))
+            for i in range(len(values))
+        ]
+
+    names = sorted({name for totals in per_month for name in totals})
+    rows = {name: [totals.get(name, 0.0) for totals in per_month] for name in names}
+    monthly_totals = [sum(totals.values()) for totals in per_month]
+    total = sum(monthly_totals)
+
+    categories = sorted(
+        (
+            {
+                "name": name,
+                "amounts": amounts,
+                "rolling_average": rolling(amounts),
+                "total": sum(amounts),
+                "share": sum(amounts) / total * 100 if total > 0 else 0,
+            }
+            for name, amounts in rows.items()
+        ),
+        key=lambda c: (-c["total"], c["name"]),
+    )
+
+    return {
+        "periods": [f"{m.year:04d}-{m.month:02d}" for m in months],
+        "categories": categories,
+        "monthly_totals": monthly_totals,
+        "rolling_average": rolling(monthly_totals),
+        "total": total,
+        "window": window,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--expenses", type=int, default=300, help="daily expenses per month")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Session = make_sessionmaker()
+    with Session() as db:
+        user_id = seed_history(db, args.years, args.expenses)
+
+    def run(fn):
+        with Session() as db:
+            return fn(db, user_id)
+
+    expected, actual = run(legacy_trend_analytics), run(crud.get_trend_analytics)
+    assert expected["periods"] == actual["periods"]
+    assert math.isclose(expected["total"], actual["total"], rel_tol=1e-9)
+
+    legacy = timeit(lambda: run(legacy_trend_analytics), args.repeat)
+    vectorized = timeit(lambda: run(crud.get_trend_analytics), args.repeat)
+
+    count = args.years * 12 * args.expenses
+    print(f"all-time analytics, {args.years * 12} months, {count} expenses (best of {args.repeat})")
+    print(f"  per-object loop: {legacy * 1000:9.2f} ms")
+    print(f"  numpy engine:    {vectorized * 1000:9.2f} ms")
+    print(f"  speedup:         {legacy / vectorized:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
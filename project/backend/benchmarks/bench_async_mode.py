@@ -0,0 +1,135 @@
+"""
+Benchmark: concurrent throughput of the sync and async database modes.
+
+Builds the app in each mode against the same SQLite file and drives it
+in-process with `--concurrency` clients, each mixing reads of a month's
+daily expenses with new expense writes (`--write-ratio`). Run from the
+backend directory:
+
+    python -m benchmarks.bench_async_mode --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, schemas
+from app.auth.security import create_access_token
+from app.database import Base, create_async_db_engine, create_db_engine, get_db, get_async_db
+from app.main import create_app
+from app.models import User
+
+
+def seed(Session, expenses: int) -> tuple:
+    with Session() as db:
+        crud.create_default_categories(db)
+        user = User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        month = crud.create_month(db, schemas.MonthCreate(year=2024, month=5), user.id)
+        rng = random.Random(1)
+        crud.create_daily_expenses_bulk(db, month.id, [
+            schemas.DailyExpenseCreate(
+                date=f"2024-05-{rng.randint(1, 31):02d}", description="Продукты", amount=rng.randint(50, 2000)
+            )
+            for _ in range(expenses)
+        ], user.id)
+        return user.id, month.id
+
+
+async def drive(app, user_id: int, month_id: int, requests: int, concurrency: int, write_ratio: float):
+    transport = httpx.ASGITransport(app=app)
+    cookies = {"access_token": create_access_token(data={"sub": str(user_id)})}
+    latencies = []
+    remaining = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies=cookies) as client:
+        async def worker(seed):
+            rng = random.Random(seed)
+            for _ in remaining:
+                start = time.perf_counter()
+                if rng.random() < write_ratio:
+                    response = await client.post(f"/api/months/{month_id}/daily-expenses", json={
+                        "date": "2024-05-15", "description": "Кофе", "amount": 150
+                    })
+                else:
+                    response = await client.get(f"/api/months/{month_id}/daily-expenses")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return elapsed, latencies
+
+
+def run_mode(mode: str, path: str, args) -> None:
+    # Same pool settings and pragmas as the app's engines, except for a longer
+    # busy timeout: async writers hold the SQLite write lock across event
+    # loop turns, so under this much contention they can wait past 5 s
+    pragmas = {"busy_timeout": args.busy_timeout}
+    engine = create_db_engine(f"sqlite:///{path}", name=f"{mode}-sync", pragmas=pragmas)
+    async_engine = create_async_db_engine(f"sqlite+aiosqlite:///{path}", name=f"{mode}-async", pragmas=pragmas)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    user_id, month_id = seed(Session, args.expenses)
+
+    def bench_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def bench_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app = create_app(async_mode=mode == "async")
+    app.dependency_overrides[get_db] = bench_db
+    app.dependency_overrides[get_async_db] = bench_async_db
+
+    async def main():
+        try:
+            return await drive(app, user_id, month_id, args.requests, args.concurrency, args.write_ratio)
+        finally:
+            await async_engine.dispose()
+
+    elapsed, latencies = asyncio.run(main())
+    engine.dispose()
+    latencies.sort()
+    print(
+        f"{mode:>5}: {len(latencies) / elapsed:8.1f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+        f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--expenses", type=int, default=200, help="expenses in the month being read")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--busy-timeout", type=int, default=30000, help="SQLite busy_timeout in ms")
+    args = parser.parse_args()
+
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"{args.write_ratio:.0%} writes, {args.expenses} expenses per read"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ["sync", "async"]:
+            run_mode(mode, os.path.join(tmp, f"{mode}.db"), args)
+
+
+if __name__ == "__main__":
+    main()
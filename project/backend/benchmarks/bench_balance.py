@@ -0,0 +1,136 @@
+"""
+Benchmark: calculate_balance on a month with many daily expenses.
+
+Compares the previous per-day rescan over ORM rows with the current
+rollup-backed balance engine. Run from the backend directory:
+
+    python -m benchmarks.bench_balance --expenses 10000
+"""
+import argparse
+import random
+from calendar import monthrange
+from datetime import date
+
+from app import crud, models, rollups
+from .common import make_sessionmaker, timeit
+
+
+def legacy_calculate_balance(db, month_id):
+    """calculate_balance as it was before the aggregated engine."""
+    month = db.query(models.Month).filter(models.Month.id == month_id).first()
+    if not month:
+        return None
+
+    total_income = sum(i.amount for i in month.incomes)
+    total_fixed = sum(e.amount for e in month.fixed_expenses)
+    savings_amount = total_income * (month.savings_percent / 100)
+    available_budget = total_income - total_fixed - savings_amount
+
+    days_in_month = monthrange(month.year, month.month)[1]
+    daily_budget = available_budget / days_in_month if days_in_month > 0 else 0
+
+    today = date.today()
+    if today.year == month.year and today.month == month.month:
+        current_day = today.day
+    elif (today.year > month.year) or (today.year == month.year and today.month > month.month):
+        current_day = days_in_month
+    else:
+        current_day = 0
+
+    daily_expenses = sorted(month.daily_expenses, key=lambda x: x.date)
+
+    daily_balances = []
+    cumulative_spent = 0
+
+    for day in range(1, days_in_month + 1):
+        day_date = date(month.year, month.month, day)
+        day_expenses = sum(e.amount for e in daily_expenses if e.date == day_date)
+        cumulative_spent += day_expenses
+        expected_spent = daily_budget * day
+        balance = expected_spent - cumulative_spent
+
+        daily_balances.append({
+            "day": day,
+            "date": day_date.isoformat(),
+            "spent": day_expenses,
+            "cumulative_spent": cumulative_spent,
+            "expected_spent": expected_spent,
+            "balance": balance
+        })
+
+    actual_spent = sum(e.amount for e in daily_expenses)
+    expected_spent = daily_budget * current_day
+    balance = expected_spent - actual_spent
+
+    return {
+        "total_income": total_income,
+        "total_fixed_expenses": total_fixed,
+        "savings_amount": savings_amount,
+        "available_budget": available_budget,
+        "days_in_month": days_in_month,
+        "daily_budget": daily_budget,
+        "current_day": current_day,
+        "expected_spent": expected_spent,
+        "actual_spent": actual_spent,
+        "balance": balance,
+        "daily_balances": daily_balances
+    }
+
+
+def seed_month(db, expenses: int, year: int = 2024, month: int = 5) -> int:
+    rng = random.Random(42)
+    user = models.User(email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+
+    db_month = models.Month(user_id=user.id, year=year, month=month, savings_percent=10)
+    db.add(db_month)
+    db.flush()
+
+    db.add(models.Income(month_id=db_month.id, name="Salary", amount=250000))
+    db.add(models.FixedExpense(month_id=db_month.id, name="Rent", amount=60000))
+
+    days = monthrange(year, month)[1]
+    db.bulk_insert_mappings(models.DailyExpense, [
+        {
+            "month_id": db_month.id,
+            "date": date(year, month, rng.randint(1, days)),
+            "description": "expense",
+            "amount": round(rng.uniform(50, 5000), 2),
+            "category": "Прочее",
+        }
+        for _ in range(expenses)
+    ])
+    rollups.rebuild_month(db, db_month.id)
+    db.commit()
+    return db_month.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--expenses", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Session = make_sessionmaker()
+
+    with Session() as db:
+        month_id = seed_month(db, args.expenses)
+
+    def run(fn):
+        # Fresh session each time so the legacy path pays for loading the
+        # relationship instead of reading it from the identity map
+        with Session() as db:
+            return fn(db, month_id)
+
+    legacy = timeit(lambda: run(legacy_calculate_balance), args.repeat)
+    current = timeit(lambda: run(crud.calculate_balance), args.repeat)
+
+    print(f"calculate_balance, {args.expenses} expenses (best of {args.repeat})")
+    print(f"  legacy per-day scan: {legacy * 1000:9.2f} ms")
+    print(f"  current engine:      {current * 1000:9.2f} ms")
+    print(f"  speedup:             {legacy / current:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Microbenchmark: category detection with a large custom keyword set.
+
+Compares the nested keyword loop with the compiled Aho-Corasick matcher
+and checks both pick the same category for every description. Run from the
+backend directory:
+
+    python -m benchmarks.bench_category_detector --categories 50 --keywords 30
+"""
+import argparse
+import random
+
+from app.category_detector import DEFAULT_CATEGORIES, CategoryMatcher
+from .common import timeit
+
+ALPHABET = "абвгдеёжзийклмнопрстуфхцчшщъыьэюяabcdefghijklmnopqrstuvwxyz"
+
+
+def naive_detect_category(description: str, categories: dict) -> str:
+    """detect_category before the compiled matcher."""
+    description_lower = description.lower()
+
+    for category, keywords in categories.items():
+        for keyword in keywords:
+            if keyword in description_lower:
+                return category
+
+    return "Прочее"
+
+
+def make_categories(rng, count: int, keywords: int) -> dict:
+    categories = dict(DEFAULT_CATEGORIES)
+    for index in range(count):
+        categories[f"Категория {index}"] = [
+            "".join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 10)))
+            for _ in range(keywords)
+        ]
+    return categories
+
+
+def make_descriptions(rng, categories: dict, count: int) -> list:
+    keywords = [k for ks in categories.values() for k in ks]
+    descriptions = []
+    for _ in range(count):
+        words = ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 8))) for _ in range(4)]
+        if rng.random() < 0.5:
+            words.insert(rng.randint(0, len(words)), rng.choice(keywords).upper())
+        descriptions.append(" ".join(words))
+    return descriptions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--keywords", type=int, default=30, help="keywords per custom category")
+    parser.add_argument("--descriptions", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    categories = make_categories(rng, args.categories, args.keywords)
+    descriptions = make_descriptions(rng, categories, args.descriptions)
+    matcher = CategoryMatcher(categories)
+
+    for description in descriptions:
+        assert matcher.detect(description) == naive_detect_category(description, categories), description
+
+    total_keywords = sum(len(k) for k in categories.values())
+    naive = timeit(lambda: [naive_detect_category(d, categories) for d in descriptions], args.repeat)
+    compiled = timeit(lambda: [matcher.detect(d) for d in descriptions], args.repeat)
+    build = timeit(lambda: CategoryMatcher(categories), args.repeat)
+
+    print(f"{total_keywords} keywords, {len(descriptions)} descriptions (best of {args.repeat})")
+    print(f"  nested loop:  {naive / len(descriptions) * 1e6:8.2f} us/description")
+    print(f"  aho-corasick: {compiled / len(descriptions) * 1e6:8.2f} us/description")
+    print(f"  speedup:      {naive / compiled:8.1f}x")
+    print(f"  compile:      {build * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
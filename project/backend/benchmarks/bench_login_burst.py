@@ -0,0 +1,130 @@
+"""
+Load test: latency of a regular endpoint during a login burst.
+
+Fires `--logins` concurrent POST /api/auth/login requests while probing
+GET /api/months, and reports probe latency before and during the burst.
+`--inline` emulates the previous behaviour (bcrypt on the shared request
+threadpool) for comparison. Run from the backend directory:
+
+    python -m benchmarks.bench_login_burst --logins 200
+    python -m benchmarks.bench_login_burst --logins 200 --inline
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from app.auth import router as auth_router
+from app.auth.hashing import HashingPool
+from app.auth.security import create_access_token, get_password_hash
+from app.database import get_db
+from app.main import app
+from app.models import User
+from .common import make_sessionmaker
+
+PASSWORD = "benchmark-password"
+
+
+class InlinePool(HashingPool):
+    """Hashes on the shared request threadpool, like the sync handlers did."""
+
+    async def run(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return await run_in_threadpool(fn, *args)
+        finally:
+            self.count += 1
+            self.seconds_total += time.perf_counter() - start
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def probe(client: httpx.AsyncClient, cookies: dict, stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/months", cookies=cookies)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def measure(client: httpx.AsyncClient, cookies: dict, seconds: float, burst=None) -> tuple:
+    stop = asyncio.Event()
+    latencies = []
+    probes = [asyncio.create_task(probe(client, cookies, stop, latencies)) for _ in range(4)]
+    statuses = []
+    if burst:
+        statuses = await burst()
+    else:
+        await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*probes)
+    return latencies, statuses
+
+
+async def run(logins: int, seconds: float) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        cookies = {"access_token": create_access_token(data={"sub": "1"})}
+
+        async def login():
+            response = await client.post("/api/auth/login", json={"email": "bench@example.com", "password": PASSWORD})
+            return response.status_code
+
+        async def burst():
+            return await asyncio.gather(*(login() for _ in range(logins)))
+
+        for phase, fn in [("idle", None), ("burst", burst)]:
+            started = time.perf_counter()
+            latencies, statuses = await measure(client, cookies, seconds, fn)
+            elapsed = time.perf_counter() - started
+            line = (
+                f"{phase:>5}: {len(latencies):5d} probes  p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  "
+                f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms  max {max(latencies) * 1000:7.1f} ms"
+            )
+            if statuses:
+                ok = statuses.count(200)
+                line += f"  logins {ok} ok / {statuses.count(503)} rejected in {elapsed:.1f} s"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=2.0, help="idle probing time")
+    parser.add_argument("--inline", action="store_true", help="hash on the shared threadpool")
+    args = parser.parse_args()
+
+    Session = make_sessionmaker()
+    with Session() as db:
+        db.add(User(email="bench@example.com", hashed_password=get_password_hash(PASSWORD)))
+        db.commit()
+
+    def bench_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = bench_db
+    pool = InlinePool() if args.inline else HashingPool()
+    auth_router.hashing_pool = pool
+    print(f"{'inline' if args.inline else 'pool'} hashing, {args.logins} concurrent logins")
+    try:
+        asyncio.run(run(args.logins, args.seconds))
+    finally:
+        pool.shutdown()
+    stats = pool.stats()
+    if stats["count"]:
+        print(f"bcrypt: {stats['count']} calls, mean {stats['seconds_total'] / stats['count'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
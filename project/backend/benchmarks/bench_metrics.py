@@ -0,0 +1,125 @@
+"""
+Benchmark: per-request cost of the metrics middleware and query hooks.
+
+Builds the app twice on identically seeded databases, with the metrics
+middleware and statement hooks and without, and calls the ASGI app
+directly (no TestClient, whose own cost dwarfs the difference). Off and on
+runs alternate so machine drift hits both. The statement hook is also
+timed on its own. Run from the backend directory:
+
+    python -m benchmarks.bench_metrics --requests 500
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app import crud, metrics, seed
+from app.auth.security import create_access_token
+from app.cache import response_cache
+from app.database import get_db
+from app.main import create_app
+from .common import make_sessionmaker, timeit
+
+
+def build(enabled: bool):
+    Session = make_sessionmaker()
+    if enabled:
+        metrics.instrument_engine(Session.kw["bind"], "bench")
+    with Session() as db:
+        user_id = seed.generate(db, users=1, months=3, expenses=300, seed=1)[0]
+        month_id = crud.get_months(db, user_id)[0].id
+
+    def bench_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    metrics.ENABLED = enabled
+    try:
+        app = create_app(async_mode=False)
+    finally:
+        metrics.ENABLED = True
+    app.dependency_overrides[get_db] = bench_db
+    cookie = f"access_token={create_access_token(data={'sub': str(user_id)})}".encode()
+    return app, cookie, month_id, Session
+
+
+async def call(app, path: str, cookie: bytes) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"cookie", cookie)], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500, help="requests per timing")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    builds = {enabled: build(enabled) for enabled in (False, True)}
+    loop = asyncio.new_event_loop()
+
+    def requests(enabled: bool, path: str, uncached: bool):
+        app, cookie, month_id, _ = builds[enabled]
+        path = path.format(month_id=month_id)
+
+        async def run():
+            for _ in range(args.requests):
+                if uncached:
+                    response_cache.clear()
+                assert await call(app, path, cookie) == 200
+
+        return lambda: loop.run_until_complete(run())
+
+    cases = [
+        ("GET /health", "/health", False),
+        ("GET /api/months", "/api/months", False),
+        ("GET /api/months/{id}/balance", "/api/months/{month_id}/balance", True),
+        ("GET /api/months/{id}", "/api/months/{month_id}", False),
+    ]
+
+    print(f"{args.requests} requests per case, best of {args.repeat} (us per request)")
+    print(f"{'case':<32} {'off':>9} {'on':>9} {'overhead':>9} {'':>7}")
+    for name, path, uncached in cases:
+        best = {False: float("inf"), True: float("inf")}
+        for _ in range(args.repeat):
+            for enabled in (False, True):
+                best[enabled] = min(best[enabled], timeit(requests(enabled, path, uncached), 1))
+        off, on = (best[enabled] / args.requests * 1e6 for enabled in (False, True))
+        print(f"{name:<32} {off:9.1f} {on:9.1f} {on - off:9.1f} {(on - off) / off:+7.1%}")
+
+    statements = args.requests * 10
+    per_statement = {}
+    for enabled in (False, True):
+        Session = builds[enabled][3]
+        with Session() as db:
+            def run():
+                for _ in range(statements):
+                    db.execute(text("SELECT 1"))
+
+            per_statement[enabled] = timeit(run, args.repeat) / statements * 1e6
+    print(f"statement hook: {per_statement[True] - per_statement[False]:.1f} us per statement "
+          f"({per_statement[False]:.1f} -> {per_statement[True]:.1f} us for SELECT 1)")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
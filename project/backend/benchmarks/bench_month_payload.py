@@ -0,0 +1,114 @@
+"""
+Benchmark: GET /api/months/{id} request time vs. number of rows in the month.
+
+Compares three ways of producing the month payload:
+
+- orm+models: ORM objects validated by the response model (the endpoint
+  before the fast path, rebuilt here with selectinload)
+- rows+models: plain rows validated by the response model (FAST_JSON=false)
+- rows+orjson: plain rows encoded with orjson (FAST_JSON=true)
+
+The balance endpoint is timed with an empty response cache in both modes;
+its payload has one entry per day, so it does not grow with the rows. Run
+from the backend directory:
+
+    python -m benchmarks.bench_month_payload --rows 100 1000 10000
+"""
+import argparse
+import random
+
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import selectinload
+
+from app import crud, models, schemas, serialization
+from app.auth.security import create_access_token
+from app.cache import response_cache
+from app.database import get_db
+from app.loaders import month_loader
+from app.main import create_app
+from .common import make_sessionmaker, timeit
+
+load_month_orm = month_loader(
+    selectinload(models.Month.incomes),
+    selectinload(models.Month.fixed_expenses),
+    selectinload(models.Month.daily_expenses),
+)
+
+
+def legacy_get_month(month: models.Month = Depends(load_month_orm)):
+    return month
+
+
+def seed(Session, rows: int) -> tuple:
+    with Session() as db:
+        user = models.User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        month = crud.create_month(db, schemas.MonthCreate(year=2024, month=5, savings_percent=10), user.id)
+        crud.create_income(db, month.id, schemas.IncomeCreate(name="Salary", amount=300000))
+        crud.create_fixed_expense(db, month.id, schemas.FixedExpenseCreate(name="Rent", amount=50000))
+        rng = random.Random(1)
+        crud.create_daily_expenses_bulk(db, month.id, [
+            schemas.DailyExpenseCreate(
+                date=f"2024-05-{rng.randint(1, 31):02d}", description="Продукты",
+                amount=rng.randint(50, 2000), category="Еда"
+            )
+            for _ in range(rows)
+        ], user.id)
+        return user.id, month.id
+
+
+def bench(rows: int, repeat: int) -> dict:
+    Session = make_sessionmaker()
+    user_id, month_id = seed(Session, rows)
+
+    def bench_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = create_app(async_mode=False)
+    app.dependency_overrides[get_db] = bench_db
+    app.add_api_route("/bench/months/{month_id}", legacy_get_month, response_model=schemas.Month)
+    client = TestClient(app)
+    client.cookies.set("access_token", create_access_token(data={"sub": str(user_id)}))
+
+    def get(path):
+        response = client.get(path)
+        response.raise_for_status()
+
+    def get_balance():
+        response_cache.clear()
+        get(f"/api/months/{month_id}/balance")
+
+    results = {"orm+models": timeit(lambda: get(f"/bench/months/{month_id}"), repeat)}
+    for fast in (False, True):
+        serialization.FAST_JSON = fast
+        mode = "rows+orjson" if fast else "rows+models"
+        results[mode] = timeit(lambda: get(f"/api/months/{month_id}"), repeat)
+        results[f"balance {mode}"] = timeit(get_balance, repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"GET /api/months/{{id}} and /balance, best of {args.repeat} (ms)")
+    print(f"{'rows':>8} {'orm+models':>11} {'rows+models':>12} {'rows+orjson':>12}  {'balance models':>14} {'orjson':>7}")
+    for rows in args.rows:
+        r = bench(rows, args.repeat)
+        print(
+            f"{rows:8d} {r['orm+models'] * 1000:11.2f} {r['rows+models'] * 1000:12.2f} "
+            f"{r['rows+orjson'] * 1000:12.2f}  {r['balance rows+models'] * 1000:14.2f} "
+            f"{r['balance rows+orjson'] * 1000:7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
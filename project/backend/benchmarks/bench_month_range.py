@@ -0,0 +1,79 @@
+"""
+Benchmark: yearly trend data for a user with a long history.
+
+Compares one calculate_balance call per month (what the dashboard did to draw
+trends) with the single get_month_range query. Run from the backend directory:
+
+    python -m benchmarks.bench_month_range --years 15 --expenses 200
+"""
+import argparse
+import random
+from calendar import monthrange
+from datetime import date
+
+from app import crud, models, rollups
+from app.category_detector import DEFAULT_CATEGORIES
+from .common import make_sessionmaker, timeit
+
+
+def seed_history(db, years: int, expenses: int) -> int:
+    rng = random.Random(42)
+    categories = list(DEFAULT_CATEGORIES) + ["Прочее"]
+    user = models.User(email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+
+    for index in range(years * 12):
+        year, month = 2000 + index // 12, index % 12 + 1
+        db_month = models.Month(user_id=user.id, year=year, month=month, savings_percent=10)
+        db.add(db_month)
+        db.flush()
+        db.add(models.Income(month_id=db_month.id, name="Salary", amount=250000))
+        db.add(models.FixedExpense(month_id=db_month.id, name="Rent", amount=60000))
+        days = monthrange(year, month)[1]
+        db.bulk_insert_mappings(models.DailyExpense, [
+            {
+                "month_id": db_month.id,
+                "date": date(year, month, rng.randint(1, days)),
+                "description": "expense",
+                "amount": round(rng.uniform(50, 5000), 2),
+                "category": rng.choice(categories),
+            }
+            for _ in range(expenses)
+        ])
+        db.flush()
+        rollups.rebuild_month(db, db_month.id)
+    db.commit()
+    return user.id
+
+
+def per_month_balances(db, user_id):
+    return [crud.calculate_balance(db, month.id) for month in crud.get_months(db, user_id)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=15)
+    parser.add_argument("--expenses", type=int, default=200, help="daily expenses per month")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Session = make_sessionmaker()
+    with Session() as db:
+        user_id = seed_history(db, args.years, args.expenses)
+
+    def run(fn):
+        with Session() as db:
+            return fn(db, user_id)
+
+    per_month = timeit(lambda: run(per_month_balances), args.repeat)
+    ranged = timeit(lambda: run(crud.get_month_range), args.repeat)
+
+    print(f"{args.years * 12} months x {args.expenses} expenses (best of {args.repeat})")
+    print(f"  calculate_balance per month: {per_month * 1000:9.2f} ms")
+    print(f"  get_month_range:             {ranged * 1000:9.2f} ms")
+    print(f"  speedup:                     {per_month / ranged:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
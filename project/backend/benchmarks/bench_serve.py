@@ -0,0 +1,78 @@
+"""
+Benchmark: app.serve against the single uvicorn process and uvicorn --workers.
+
+Seeds one SQLite file (or --database-url) and runs the same load test
+(benchmarks.loadtest) against each server in turn:
+
+- single: `uvicorn app.main:app`, the one process the Dockerfile used to run
+- uvicorn: `uvicorn --workers N`, which spawns N fresh interpreters
+- serve: `python -m app.serve --workers N`, forked from one preloaded master
+
+and reports throughput, latency percentiles and the memory of the whole
+process tree as proportional set size (PSS, shared pages split between the
+processes sharing them), read from /proc after the load. Run from the
+backend directory:
+
+    python -m benchmarks.bench_serve --workers 4 --concurrency 20 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from typing import List, Optional
+
+from . import loadtest
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def tree_pss_mb(pid: int) -> Optional[float]:
+    """PSS of `pid` and all its descendants in MiB, None without /proc."""
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(_children(current))
+        try:
+            with open(f"/proc/{current}/smaps_rollup") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+        except (OSError, StopIteration):
+            if current == pid:
+                return None
+    return total / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--database-url", help="default: a temporary SQLite file")
+    args = parser.parse_args()
+
+    mix = loadtest.parse_mix(loadtest.DEFAULT_MIX)
+    servers = [("single", "uvicorn", 1), ("uvicorn", "uvicorn", args.workers), ("serve", "serve", args.workers)]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'serve.db')}"
+        loadtest.seed_database(database_url, args.users, months=3, expenses=300)
+        for name, server, workers in servers:
+            with loadtest.local_server(database_url, workers, server=server) as (base_url, process):
+                report = asyncio.run(loadtest.run(base_url, args.users, args.concurrency, args.duration, mix))
+                results.append((f"{name} x{workers}", report["total"], tree_pss_mb(process.pid)))
+
+    print(f"{args.concurrency} virtual users for {args.duration:.0f} s per server")
+    print(f"{'server':<14} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'PSS MiB':>8}")
+    for name, total, pss in results:
+        print(f"{name:<14} {total['requests']:7d} {total['errors']:5d} {total['rps']:8.1f} {total['p50_ms']:8.1f} "
+              f"{total['p95_ms']:8.1f} {total['p99_ms']:8.1f} {pss if pss is not None else float('nan'):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
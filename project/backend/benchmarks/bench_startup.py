@@ -0,0 +1,110 @@
+"""
+Benchmark: time from spawning a worker to its first served request.
+
+Starts --workers single-worker uvicorn processes at once on one bootstrapped
+SQLite database, the way `uvicorn --workers N` forks them, and polls each
+until /health answers. "lazy" serves app.main:app, which touches the
+database on the first query; "legacy" runs create_all and the default
+categories before building the app, as main.py did at import and startup.
+Each worker's time to its first /ready 200 is reported too. Run from the
+backend directory:
+
+    python -m benchmarks.bench_startup --workers 4
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .loadtest import _free_port
+
+
+def legacy_app():
+    """The app as main.py used to build it: schema and seed data on every start."""
+    from app import crud
+    from app.database import Base, SessionLocal, engine
+    from app.main import create_app
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        crud.create_default_categories(db)
+    return create_app()
+
+
+TARGETS = {
+    "lazy": ["app.main:app"],
+    "legacy": ["benchmarks.bench_startup:legacy_app", "--factory"],
+}
+
+
+def _wait(client: httpx.Client, url: str, started: float, timeout: float) -> float:
+    while True:
+        try:
+            if client.get(url).is_success:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        if time.perf_counter() - started > timeout:
+            raise RuntimeError(f"{url} did not answer within {timeout:.0f} s")
+        time.sleep(0.005)
+
+
+def start_workers(target: str, workers: int, database_url: str, timeout: float = 60):
+    """Spawn `workers` servers at once; returns (seconds to /health, seconds to /ready) per worker."""
+    env = {**os.environ, "DATABASE_URL": database_url}
+    ports = [_free_port() for _ in range(workers)]
+    started = time.perf_counter()
+    servers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", *TARGETS[target], "--port", str(port), "--log-level", "warning"],
+            env=env,
+        )
+        for port in ports
+    ]
+    try:
+        with httpx.Client() as client:
+            health = [_wait(client, f"http://127.0.0.1:{port}/health", started, timeout) for port in ports]
+            ready = [_wait(client, f"http://127.0.0.1:{port}/ready", started, timeout) for port in ports]
+    finally:
+        for server in servers:
+            server.terminate()
+        for server in servers:
+            server.wait(timeout=10)
+    return health, ready
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        subprocess.run(
+            [sys.executable, "-m", "app.bootstrap"],
+            env={**os.environ, "DATABASE_URL": database_url}, check=True, stdout=subprocess.DEVNULL,
+        )
+
+        results = {target: ([], []) for target in TARGETS}
+        for _ in range(args.repeat):
+            # Alternate so machine drift hits both
+            for target in TARGETS:
+                health, ready = start_workers(target, args.workers, database_url)
+                results[target][0].extend(health)
+                results[target][1].extend(ready)
+
+    print(f"{args.workers} workers started together, {args.repeat} rounds (ms from spawn)")
+    print(f"{'app':<8} {'health p50':>11} {'health max':>11} {'ready p50':>10} {'ready max':>10}")
+    for target, (health, ready) in results.items():
+        print(f"{target:<8} {statistics.median(health) * 1000:11.0f} {max(health) * 1000:11.0f} "
+              f"{statistics.median(ready) * 1000:10.0f} {max(ready) * 1000:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
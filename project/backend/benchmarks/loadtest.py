@@ -0,0 +1,337 @@
+"""
+End-to-end load test of the API over real HTTP.
+
+Starts uvicorn on `app.main:app` (or app.serve with --server serve) against
+a fresh SQLite file (or the --database-url you pass, e.g. a local
+Postgres), seeds it with app.seed and runs --concurrency virtual users for
+--duration seconds. Each virtual user logs in, then repeatedly picks an
+action from --mix by weight and waits an exponentially distributed think
+time averaging --think seconds. Latency
+percentiles and throughput are reported per route and can be saved as JSON
+to compare runs across commits. Run from the backend directory:
+
+    python -m benchmarks.loadtest --concurrency 20 --duration 30 --output before.json
+    python -m benchmarks.loadtest --concurrency 20 --duration 30 --compare before.json
+
+Against a server that is already running, seed it first with the same
+prefix and password (python -m app.seed --prefix load) and pass --url.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+PREFIX = "load"
+PASSWORD = "loadpassword"
+DEFAULT_MIX = "login=1,create_expense=4,balance=10,month=3,daily_expenses=3,analytics=2"
+
+
+class Stats:
+    """Latencies and errors of one route."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def add(self, seconds: float, ok: bool) -> None:
+        self.latencies.append(seconds)
+        if not ok:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "rps": round(len(latencies) / elapsed, 2),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+            **{f"p{q}_ms": _ms(percentile(latencies, q)) for q in (50, 95, 99)},
+            "max_ms": _ms(latencies[-1] if latencies else None),
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def percentile(ordered: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile `q` (0-100) of an ascending list."""
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ACTIONS:
+            raise argparse.ArgumentTypeError(f"unknown action {name!r}, expected one of {', '.join(ACTIONS)}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("the mix needs at least one action with a positive weight")
+    return mix
+
+
+class VirtualUser:
+    """One logged-in client with its own cookies and months."""
+
+    def __init__(self, client: httpx.AsyncClient, email: str, stats: Dict[str, Stats], rng: random.Random):
+        self.client = client
+        self.email = email
+        self.stats = stats
+        self.rng = rng
+        self.month_ids: List[int] = []
+
+    async def request(self, route: str, method: str, path: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.stats.setdefault(route, Stats()).add(time.perf_counter() - start, ok=False)
+            raise
+        self.stats.setdefault(route, Stats()).add(time.perf_counter() - start, ok=response.is_success)
+        return response
+
+    def month_id(self) -> int:
+        return self.rng.choice(self.month_ids)
+
+    async def login(self):
+        await self.request("POST /api/auth/login", "POST", "/api/auth/login", json={
+            "email": self.email, "password": PASSWORD
+        })
+
+    async def start(self):
+        await self.login()
+        response = await self.client.get("/api/months")
+        response.raise_for_status()
+        self.month_ids = [month["id"] for month in response.json()]
+        if not self.month_ids:
+            raise RuntimeError(f"{self.email} has no months; was the database seeded?")
+
+    async def create_expense(self):
+        month_id = self.month_id()
+        await self.request("POST /api/months/{id}/daily-expenses", "POST", f"/api/months/{month_id}/daily-expenses", json={
+            "date": f"2024-01-{self.rng.randint(1, 28):02d}",
+            "description": self.rng.choice(["Кофе", "Такси", "Продукты", "Аптека", "Подарок"]),
+            "amount": self.rng.randint(50, 3000),
+        })
+
+    async def balance(self):
+        await self.request("GET /api/months/{id}/balance", "GET", f"/api/months/{self.month_id()}/balance")
+
+    async def month(self):
+        await self.request("GET /api/months/{id}", "GET", f"/api/months/{self.month_id()}")
+
+    async def daily_expenses(self):
+        await self.request(
+            "GET /api/months/{id}/daily-expenses", "GET", f"/api/months/{self.month_id()}/daily-expenses?limit=50"
+        )
+
+    async def analytics(self):
+        await self.request("GET /api/months/{id}/analytics", "GET", f"/api/months/{self.month_id()}/analytics")
+
+
+ACTIONS = ["login", "create_expense", "balance", "month", "daily_expenses", "analytics"]
+
+
+async def run(
+    base_url: str,
+    users: int,
+    concurrency: int,
+    duration: float,
+    mix: Dict[str, float],
+    think: float = 0.0,
+    seed: int = 0,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> dict:
+    """Run the virtual users for `duration` seconds and summarize per route.
+
+    Virtual user n logs in as `{PREFIX}{n % users}@example.com`. Pass
+    `transport` to drive an ASGI app in-process instead of `base_url`.
+    """
+    stats: Dict[str, Stats] = {}
+    names, weights = list(mix), list(mix.values())
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+
+    async def virtual_user(n: int, deadline: float):
+        rng = random.Random(seed * 100003 + n)
+        async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=60) as client:
+            user = VirtualUser(client, f"{PREFIX}{n % users}@example.com", stats, rng)
+            await user.start()
+            while time.perf_counter() < deadline:
+                action = rng.choices(names, weights=weights)[0]
+                try:
+                    await getattr(user, action)()
+                except httpx.HTTPError:
+                    pass
+                if think:
+                    await asyncio.sleep(rng.expovariate(1 / think))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(n, started + duration) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    total = Stats()
+    for route in stats.values():
+        total.latencies.extend(route.latencies)
+        total.errors += route.errors
+    return {
+        "elapsed": round(elapsed, 3),
+        "total": total.summary(elapsed),
+        "routes": {route: stats[route].summary(elapsed) for route in sorted(stats)},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# How local_server starts each kind of server
+SERVERS = {
+    "uvicorn": ["-m", "uvicorn", "app.main:app"],
+    "serve": ["-m", "app.serve"],
+}
+
+
+@contextmanager
+def local_server(database_url: str, workers: int, env: Optional[dict] = None, server: str = "uvicorn"):
+    """Serve the app on `database_url` with uvicorn or app.serve; yields (base URL, process)."""
+    env = {**os.environ, **(env or {}), "DATABASE_URL": database_url}
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, *SERVERS[server], "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{server} exited with code {process.returncode}")
+            try:
+                if httpx.get(f"{base_url}/health").is_success:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{server} did not become healthy within 30 s")
+            time.sleep(0.2)
+        yield base_url, process
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def seed_database(database_url: str, users: int, months: int, expenses: int) -> None:
+    subprocess.run(
+        [sys.executable, "-m", "app.seed", "--users", str(users), "--months", str(months),
+         "--expenses", str(expenses), "--start", "2024-01", "--prefix", PREFIX, "--password", PASSWORD],
+        env={**os.environ, "DATABASE_URL": database_url},
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict, previous: Optional[dict] = None) -> None:
+    """Per-route table; with `previous`, each percentile shows its change."""
+    def rows(results: dict) -> dict:
+        return {**results["routes"], "total": results["total"]}
+
+    before = rows(previous) if previous else {}
+    print(f"{'route':<40} {'reqs':>6} {'err':>4} {'rps':>8} {'p50 ms':>15} {'p95 ms':>15} {'p99 ms':>15}")
+    for route, s in rows(report).items():
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            old = before.get(route, {}).get(key)
+            change = f"({s[key] / old - 1:+.0%})" if old and s[key] is not None else ""
+            cells.append(f" {s[key] or 0:8.1f}{change:>7}")
+        print(f"{route:<40} {s['requests']:6d} {s['errors']:4d} {s['rps']:8.1f}" + "".join(cells))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest")
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--database-url", help="database for the local server (default: a temporary SQLite file)")
+    parser.add_argument("--workers", type=int, default=1, help="workers of the local server")
+    parser.add_argument("--server", choices=sorted(SERVERS), default="uvicorn",
+                        help="run the local server with uvicorn or app.serve (pre-forked)")
+    parser.add_argument("--concurrency", type=int, default=10, help="virtual users")
+    parser.add_argument("--users", type=int, default=10, help="distinct accounts the virtual users log in as")
+    parser.add_argument("--duration", type=float, default=20, help="seconds")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between actions, seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"action weights (default {DEFAULT_MIX})")
+    parser.add_argument("--months", type=int, default=3, help="seeded months per account")
+    parser.add_argument("--expenses", type=int, default=300, help="seeded expenses per month")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args(argv)
+
+    config = {
+        "concurrency": args.concurrency, "users": args.users, "duration": args.duration,
+        "think": args.think, "mix": args.mix, "months": args.months, "expenses": args.expenses,
+        "workers": args.workers, "server": args.server, "seed": args.seed,
+    }
+
+    def execute(base_url: str) -> dict:
+        return asyncio.run(run(base_url, args.users, args.concurrency, args.duration, args.mix, args.think, args.seed))
+
+    if args.url:
+        report = execute(args.url)
+        config["target"] = args.url
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'loadtest.db')}"
+            seed_database(database_url, args.users, args.months, args.expenses)
+            with local_server(database_url, args.workers, server=args.server) as (base_url, _):
+                report = execute(base_url)
+        config["target"] = "sqlite" if not args.database_url else database_url.split(":", 1)[0]
+
+    report = {
+        "commit": git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": config,
+        **report,
+    }
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"compared with {previous.get('commit') or args.compare} (change in parentheses)")
+    print_report(report, previous)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Saved results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
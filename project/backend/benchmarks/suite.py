@@ -0,0 +1,292 @@
+"""
+Benchmark suite with recorded baselines.
+
+Seeds an in-memory database with app.seed, times the crud functions, the
+category detector and the HTTP endpoints (through TestClient), and
+compares each case's best time against benchmarks/baselines.json. A case
+that got slower than its baseline by more than --threshold in each of
+ATTEMPTS timings fails the run.
+Run from the backend directory:
+
+    python -m benchmarks.suite                 # compare against the baselines
+    python -m benchmarks.suite --save          # record new baselines
+    python -m benchmarks.suite -k http. --rounds 50
+
+Baselines are only comparable on the machine that recorded them; record
+them again (--save) when the benchmark machine changes. Within one machine,
+each run times a fixed CPU loop first and scales the baselines by it, which
+absorbs most of the drift from load and frequency scaling. The same cases
+run under pytest with `pytest benchmarks` (see test_suite.py).
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Optional
+
+from fastapi.testclient import TestClient
+
+from app import crud, seed
+from app.auth.security import create_access_token
+from app.cache import response_cache
+from app.category_detector import CategoryMatcher, DEFAULT_CATEGORIES
+from app.database import get_db
+from app.main import create_app
+from .common import make_sessionmaker
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+# Even calibrated, best-of-N times on a shared machine move by a third or
+# more between runs; tighten this on dedicated benchmark hardware
+DEFAULT_THRESHOLD = float(os.getenv("BENCH_THRESHOLD", "0.5"))
+# Untimed calls before each case, and timed attempts before a slowdown counts
+WARMUP_SECONDS = 0.2
+ATTEMPTS = 3
+DATASET = {"users": 2, "months": 12, "expenses": 500}
+
+CASES = {}
+
+
+def case(name: str):
+    """Register `fn(context) -> callable` as the benchmark case `name`."""
+    def register(fn):
+        CASES[name] = fn
+        return fn
+
+    return register
+
+
+class Context:
+    """The seeded database and an authenticated client for one run."""
+
+    def __init__(self, users: int, months: int, expenses: int):
+        self.Session = make_sessionmaker()
+        with self.Session() as db:
+            self.user_id = seed.generate(db, users, months, expenses, seed=1)[0]
+            months_ = crud.get_months(db, self.user_id)
+            self.month_id = months_[len(months_) // 2].id
+            self.descriptions = [e.description for e in crud.get_daily_expenses(db, self.month_id)]
+
+        def bench_db():
+            db = self.Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app = create_app(async_mode=False)
+        app.dependency_overrides[get_db] = bench_db
+        self.client = TestClient(app)
+        self.client.cookies.set("access_token", create_access_token(data={"sub": str(self.user_id)}))
+
+    def crud(self, fn: Callable, *args) -> Callable:
+        """Call `fn(db, *args)` in a fresh session, as a request would."""
+        def run():
+            with self.Session() as db:
+                fn(db, *args)
+
+        return run
+
+    def get(self, path: str, uncached: bool = False) -> Callable:
+        def run():
+            if uncached:
+                response_cache.clear()
+            self.client.get(path).raise_for_status()
+
+        return run
+
+
+@case("crud.calculate_balance")
+def _(ctx):
+    return ctx.crud(crud.calculate_balance, ctx.month_id)
+
+
+@case("crud.get_analytics")
+def _(ctx):
+    return ctx.crud(crud.get_analytics, ctx.month_id)
+
+
+@case("crud.get_month_range")
+def _(ctx):
+    return ctx.crud(crud.get_month_range, ctx.user_id)
+
+
+@case("crud.get_trend_analytics")
+def _(ctx):
+    return ctx.crud(crud.get_trend_analytics, ctx.user_id)
+
+
+@case("crud.get_daily_expenses")
+def _(ctx):
+    return ctx.crud(crud.get_daily_expenses, ctx.month_id)
+
+
+@case("category.detect")
+def _(ctx):
+    matcher = CategoryMatcher(DEFAULT_CATEGORIES)
+    return lambda: [matcher.detect(description) for description in ctx.descriptions]
+
+
+@case("http.months")
+def _(ctx):
+    return ctx.get("/api/months")
+
+
+@case("http.month_detail")
+def _(ctx):
+    return ctx.get(f"/api/months/{ctx.month_id}")
+
+
+@case("http.balance")
+def _(ctx):
+    return ctx.get(f"/api/months/{ctx.month_id}/balance", uncached=True)
+
+
+@case("http.analytics")
+def _(ctx):
+    return ctx.get(f"/api/months/{ctx.month_id}/analytics", uncached=True)
+
+
+@case("http.daily_expenses_page")
+def _(ctx):
+    return ctx.get(f"/api/months/{ctx.month_id}/daily-expenses?limit=100")
+
+
+@case("http.month_range")
+def _(ctx):
+    return ctx.get("/api/months/range")
+
+
+@case("http.trend_analytics")
+def _(ctx):
+    return ctx.get("/api/months/analytics")
+
+
+def measure(fn: Callable, rounds: int, warmup: int = 2) -> float:
+    """Best wall-clock time of `rounds` calls, in seconds, with the GC paused.
+
+    The minimum is what noise cannot make smaller, so it drifts far less
+    between runs than the mean or median. At least `warmup` calls, and
+    WARMUP_SECONDS of calls, run first to fill caches and let the CPU
+    clock up.
+    """
+    warm_until = time.perf_counter() + WARMUP_SECONDS
+    calls = 0
+    while calls < warmup or time.perf_counter() < warm_until:
+        fn()
+        calls += 1
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        best = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def calibrate(rounds: int = 30) -> float:
+    """Best time of a fixed pure-Python workload, as a measure of machine speed.
+
+    Comparisons are scaled by the ratio of this to the recorded value, so a
+    run on a throttled or busy machine is not reported as a regression.
+    """
+    def work():
+        total = 0
+        for i in range(200_000):
+            total += i * i % 7
+        return total
+
+    return measure(work, rounds)
+
+
+def load_baselines(path: str = BASELINES_PATH) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(results: dict, dataset: dict, calibration: float, path: str = BASELINES_PATH) -> None:
+    with open(path, "w") as f:
+        json.dump({
+            "dataset": dataset,
+            "calibration": round(calibration, 6),
+            "machine": f"{platform.machine()} {platform.python_implementation()} {platform.python_version()}",
+            "cases": {name: round(seconds, 6) for name, seconds in sorted(results.items())},
+        }, f, indent=2)
+        f.write("\n")
+
+
+def regression(seconds: float, baseline: Optional[float], threshold: float) -> bool:
+    return baseline is not None and seconds > baseline * (1 + threshold)
+
+
+def measure_against(fn: Callable, rounds: int, baseline: Optional[float], threshold: float) -> float:
+    """measure(), repeated up to ATTEMPTS times while it looks like a regression.
+
+    A real slowdown stays over the threshold every time; a burst of load
+    on a shared machine rarely lasts through all attempts.
+    """
+    seconds = measure(fn, rounds)
+    for _ in range(ATTEMPTS - 1):
+        if not regression(seconds, baseline, threshold):
+            break
+        seconds = min(seconds, measure(fn, rounds))
+    return seconds
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("--save", action="store_true", help="record the results as the new baselines")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown over the baseline (0.5 = 50%%)")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("-k", dest="select", default="", help="only cases whose name contains this")
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baselines)
+    if baselines and baselines["dataset"] != DATASET:
+        print(f"baselines were recorded on {baselines['dataset']}, not {DATASET}; ignoring them", file=sys.stderr)
+        baselines = None
+    recorded = baselines["cases"] if baselines else {}
+
+    ctx = Context(**DATASET)
+    calibration = calibrate()
+    speed = calibration / baselines["calibration"] if baselines else 1.0
+    print(f"calibration {calibration * 1000:.2f} ms ({speed:.2f}x the baseline machine)")
+    results, failed = {}, []
+    print(f"{'case':<28} {'baseline ms':>12} {'best ms':>10} {'change':>8}")
+    for name, make in CASES.items():
+        if args.select not in name:
+            continue
+        baseline = recorded[name] * speed if name in recorded else None
+        seconds = results[name] = measure_against(make(ctx), args.rounds, baseline, args.threshold)
+        change = f"{seconds / baseline - 1:+7.1%}" if baseline else "new"
+        status = ""
+        if regression(seconds, baseline, args.threshold):
+            failed.append(name)
+            status = "  REGRESSION"
+        baseline_ms = f"{baseline * 1000:12.2f}" if baseline else f"{'-':>12}"
+        print(f"{name:<28} {baseline_ms} {seconds * 1000:10.2f} {change:>8}{status}")
+
+    if args.save:
+        rescaled = {name: seconds * speed for name, seconds in recorded.items()}
+        save_baselines({**rescaled, **results}, DATASET, calibration, args.baselines)
+        print(f"Saved {len(results)} baseline(s) to {args.baselines}")
+        return 0
+    if failed:
+        print(f"{len(failed)} case(s) over the {args.threshold:.0%} threshold: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
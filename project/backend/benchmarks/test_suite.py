@@ -0,0 +1,38 @@
+"""
+The benchmark suite as pytest tests, one per case:
+
+    pytest benchmarks                      # not part of the default test run
+    BENCH_THRESHOLD=0.3 pytest benchmarks -k http
+
+Cases without a recorded baseline are skipped.
+"""
+import pytest
+
+from . import suite
+
+ROUNDS = 30
+
+
+@pytest.fixture(scope="module")
+def context():
+    return suite.Context(**suite.DATASET)
+
+
+@pytest.fixture(scope="module")
+def baselines():
+    recorded = suite.load_baselines()
+    if not recorded or recorded["dataset"] != suite.DATASET:
+        pytest.skip("no baselines for this dataset; record them with python -m benchmarks.suite --save")
+    speed = suite.calibrate() / recorded["calibration"]
+    return {name: seconds * speed for name, seconds in recorded["cases"].items()}
+
+
+@pytest.mark.parametrize("name", list(suite.CASES))
+def test_no_regression(name, context, baselines):
+    baseline = baselines.get(name)
+    if baseline is None:
+        pytest.skip(f"no baseline for {name}")
+    seconds = suite.measure_against(suite.CASES[name](context), ROUNDS, baseline, suite.DEFAULT_THRESHOLD)
+    assert not suite.regression(seconds, baseline, suite.DEFAULT_THRESHOLD), (
+        f"{name}: {seconds * 1000:.2f} ms vs baseline {baseline * 1000:.2f} ms"
+    )
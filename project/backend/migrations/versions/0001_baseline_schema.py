@@ -0,0 +1,121 @@
+"""Baseline schema
+
+The tables as the app's startup create_all built them before rollups,
+import jobs and migrations existed: the schema of databases deployed
+before then. `python -m app.bootstrap` stamps those at 0001 and upgrades
+them.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+        batch_op.create_index(batch_op.f('ix_users_id'), ['id'], unique=False)
+
+    op.create_table('categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('keywords', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_categories_id'), ['id'], unique=False)
+
+    op.create_table('months',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('savings_percent', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('months', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_months_id'), ['id'], unique=False)
+
+    op.create_table('daily_expenses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('month_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['month_id'], ['months.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('daily_expenses', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_daily_expenses_id'), ['id'], unique=False)
+
+    op.create_table('fixed_expenses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('month_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['month_id'], ['months.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('fixed_expenses', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_fixed_expenses_id'), ['id'], unique=False)
+
+    op.create_table('incomes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('month_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['month_id'], ['months.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('incomes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_incomes_id'), ['id'], unique=False)
+
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('incomes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_incomes_id'))
+
+    op.drop_table('incomes')
+    with op.batch_alter_table('fixed_expenses', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_fixed_expenses_id'))
+
+    op.drop_table('fixed_expenses')
+    with op.batch_alter_table('daily_expenses', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_daily_expenses_id'))
+
+    op.drop_table('daily_expenses')
+    with op.batch_alter_table('months', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_months_id'))
+
+    op.drop_table('months')
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_categories_id'))
+
+    op.drop_table('categories')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_id'))
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
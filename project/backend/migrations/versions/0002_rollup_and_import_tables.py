@@ -0,0 +1,85 @@
+"""Rollup and import job tables
+
+- month_totals, daily_totals, category_totals: per-month rollups kept by
+  app/rollups.py. Existing months have no rows here and are read from raw
+  rows until their first write or `python -m app.rollups rebuild`.
+- import_jobs: progress of bank statement imports (app/importer.py).
+
+Tables a development database already got from create_all are left alone.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def _create_table(name, *columns):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+        return True
+    return False
+
+
+def upgrade() -> None:
+    _create_table('month_totals',
+    sa.Column('month_id', sa.Integer(), nullable=False),
+    sa.Column('total_income', sa.Float(), nullable=False),
+    sa.Column('total_fixed', sa.Float(), nullable=False),
+    sa.Column('total_spent', sa.Float(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['month_id'], ['months.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('month_id')
+    )
+    _create_table('daily_totals',
+    sa.Column('month_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['month_id'], ['months.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('month_id', 'date')
+    )
+    _create_table('category_totals',
+    sa.Column('month_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['month_id'], ['months.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('month_id', 'category')
+    )
+    if _create_table('import_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('lines_committed', sa.Integer(), nullable=False),
+    sa.Column('rows_imported', sa.Integer(), nullable=False),
+    sa.Column('rows_skipped', sa.Integer(), nullable=False),
+    sa.Column('months_created', sa.Integer(), nullable=False),
+    sa.Column('elapsed_seconds', sa.Float(), nullable=False),
+    sa.Column('row_errors', sa.Text(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    ):
+        with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_import_jobs_id'), ['id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('import_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_import_jobs_id'))
+
+    op.drop_table('import_jobs')
+    op.drop_table('category_totals')
+    op.drop_table('daily_totals')
+    op.drop_table('month_totals')
@@ -0,0 +1,45 @@
+"""Indexes for the hot query paths
+
+- months (user_id, year, month): unique, so a user has one row per period;
+  serves the month list, its keyset cursor and the range/trend queries.
+  Replaces the non-unique ix_months_user_period some databases already have.
+- daily_expenses (month_id, date, id): the filtered, paginated expense list.
+- incomes.month_id, fixed_expenses.month_id: per-month lists and rollups.
+- categories.user_id, import_jobs.user_id: per-user lookups.
+
+Fails on databases that already hold duplicate months for a user; merge or
+delete those first.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_daily_expenses_month_date", "daily_expenses", ["month_id", "date", "id"]),
+    ("ix_incomes_month_id", "incomes", ["month_id"]),
+    ("ix_fixed_expenses_month_id", "fixed_expenses", ["month_id"]),
+    ("ix_categories_user_id", "categories", ["user_id"]),
+    ("ix_import_jobs_user_id", "import_jobs", ["user_id"]),
+]
+
+
+def upgrade() -> None:
+    op.drop_index("ix_months_user_period", table_name="months", if_exists=True)
+    # Databases built by create_all during development may have any of these
+    op.create_index("uq_months_user_period", "months", ["user_id", "year", "month"], unique=True, if_not_exists=True)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    op.drop_index("uq_months_user_period", table_name="months")
@@ -0,0 +1,30 @@
+"""Random token on month_totals for response cache keys
+
+The balance and analytics cache keys and ETags include the month's
+(token, version). A month deleted and recreated under the same id starts
+again at version 1, so without the token it could be served the old
+month's cached responses. Existing rows get an empty token; every row
+created from now on gets a random one.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('month_totals', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token', sa.String(length=16), nullable=False, server_default=''))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('month_totals', schema=None) as batch_op:
+        batch_op.drop_column('token')
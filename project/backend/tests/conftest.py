@@ -2,6 +2,8 @@
 Pytest configuration and fixtures for backend tests.
 """
 import os
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -16,6 +18,10 @@ from app.database import Base, get_db
 from app.main import app
 from app.models import User
 from app.auth.security import get_password_hash, create_access_token
+from app.cache import response_cache
+from app.category_cache import category_cache
+from app.auth.principal import principal_cache
+from app import query_profile
 
 
 # Create test database engine with in-memory SQLite
@@ -45,6 +51,9 @@ def db_session():
     """Create a fresh database session for each test."""
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    # Category and user ids repeat across tests too
+    category_cache.invalidate()
+    principal_cache.clear()
 
     db = TestingSessionLocal()
     try:
@@ -60,6 +69,8 @@ def client(db_session):
     """Create a test client with fresh database."""
     # Recreate tables for this test
     Base.metadata.create_all(bind=engine)
+    # Month ids and versions repeat across tests, so cached responses must not
+    response_cache.clear()
 
     with TestClient(app) as test_client:
         yield test_client
@@ -96,6 +107,20 @@ def authenticated_client(client, auth_cookies):
     return client
 
 
+def create_month(client, year=2024, month=5):
+    """Create a month through the API and return its id."""
+    return client.post("/api/months", json={"year": year, "month": month}).json()["id"]
+
+
+def add_expense(client, month_id, day, amount, category="Еда"):
+    """Add a daily expense through the API and return its id."""
+    response = client.post(
+        f"/api/months/{month_id}/daily-expenses",
+        json={"date": day, "description": "Purchase", "amount": amount, "category": category}
+    )
+    return response.json()["id"]
+
+
 @pytest.fixture
 def second_user(db_session) -> User:
     """Create a second test user for isolation tests."""
@@ -115,3 +140,28 @@ def second_auth_cookies(second_user) -> dict:
     """Create authentication cookies for second user."""
     token = create_access_token(data={"sub": str(second_user.id)})
     return {"access_token": token}
+
+
+@pytest.fixture
+def sql_profile():
+    """QueryProfile of the statements run on the test engine while the test runs."""
+    with query_profile.capture(engine) as profile:
+        yield profile
+
+
+@pytest.fixture
+def max_queries():
+    """Fail when a block runs more than `limit` statements on the test engine.
+
+        with max_queries(3):
+            client.get("/api/months")
+
+    The failure lists the statements by shape, with probable N+1s flagged.
+    """
+    @contextmanager
+    def limit(count: int):
+        with query_profile.capture(engine) as profile:
+            yield profile
+        assert profile.count <= count, f"expected at most {count} queries, got {profile.report()}"
+
+    return limit
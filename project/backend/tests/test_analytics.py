@@ -0,0 +1,87 @@
+"""
+Tests for multi-month trend analytics.
+"""
+import numpy as np
+import pytest
+from app.analytics import rolling_mean
+from tests.conftest import add_expense, create_month
+
+
+class TestRollingMean:
+    """Tests for the vectorized rolling average."""
+
+    def test_rolling_mean_partial_window(self):
+        """Test leading values average over what is available."""
+        result = rolling_mean(np.array([10.0, 20.0, 30.0, 40.0]), 3)
+        assert result.tolist() == [10.0, 15.0, 20.0, 30.0]
+
+    def test_rolling_mean_rows(self):
+        """Test each matrix row is averaged independently."""
+        result = rolling_mean(np.array([[1.0, 3.0], [10.0, 0.0]]), 2)
+        assert result.tolist() == [[1.0, 2.0], [10.0, 5.0]]
+
+
+class TestTrendAnalytics:
+    """Tests for the trend analytics endpoint."""
+
+    def test_trend_analytics_matrix(self, authenticated_client):
+        """Test category x month matrix, shares and rolling averages."""
+        january = create_month(authenticated_client, 2024, 1)
+        create_month(authenticated_client, 2024, 2)
+        march = create_month(authenticated_client, 2024, 3)
+        add_expense(authenticated_client, january, "2024-01-05", 100, "Еда")
+        add_expense(authenticated_client, january, "2024-01-06", 50, "Еда")
+        add_expense(authenticated_client, march, "2024-03-01", 150, "Транспорт")
+        add_expense(authenticated_client, march, "2024-03-02", 100, "Еда")
+
+        response = authenticated_client.get("/api/months/analytics?year=2024&window=2")
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["periods"] == ["2024-01", "2024-02", "2024-03"]
+        assert data["monthly_totals"] == [150, 0, 250]
+        assert data["rolling_average"] == [150, 75, 125]
+        assert data["total"] == 400
+
+        food, transport = data["categories"]
+        assert food["name"] == "Еда"
+        assert food["amounts"] == [150, 0, 100]
+        assert food["share"] == 62.5
+        assert transport["amounts"] == [0, 0, 150]
+        assert transport["share"] == 37.5
+
+    def test_trend_analytics_fills_missing_months(self, authenticated_client):
+        """Test a calendar month without a Month row is a zero column, not skipped."""
+        january = create_month(authenticated_client, 2024, 1)
+        march = create_month(authenticated_client, 2024, 3)
+        add_expense(authenticated_client, january, "2024-01-05", 90, "Еда")
+        add_expense(authenticated_client, march, "2024-03-05", 30, "Еда")
+
+        data = authenticated_client.get("/api/months/analytics?window=2").json()
+
+        assert data["periods"] == ["2024-01", "2024-02", "2024-03"]
+        assert data["monthly_totals"] == [90, 0, 30]
+        assert data["rolling_average"] == [90, 45, 15]
+        assert data["categories"][0]["amounts"] == [90, 0, 30]
+
+    def test_trend_analytics_filters_year(self, authenticated_client):
+        """Test year filter and all-time view."""
+        old = create_month(authenticated_client, 2023, 12)
+        new = create_month(authenticated_client, 2024, 1)
+        add_expense(authenticated_client, old, "2023-12-01", 10, "Еда")
+        add_expense(authenticated_client, new, "2024-01-01", 20, "Еда")
+
+        year = authenticated_client.get("/api/months/analytics?year=2024").json()
+        assert year["periods"] == ["2024-01"]
+        assert year["total"] == 20
+
+        all_time = authenticated_client.get("/api/months/analytics").json()
+        assert all_time["periods"] == ["2023-12", "2024-01"]
+        assert all_time["total"] == 30
+
+    def test_trend_analytics_empty(self, authenticated_client):
+        """Test analytics with no months."""
+        response = authenticated_client.get("/api/months/analytics")
+        assert response.status_code == 200
+        assert response.json()["categories"] == []
+        assert response.json()["total"] == 0
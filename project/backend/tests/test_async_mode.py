@@ -0,0 +1,188 @@
+"""
+Tests for the months, expenses and categories routers in sync and async mode.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import crud
+from app.auth.principal import principal_cache
+from app.auth.security import create_access_token, get_password_hash
+from app.cache import response_cache
+from app.category_cache import category_cache
+from app.database import Base, get_db, get_async_db
+from app.main import create_app
+from app.models import User
+
+
+@pytest.fixture(params=["sync", "async"])
+def mode_clients(request, tmp_path):
+    """Clients for two users of one app built in the requested mode.
+
+    Both modes need to see the same data, so this uses a SQLite file rather
+    than the shared in-memory database.
+    """
+    path = tmp_path / "leprecoin.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    # Each TestClient request runs on its own event loop, so async
+    # connections must not be pooled across requests
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    response_cache.clear()
+    category_cache.invalidate()
+    principal_cache.clear()
+
+    with Session() as db:
+        crud.create_default_categories(db)
+        users = [User(email=f"user{i}@example.com", hashed_password=get_password_hash("password")) for i in range(2)]
+        db.add_all(users)
+        db.commit()
+        tokens = [create_access_token(data={"sub": str(user.id)}) for user in users]
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app = create_app(async_mode=request.param == "async")
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    clients = []
+    for token in tokens:
+        client = TestClient(app)
+        client.cookies.set("access_token", token)
+        clients.append(client)
+    yield clients
+
+    category_cache.invalidate()
+    principal_cache.clear()
+    engine.dispose()
+
+
+class TestBothModes:
+    """The same API behaviour with sync and async sessions."""
+
+    def test_months(self, mode_clients):
+        """Test creating, listing, reading and updating months."""
+        client, _ = mode_clients
+        first = client.post("/api/months", json={"year": 2024, "month": 1}).json()
+        client.post("/api/months", json={"year": 2024, "month": 3})
+
+        months = client.get("/api/months").json()
+        assert [(m["year"], m["month"]) for m in months] == [(2024, 3), (2024, 1)]
+
+        response = client.put(f"/api/months/{first['id']}", json={"savings_percent": 20})
+        assert response.status_code == 200
+        assert response.json()["savings_percent"] == 20
+
+        client.post(f"/api/months/{first['id']}/incomes", json={"name": "Зарплата", "amount": 1000})
+        detail = client.get(f"/api/months/{first['id']}").json()
+        assert [income["amount"] for income in detail["incomes"]] == [1000]
+        assert detail["daily_expenses"] == []
+
+    def test_expenses_and_balance(self, mode_clients):
+        """Test expense CRUD keeps the balance and analytics in step."""
+        client, _ = mode_clients
+        month_id = client.post("/api/months", json={"year": 2024, "month": 2}).json()["id"]
+        income = client.post(f"/api/months/{month_id}/incomes", json={"name": "Зарплата", "amount": 2900}).json()
+        fixed = client.post(
+            f"/api/months/{month_id}/fixed-expenses", json={"name": "Аренда", "amount": 900}
+        ).json()
+        daily = client.post(
+            f"/api/months/{month_id}/daily-expenses",
+            json={"date": "2024-02-03", "description": "Молоко и хлеб", "amount": 150}
+        ).json()
+        assert daily["category"] == "Продукты"
+
+        balance = client.get(f"/api/months/{month_id}/balance")
+        assert balance.json()["actual_spent"] == 150
+        etag = balance.headers["etag"]
+        assert client.get(f"/api/months/{month_id}/balance", headers={"If-None-Match": etag}).status_code == 304
+
+        assert client.put(f"/api/incomes/{income['id']}", json={"amount": 3000}).json()["amount"] == 3000
+        assert client.put(f"/api/fixed-expenses/{fixed['id']}", json={"amount": 1000}).json()["amount"] == 1000
+        assert client.put(f"/api/daily-expenses/{daily['id']}", json={"amount": 200}).json()["amount"] == 200
+
+        balance = client.get(f"/api/months/{month_id}/balance").json()
+        assert balance["total_income"] == 3000
+        assert balance["total_fixed_expenses"] == 1000
+        assert balance["actual_spent"] == 200
+        analytics = client.get(f"/api/months/{month_id}/analytics").json()
+        assert analytics["categories"][0]["name"] == "Продукты"
+
+        assert client.delete(f"/api/daily-expenses/{daily['id']}").status_code == 200
+        assert client.delete(f"/api/fixed-expenses/{fixed['id']}").status_code == 200
+        assert client.delete(f"/api/incomes/{income['id']}").status_code == 200
+        balance = client.get(f"/api/months/{month_id}/balance").json()
+        assert (balance["total_income"], balance["total_fixed_expenses"], balance["actual_spent"]) == (0, 0, 0)
+
+    def test_bulk_range_and_trends(self, mode_clients):
+        """Test bulk creation, the month range and trend analytics."""
+        client, _ = mode_clients
+        month_id = client.post("/api/months", json={"year": 2024, "month": 4}).json()["id"]
+        response = client.post(f"/api/months/{month_id}/daily-expenses/bulk", json={"items": [
+            {"date": "2024-04-01", "description": "Такси", "amount": 300},
+            {"date": "2024-04-02", "description": "Кино", "amount": 500},
+            {"date": "bad", "description": "x", "amount": 1},
+        ]})
+        assert len(response.json()["created"]) == 2
+        assert response.json()["errors"][0]["index"] == 2
+
+        assert len(client.get(f"/api/months/{month_id}/daily-expenses").json()) == 2
+        assert client.get("/api/months/range?from=2024-01&to=2024-12").json()[0]["actual_spent"] == 800
+        assert client.get("/api/months/analytics?year=2024").json()["total"] == 800
+
+    def test_categories(self, mode_clients):
+        """Test listing categories and detecting one."""
+        client, _ = mode_clients
+        names = {category["name"] for category in client.get("/api/categories").json()}
+        assert "Продукты" in names
+        response = client.post("/api/detect-category", json={"description": "Пятерочка"})
+        assert response.json()["category"] == "Продукты"
+
+    def test_other_users_data_is_hidden(self, mode_clients):
+        """Test ownership checks return 404 for another user's rows."""
+        owner, other = mode_clients
+        month_id = owner.post("/api/months", json={"year": 2024, "month": 6}).json()["id"]
+        income_id = owner.post(f"/api/months/{month_id}/incomes", json={"name": "x", "amount": 1}).json()["id"]
+
+        assert other.get(f"/api/months/{month_id}").status_code == 404
+        assert other.get(f"/api/months/{month_id}/balance").status_code == 404
+        assert other.put(f"/api/incomes/{income_id}", json={"amount": 5}).status_code == 404
+        assert other.delete(f"/api/incomes/{income_id}").status_code == 404
+        assert other.get("/api/months").json() == []
+
+    def test_unauthenticated(self, mode_clients):
+        """Test requests without a token are rejected."""
+        client, _ = mode_clients
+        client.cookies.clear()
+        assert client.get("/api/months").status_code == 401
+
+    def test_pagination(self, mode_clients):
+        """Test keyset pages and filters on daily expenses."""
+        client, _ = mode_clients
+        month_id = client.post("/api/months", json={"year": 2024, "month": 7}).json()["id"]
+        client.post(f"/api/months/{month_id}/daily-expenses/bulk", json={"items": [
+            {"date": f"2024-07-{day:02d}", "description": f"e{day}", "amount": 1, "category": "Еда"}
+            for day in [5, 1, 3]
+        ]})
+
+        url = f"/api/months/{month_id}/daily-expenses?category=Еда&limit=2"
+        first = client.get(url)
+        assert [e["description"] for e in first.json()] == ["e1", "e3"]
+        second = client.get(f"{url}&after={first.headers['x-next-cursor']}")
+        assert [e["description"] for e in second.json()] == ["e5"]
+        assert "x-next-cursor" not in second.headers
@@ -1,8 +1,14 @@
 """
 Tests for authentication endpoints.
 """
+import asyncio
+import threading
+
 import pytest
 
+from app.auth.hashing import HashingPool, HashingPoolSaturated, hashing_pool
+from app.auth.principal import principal_cache
+
 
 class TestRegister:
     """Tests for user registration."""
@@ -130,3 +136,107 @@ class TestGetCurrentUser:
         client.cookies.set("access_token", "invalid-token")
         response = client.get("/api/auth/me")
         assert response.status_code == 401
+
+
+class TestPrincipalCache:
+    """Tests for the authenticated-principal cache."""
+
+    @staticmethod
+    def count_user_selects(profile):
+        return sum(1 for s, _ in profile.statements if s.lstrip().upper().startswith("SELECT") and "FROM users" in s)
+
+    def test_cached_principal_skips_user_query(self, authenticated_client, sql_profile):
+        """Test only the first request loads the user."""
+        for _ in range(3):
+            assert authenticated_client.get("/api/months").status_code == 200
+        assert self.count_user_selects(sql_profile) == 1
+        assert principal_cache.hits >= 2
+
+    def test_deactivation_invalidates(self, authenticated_client, db_session, test_user):
+        """Test a deactivated user is rejected while their token is cached."""
+        assert authenticated_client.get("/api/months").status_code == 200
+
+        test_user.is_active = False
+        db_session.commit()
+
+        response = authenticated_client.get("/api/months")
+        assert response.status_code == 401
+        assert "inactive" in response.json()["detail"]
+
+    def test_request_before_commit_does_not_keep_user_active(self, authenticated_client, db_session, test_user):
+        """Test a principal cached between the change and its commit is evicted by the commit."""
+        test_user.is_active = False
+        # Runs before the commit, so it still reads the user as active
+        assert authenticated_client.get("/api/months").status_code == 200
+
+        db_session.commit()
+
+        assert authenticated_client.get("/api/months").status_code == 401
+
+    def test_rolled_back_deactivation_keeps_cache(self, authenticated_client, db_session, test_user):
+        authenticated_client.get("/api/months")
+        test_user.is_active = False
+        db_session.rollback()
+        db_session.commit()
+
+        assert principal_cache.stats()["size"] == 1
+        assert authenticated_client.get("/api/months").status_code == 200
+
+    def test_me_loads_full_user(self, authenticated_client, test_user):
+        """Test /me still returns the full user after a cache hit."""
+        authenticated_client.get("/api/months")
+        response = authenticated_client.get("/api/auth/me")
+        assert response.status_code == 200
+        assert response.json()["email"] == test_user.email
+
+
+class TestHashingPool:
+    """Tests for the bounded password hashing pool."""
+
+    def test_saturated_pool_rejects(self):
+        """Test calls beyond workers + queue depth fail fast."""
+        pool = HashingPool(workers=1, queue_depth=1)
+        release = threading.Event()
+
+        async def burst():
+            first = asyncio.ensure_future(pool.run(release.wait))
+            second = asyncio.ensure_future(pool.run(release.wait))
+            await asyncio.sleep(0)
+            with pytest.raises(HashingPoolSaturated):
+                await pool.run(release.wait)
+            release.set()
+            return await asyncio.gather(first, second)
+
+        try:
+            assert asyncio.run(burst()) == [True, True]
+        finally:
+            pool.shutdown()
+        stats = pool.stats()
+        assert stats["rejected"] == 1
+        assert stats["count"] == 2
+        assert stats["in_flight"] == 0
+
+    def test_login_returns_503_when_saturated(self, client, test_user, monkeypatch):
+        """Test login is rejected with Retry-After instead of queueing."""
+        pool = HashingPool(workers=1, queue_depth=0)
+        pool.capacity = 0
+        monkeypatch.setattr("app.auth.router.hashing_pool", pool)
+
+        response = client.post(
+            "/api/auth/login",
+            json={"email": "test@example.com", "password": "testpassword123"}
+        )
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert pool.stats()["rejected"] == 1
+
+    def test_login_records_hash_timing(self, client, test_user):
+        """Test successful logins are timed by the pool."""
+        before = hashing_pool.count
+        response = client.post(
+            "/api/auth/login",
+            json={"email": "test@example.com", "password": "testpassword123"}
+        )
+        assert response.status_code == 200
+        assert hashing_pool.count == before + 1
+        assert client.get("/health/hashing").json()["seconds_max"] > 0
@@ -0,0 +1,167 @@
+"""
+Tests for the bootstrap command, lazy engines and the readiness probe.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import (
+    Boolean, Column, Date, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text, create_engine, func,
+)
+
+from app import bootstrap, database, models
+from app.database import Base, get_engine
+from app.main import app
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def pre_migration_metadata() -> MetaData:
+    """The models as deployed before rollups, import jobs and migrations, for create_all."""
+    metadata = MetaData()
+    Table(
+        "users", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("email", String(255), unique=True, nullable=False, index=True),
+        Column("hashed_password", String(255), nullable=False),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        Column("is_active", Boolean, default=True),
+    )
+    Table(
+        "months", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        Column("year", Integer, nullable=False),
+        Column("month", Integer, nullable=False),
+        Column("savings_percent", Float, default=0),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    )
+    for name in ("incomes", "fixed_expenses"):
+        Table(
+            name, metadata,
+            Column("id", Integer, primary_key=True, index=True),
+            Column("month_id", Integer, ForeignKey("months.id", ondelete="CASCADE"), nullable=False),
+            Column("name", String(255), nullable=False),
+            Column("amount", Float, nullable=False),
+        )
+    Table(
+        "daily_expenses", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("month_id", Integer, ForeignKey("months.id", ondelete="CASCADE"), nullable=False),
+        Column("date", Date, nullable=False),
+        Column("description", String(255), nullable=False),
+        Column("amount", Float, nullable=False),
+        Column("category", String(100), nullable=False, default="Прочее"),
+    )
+    Table(
+        "categories", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True),
+        Column("name", String(100), nullable=False),
+        Column("keywords", Text, nullable=False),
+    )
+    return metadata
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bootstrap.db'}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def ready_client(client, file_engine):
+    """The test client with /ready checking `file_engine`."""
+    app.dependency_overrides[get_engine] = lambda: file_engine
+    yield client
+    del app.dependency_overrides[get_engine]
+
+
+class TestLazyEngine:
+    def test_import_does_not_connect(self):
+        """Test the app imports while its database is unreachable."""
+        env = {**os.environ, "DATABASE_URL": "postgresql://nobody@127.0.0.1:9/none"}
+        code = "import app.main, app.database as d; assert d._engine is None; print('ok')"
+
+        result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "ok"
+
+    def test_module_attributes_resolve_to_the_shared_engine(self):
+        assert database.engine is get_engine()
+        assert database.SessionLocal.kw["bind"] is get_engine()
+
+
+class TestBootstrap:
+    def test_fresh_database(self, file_engine):
+        assert bootstrap.bootstrap(file_engine) is None
+
+        with file_engine.connect() as conn:
+            assert bootstrap.current_revision(conn) == bootstrap.head_revision()
+            assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+            defaults = conn.exec_driver_sql("SELECT COUNT(*) FROM categories WHERE user_id IS NULL").scalar()
+        assert defaults > 0
+
+    def test_is_idempotent(self, file_engine):
+        bootstrap.bootstrap(file_engine)
+        with file_engine.connect() as conn:
+            before = conn.exec_driver_sql("SELECT COUNT(*) FROM categories").scalar()
+
+        assert bootstrap.bootstrap(file_engine) == bootstrap.head_revision()
+        with file_engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT COUNT(*) FROM categories").scalar() == before
+
+    def test_current_create_all_database_is_stamped_at_head(self, file_engine):
+        models.Base.metadata.create_all(bind=file_engine)
+
+        bootstrap.migrate(file_engine)
+
+        with file_engine.connect() as conn:
+            assert bootstrap.current_revision(conn) == bootstrap.head_revision()
+
+    def test_pre_migration_database_is_upgraded(self, file_engine):
+        """Test a database the app's create_all built before migrations gets the later tables and keeps its rows."""
+        pre_migration_metadata().create_all(bind=file_engine)
+        with file_engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO users (id, email, hashed_password) VALUES (1, 'old@example.com', 'x')")
+            conn.exec_driver_sql("INSERT INTO months (id, user_id, year, month) VALUES (1, 1, 2024, 5)")
+
+        assert bootstrap.bootstrap(file_engine) is None
+
+        with file_engine.connect() as conn:
+            assert bootstrap.current_revision(conn) == bootstrap.head_revision()
+            assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+            assert conn.exec_driver_sql("SELECT year, month FROM months").all() == [(2024, 5)]
+
+
+class TestReadiness:
+    def test_not_ready_before_bootstrap(self, ready_client):
+        response = ready_client.get("/ready")
+
+        assert response.status_code == 503
+        assert response.json() == {"status": "unavailable", "schema": None, "expected": bootstrap.head_revision()}
+
+    def test_ready_after_bootstrap(self, ready_client, file_engine):
+        bootstrap.bootstrap(file_engine)
+
+        response = ready_client.get("/ready")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready", "schema": bootstrap.head_revision()}
+
+    def test_unreachable_database(self, client, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'dir.db'}")
+        app.dependency_overrides[get_engine] = lambda: engine
+        try:
+            response = client.get("/ready")
+        finally:
+            del app.dependency_overrides[get_engine]
+
+        assert response.status_code == 503
+        assert response.json()["database"] == "unreachable"
+        assert client.get("/health").status_code == 200
@@ -1,7 +1,11 @@
 """
 Tests for categories and category detection.
 """
+import random
 import pytest
+from app.category_detector import CategoryMatcher, detect_category, DEFAULT_CATEGORIES
+from app.category_cache import category_cache
+from app.models import Category
 
 
 class TestGetCategories:
@@ -25,7 +29,7 @@ class TestDetectCategory:
     """Tests for category detection."""
 
     def test_detect_category_food(self, authenticated_client):
-        """Test detecting food-related category."""
+        """Test detecting a cafe, which the default keywords file under entertainment."""
         response = authenticated_client.post(
             "/api/detect-category",
             json={"description": "Обед в кафе"}
@@ -33,11 +37,10 @@ class TestDetectCategory:
         assert response.status_code == 200
         data = response.json()
         assert "category" in data
-        # Should detect food category
-        assert data["category"] in ["Еда", "Рестораны", "Прочее"]
+        assert data["category"] == "Развлечения"
 
     def test_detect_category_transport(self, authenticated_client):
-        """Test detecting transport-related category."""
+        """Test detecting a taxi ride, which has its own category."""
         response = authenticated_client.post(
             "/api/detect-category",
             json={"description": "Такси до работы"}
@@ -45,7 +48,7 @@ class TestDetectCategory:
         assert response.status_code == 200
         data = response.json()
         assert "category" in data
-        assert data["category"] in ["Транспорт", "Прочее"]
+        assert data["category"] == "Такси"
 
     def test_detect_category_groceries(self, authenticated_client):
         """Test detecting grocery category."""
@@ -84,3 +87,116 @@ class TestDetectCategory:
             json={"description": "test"}
         )
         assert response.status_code == 401
+
+
+class TestCategoryMatcher:
+    """Tests for the compiled keyword matcher."""
+
+    @staticmethod
+    def naive(description, categories):
+        description = description.lower()
+        for category, keywords in categories.items():
+            if any(keyword in description for keyword in keywords):
+                return category
+        return "Прочее"
+
+    def test_category_order_wins_over_position(self):
+        """Test the earlier category wins even if its keyword comes later."""
+        matcher = CategoryMatcher({"Такси": ["такси"], "Еда": ["обед"]})
+        assert matcher.detect("Обед, потом такси") == "Такси"
+
+    def test_overlapping_keywords(self):
+        """Test keywords found through failure links."""
+        categories = {"A": ["hers"], "B": ["his"], "C": ["he"], "D": ["she"]}
+        matcher = CategoryMatcher(categories)
+        assert matcher.detect("ushers") == "A"
+        assert matcher.detect("usher") == "C"
+        assert matcher.detect("ashe") == "C"
+        assert matcher.detect("xyz") == "Прочее"
+
+    def test_empty_keyword_matches_everything(self):
+        """Test a blank keyword behaves like a substring check would."""
+        matcher = CategoryMatcher({"A": ["zzz"], "B": ["", "x"], "C": ["abc"]})
+        assert matcher.detect("abc") == "B"
+        assert matcher.detect("zzz") == "A"
+
+    def test_matches_nested_loop(self):
+        """Test random category sets against the nested keyword loop."""
+        rng = random.Random(7)
+        for _ in range(50):
+            categories = {
+                f"c{i}": ["".join(rng.choice("abcd") for _ in range(rng.randint(1, 4))) for _ in range(3)]
+                for i in range(rng.randint(1, 6))
+            }
+            matcher = CategoryMatcher(categories)
+            for _ in range(20):
+                description = "".join(rng.choice("abcdE ") for _ in range(rng.randint(0, 12)))
+                assert matcher.detect(description) == self.naive(description, categories)
+
+        for description in ["Яндекс Такси", "Пятерочка молоко", "Netflix", "корм для собак", ""]:
+            assert detect_category(description) == self.naive(description, DEFAULT_CATEGORIES)
+
+
+class TestCategoryCache:
+    """Tests for the per-user compiled category cache."""
+
+    def detect(self, client, description):
+        response = client.post("/api/detect-category", json={"description": description})
+        assert response.status_code == 200
+        return response.json()["category"]
+
+    def test_repeated_detection_hits_cache(self, authenticated_client):
+        """Test only the first detection loads categories."""
+        category_cache.invalidate()
+        hits, misses = category_cache.hits, category_cache.misses
+        for _ in range(3):
+            self.detect(authenticated_client, "Обед в кафе")
+        assert category_cache.misses - misses == 1
+        assert category_cache.hits - hits == 2
+
+    def test_profile_changes_invalidate(self, authenticated_client):
+        """Test create, update and delete of a category are seen immediately."""
+        assert self.detect(authenticated_client, "Абонемент в бассейн") == "Прочее"
+
+        response = authenticated_client.post(
+            "/api/profile/categories", json={"name": "Спорт", "keywords": "бассейн, зал"}
+        )
+        assert response.status_code == 200
+        category_id = response.json()["id"]
+        assert self.detect(authenticated_client, "Абонемент в бассейн") == "Спорт"
+
+        authenticated_client.put(f"/api/profile/categories/{category_id}", json={"keywords": "зал"})
+        assert self.detect(authenticated_client, "Абонемент в бассейн") == "Прочее"
+        assert self.detect(authenticated_client, "Тренажерный зал") == "Спорт"
+
+        authenticated_client.delete(f"/api/profile/categories/{category_id}")
+        assert self.detect(authenticated_client, "Тренажерный зал") == "Прочее"
+
+    def test_invalidation_during_load_is_not_overwritten(self, db_session, test_user, monkeypatch):
+        """Test a miss that loaded before an invalidation does not cache what it loaded."""
+        load = category_cache._load
+
+        def load_then_invalidate(db, user_id, generation):
+            matcher = load(db, user_id, generation)
+            category_cache.invalidate(user_id)
+            return matcher
+
+        monkeypatch.setattr(category_cache, "_load", load_then_invalidate)
+        category_cache.get_matcher(db_session, test_user.id)
+        monkeypatch.undo()
+
+        hits, misses = category_cache.hits, category_cache.misses
+        category_cache.get_matcher(db_session, test_user.id)
+        assert (category_cache.hits - hits, category_cache.misses - misses) == (0, 1)
+
+    def test_defaults_shared_between_users(self, db_session, test_user, second_user):
+        """Test users without custom categories share one compiled matcher."""
+        db_session.add(Category(name="Спорт", keywords="бассейн", user_id=second_user.id))
+        db_session.commit()
+
+        first = category_cache.get_matcher(db_session, test_user.id)
+        assert category_cache.get_matcher(db_session, None) is first
+        second = category_cache.get_matcher(db_session, second_user.id)
+        assert second is not first
+        assert second.detect("бассейн") == "Спорт"
+        assert first.detect("бассейн") == "Прочее"
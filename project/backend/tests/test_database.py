@@ -0,0 +1,106 @@
+"""
+Tests for the engine factory: pool settings, SQLite pragmas and pool stats.
+"""
+import threading
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, schemas
+from app.database import Base, create_db_engine, pool_stats
+from app.models import User
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'leprecoin.db'}", name="test-file")
+    yield engine
+    engine.dispose()
+
+
+class TestEngineFactory:
+    """Tests for create_db_engine."""
+
+    def test_sqlite_pragmas(self, file_engine):
+        """Test WAL and the other pragmas are set on each connection."""
+        with file_engine.connect() as conn:
+            pragma = lambda name: conn.execute(text(f"PRAGMA {name}")).scalar()
+            assert pragma("journal_mode") == "wal"
+            assert pragma("synchronous") == 1  # NORMAL
+            assert pragma("busy_timeout") == 5000
+            assert pragma("cache_size") == -64000
+            assert pragma("mmap_size") == 256 * 1024 * 1024
+
+    def test_pragma_and_pool_overrides(self, tmp_path):
+        """Test per-engine pragma and pool overrides."""
+        engine = create_db_engine(
+            f"sqlite:///{tmp_path / 'other.db'}", name="test-override",
+            pragmas={"busy_timeout": 100}, pool_size=2, max_overflow=0
+        )
+        try:
+            with engine.connect() as conn:
+                assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 100
+            assert engine.pool.size() == 2
+        finally:
+            engine.dispose()
+
+    def test_memory_database_skips_wal(self):
+        """Test in-memory SQLite keeps its journal and single connection."""
+        engine = create_db_engine("sqlite://", name="test-memory")
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "memory"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+    def test_pool_stats(self, tmp_path):
+        """Test checkouts, waits and timeouts are counted."""
+        engine = create_db_engine(
+            f"sqlite:///{tmp_path / 'stats.db'}", name="test-stats",
+            pool_size=1, max_overflow=0, pool_timeout=0.1
+        )
+        try:
+            with engine.connect():
+                with pytest.raises(exc.TimeoutError):
+                    engine.connect()
+            with engine.connect():
+                pass
+
+            stats = pool_stats()["test-stats"]
+            assert stats["checkouts"] == 2
+            assert stats["checkins"] == 2
+            assert stats["timeouts"] == 1
+            assert stats["wait_seconds_max"] >= 0.1
+            assert stats["size"] == 1
+            assert stats["checked_out"] == 0
+        finally:
+            engine.dispose()
+
+    def test_concurrent_writers(self, file_engine):
+        """Test parallel writers queue on busy_timeout instead of failing."""
+        Base.metadata.create_all(bind=file_engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=file_engine)
+        with Session() as db:
+            user = User(email="writer@example.com", hashed_password="x")
+            db.add(user)
+            db.commit()
+            month_id = crud.create_month(db, schemas.MonthCreate(year=2024, month=1), user.id).id
+
+        errors = []
+
+        def write(n):
+            try:
+                with Session() as db:
+                    for i in range(10):
+                        crud.create_income(db, month_id, schemas.IncomeCreate(name=f"{n}-{i}", amount=1))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        with Session() as db:
+            assert crud.calculate_balance(db, month_id)["total_income"] == 80
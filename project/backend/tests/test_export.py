@@ -0,0 +1,82 @@
+"""
+Tests for streaming expense export.
+"""
+import csv
+import io
+import json
+import pytest
+
+
+def seed_expenses(client):
+    month_id = client.post("/api/months", json={"year": 2024, "month": 5}).json()["id"]
+    ids = []
+    for day, description, amount in [
+        ("2024-05-01", "Молоко", 80),
+        ("2024-05-10", "Такси, ночь", 450),
+        ("2024-05-20", "Кино", 600),
+    ]:
+        response = client.post(
+            f"/api/months/{month_id}/daily-expenses",
+            json={"date": day, "description": description, "amount": amount}
+        )
+        ids.append(response.json()["id"])
+    return month_id, ids
+
+
+class TestExport:
+    """Tests for GET /api/export."""
+
+    def test_export_csv(self, authenticated_client):
+        """Test CSV export contains a header and all expenses."""
+        month_id, ids = seed_expenses(authenticated_client)
+
+        response = authenticated_client.get("/api/export?format=csv")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [int(row["id"]) for row in rows] == ids
+        assert rows[1]["description"] == "Такси, ночь"
+        assert rows[1]["date"] == "2024-05-10"
+        assert rows[1]["month_id"] == str(month_id)
+        assert float(rows[1]["amount"]) == 450
+
+    def test_export_ndjson(self, authenticated_client):
+        """Test NDJSON export has one JSON object per line."""
+        _, ids = seed_expenses(authenticated_client)
+
+        response = authenticated_client.get("/api/export?format=ndjson")
+        assert response.status_code == 200
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [record["id"] for record in records] == ids
+        assert records[0]["year"] == 2024
+        assert records[0]["category"] == "Продукты"
+
+    def test_export_resume(self, authenticated_client):
+        """Test resuming after an id and filtering by date."""
+        _, ids = seed_expenses(authenticated_client)
+
+        resumed = authenticated_client.get(f"/api/export?format=ndjson&after_id={ids[0]}")
+        assert [json.loads(line)["id"] for line in resumed.text.splitlines()] == ids[1:]
+
+        since = authenticated_client.get("/api/export?format=ndjson&since=2024-05-15")
+        assert [json.loads(line)["id"] for line in since.text.splitlines()] == ids[2:]
+
+    def test_export_isolated_per_user(self, authenticated_client, second_auth_cookies):
+        """Test export only includes the current user's expenses."""
+        seed_expenses(authenticated_client)
+        authenticated_client.cookies.set("access_token", second_auth_cookies["access_token"])
+
+        response = authenticated_client.get("/api/export?format=ndjson")
+        assert response.status_code == 200
+        assert response.text == ""
+
+    def test_export_invalid_format(self, authenticated_client):
+        """Test unknown formats are rejected."""
+        response = authenticated_client.get("/api/export?format=xml")
+        assert response.status_code == 422
+
+    def test_export_unauthenticated(self, client):
+        """Test export requires authentication."""
+        response = client.get("/api/export")
+        assert response.status_code == 401
@@ -0,0 +1,129 @@
+"""
+Tests for bank statement import.
+"""
+import json
+import pytest
+from app import models
+
+
+STATEMENT = (
+    "Дата;Описание;Сумма\n"
+    "01.05.2024;Пятерочка;-1 250,50\n"
+    "02.05.2024;Зарплата;100 000,00\n"
+    "15.05.2024;Яндекс Такси;-450,00\n"
+    "bad-date;Кино;-600,00\n"
+    "03.06.2024;Кино;-600,00\n"
+)
+
+MAPPING = {
+    "date_column": "Дата",
+    "description_column": "Описание",
+    "amount_column": "Сумма",
+    "date_format": "%d.%m.%Y",
+    "delimiter": ";",
+    "decimal_comma": True,
+    "expenses_negative": True,
+}
+
+
+def upload(client, content=STATEMENT, mapping=MAPPING, **form):
+    data = {"mapping": json.dumps(mapping), **{k: str(v) for k, v in form.items()}}
+    return client.post(
+        "/api/import/statements",
+        files={"file": ("statement.csv", content.encode("utf-8"), "text/csv")},
+        data=data
+    )
+
+
+class TestStatementImport:
+    """Tests for POST /api/import/statements."""
+
+    def test_import_creates_months_and_expenses(self, authenticated_client):
+        """Test statement rows become categorized expenses in new months."""
+        response = upload(authenticated_client, chunk_size=2)
+        assert response.status_code == 200
+        report = response.json()
+        assert report["status"] == "completed"
+        assert report["lines_committed"] == 5
+        assert report["rows_imported"] == 3
+        assert report["rows_skipped"] == 2
+        assert report["months_created"] == 2
+        assert [error["line"] for error in report["row_errors"]] == [4]
+
+        months = authenticated_client.get("/api/months").json()
+        assert [(m["year"], m["month"]) for m in months] == [(2024, 6), (2024, 5)]
+
+        may = next(m for m in months if m["month"] == 5)
+        expenses = authenticated_client.get(f"/api/months/{may['id']}/daily-expenses").json()
+        assert [(e["amount"], e["category"]) for e in expenses] == [(1250.5, "Продукты"), (450, "Такси")]
+
+    def test_import_uses_existing_month(self, authenticated_client):
+        """Test rows go into a month that already exists."""
+        authenticated_client.post("/api/months", json={"year": 2024, "month": 5, "savings_percent": 20})
+
+        report = upload(authenticated_client).json()
+        assert report["months_created"] == 1
+        months = authenticated_client.get("/api/months").json()
+        assert next(m for m in months if m["month"] == 5)["savings_percent"] == 20
+
+    def test_import_resume(self, authenticated_client, db_session, test_user):
+        """Test a failed job resumes after its last committed line."""
+        job = models.ImportJob(
+            user_id=test_user.id, filename="statement.csv", status="failed", lines_committed=3,
+            rows_imported=1, rows_skipped=1, row_errors="[]", error="connection lost"
+        )
+        db_session.add(job)
+        db_session.commit()
+
+        report = upload(authenticated_client, resume_job_id=job.id).json()
+        assert report["id"] == job.id
+        assert report["status"] == "completed"
+        assert report["rows_imported"] == 2
+        assert report["lines_committed"] == 5
+        assert report["error"] is None
+
+        status = authenticated_client.get(f"/api/import/jobs/{job.id}").json()
+        assert status["rows_imported"] == 2
+
+    def test_failed_chunk_leaves_no_months(self, authenticated_client, db_session, monkeypatch):
+        """Test a chunk that fails rolls back the months it created along with its expenses."""
+        from app import crud
+
+        insert = crud.insert_daily_expenses
+
+        def fail_for_june(db, month_id, expenses, matcher):
+            if expenses[0].date.month == 6:
+                raise RuntimeError("connection lost")
+            return insert(db, month_id, expenses, matcher)
+
+        monkeypatch.setattr(crud, "insert_daily_expenses", fail_for_june)
+        report = upload(authenticated_client, chunk_size=2).json()
+
+        assert report["status"] == "failed"
+        assert report["error"] == "connection lost"
+        assert report["months_created"] == 1
+        months = authenticated_client.get("/api/months").json()
+        assert [(m["year"], m["month"]) for m in months] == [(2024, 5)]
+
+    def test_short_footer_row_is_a_row_error(self, authenticated_client):
+        """Test a short "Total" footer is reported as a row error instead of failing the import."""
+        report = upload(authenticated_client, content=STATEMENT + "Итого;-2 300,50\n").json()
+
+        assert report["status"] == "completed"
+        assert report["error"] is None
+        assert report["rows_imported"] == 3
+        assert report["row_errors"][-1] == {"line": 6, "error": "missing column 'Сумма'"}
+
+    def test_import_missing_column(self, authenticated_client):
+        """Test a header that does not match the mapping is rejected."""
+        response = upload(authenticated_client, content="date,text,sum\n2024-05-01,x,1\n", mapping={})
+        assert response.status_code == 400
+        assert "description" in response.json()["detail"]
+
+    def test_import_job_isolated_per_user(self, authenticated_client, second_auth_cookies):
+        """Test users cannot see each other's import jobs."""
+        job_id = upload(authenticated_client).json()["id"]
+        authenticated_client.cookies.set("access_token", second_auth_cookies["access_token"])
+
+        assert authenticated_client.get(f"/api/import/jobs/{job_id}").status_code == 404
+        assert authenticated_client.get("/api/import/jobs").json() == []
@@ -0,0 +1,157 @@
+"""
+Tests for the hot-path indexes: query plans on SQLite (and Postgres when
+TEST_POSTGRES_URL is set), the unique month period, and the Alembic
+migrations matching the models.
+"""
+import os
+from datetime import date
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, insert, or_, select, text
+from sqlalchemy.exc import IntegrityError
+
+from app import crud, models, schemas
+from app.database import Base
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+def hot_queries():
+    """(expected index, statement) for each hot query path."""
+    return [
+        ("uq_months_user_period", crud.months_statement(1)),
+        ("uq_months_user_period", crud.months_statement(1, after=(2024, 6))),
+        ("ix_daily_expenses_month_date", crud.daily_expenses_statement(1)),
+        ("ix_daily_expenses_month_date", crud.daily_expenses_statement(
+            1, date_from=date(2024, 5, 1), date_to=date(2024, 5, 31), after=(date(2024, 5, 10), 7)
+        )),
+        ("ix_incomes_month_id", select(models.Income).where(models.Income.month_id == 1)),
+        ("ix_fixed_expenses_month_id", select(models.FixedExpense).where(models.FixedExpense.month_id == 1)),
+        ("ix_categories_user_id", select(models.Category).where(
+            or_(models.Category.user_id == 1, models.Category.user_id == None)
+        )),
+        ("ix_import_jobs_user_id", select(models.ImportJob).where(models.ImportJob.user_id == 1)),
+    ]
+
+
+def query_plan(conn, explain: str, statement) -> str:
+    sql = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    return "\n".join(str(row[-1]) for row in conn.exec_driver_sql(f"{explain} {sql}"))
+
+
+def alembic_config(connection) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.attributes["connection"] = connection
+    config.attributes["configure_logger"] = False
+    return config
+
+
+class TestQueryPlans:
+    """Tests that the hot queries search an index instead of scanning."""
+
+    @pytest.mark.parametrize("index, statement", hot_queries())
+    def test_sqlite_plan(self, db_session, index, statement):
+        """Test SQLite plans the query with the expected index."""
+        plan = query_plan(db_session.connection(), "EXPLAIN QUERY PLAN", statement)
+        assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan, plan
+
+    @pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+    @pytest.mark.parametrize("index, statement", hot_queries())
+    def test_postgres_plan(self, index, statement):
+        """Test Postgres can plan the query with the expected index.
+
+        Sequential scans are disabled since the test tables are tiny and the
+        planner would otherwise prefer them.
+        """
+        engine = create_engine(TEST_POSTGRES_URL)
+        try:
+            with engine.connect() as conn:
+                Base.metadata.create_all(bind=conn)
+                conn.execute(text("SET enable_seqscan = off"))
+                plan = query_plan(conn, "EXPLAIN", statement)
+                conn.rollback()
+        finally:
+            engine.dispose()
+        assert index in plan, plan
+
+
+class TestUniqueMonthPeriod:
+    """Tests for the unique (user_id, year, month) index."""
+
+    def test_duplicate_period_rejected(self, db_session, test_user):
+        """Test the database refuses a second month for the same period."""
+        row = {"user_id": test_user.id, "year": 2024, "month": 5}
+        db_session.execute(insert(models.Month), [row])
+        with pytest.raises(IntegrityError):
+            db_session.execute(insert(models.Month), [row])
+        db_session.rollback()
+
+    def test_create_month_returns_existing(self, db_session, test_user, monkeypatch):
+        """Test create_month returns the existing month when it loses an insert race."""
+        db_session.execute(insert(models.Month), [{"user_id": test_user.id, "year": 2024, "month": 5}])
+        db_session.commit()
+        existing = db_session.scalars(select(models.Month)).one()
+
+        # The first lookup misses, as if the other request had not committed yet
+        lookup = crud.get_month_by_date
+        misses = iter([None])
+        monkeypatch.setattr(crud, "get_month_by_date", lambda *args: next(misses, None) or lookup(*args))
+
+        month = crud.create_month(db_session, schemas.MonthCreate(year=2024, month=5), test_user.id)
+        assert month.id == existing.id
+
+
+class TestMigrations:
+    """Tests for the Alembic migrations."""
+
+    def test_upgrade_matches_models(self, tmp_path):
+        """Test upgrading to head builds exactly the schema the models define."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+        try:
+            with engine.begin() as conn:
+                command.upgrade(alembic_config(conn), "head")
+            with engine.connect() as conn:
+                diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+            assert diff == []
+        finally:
+            engine.dispose()
+
+    def test_downgrade_to_baseline(self, tmp_path):
+        """Test the later revisions downgrade cleanly to the baseline."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+        try:
+            with engine.begin() as conn:
+                config = alembic_config(conn)
+                command.upgrade(config, "head")
+                command.downgrade(config, "0001")
+                indexes = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+                tables = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            assert "uq_months_user_period" not in indexes
+            assert "ix_incomes_month_id" not in indexes
+            assert not tables & {"month_totals", "daily_totals", "category_totals", "import_jobs"}
+        finally:
+            engine.dispose()
+
+    def test_stamped_create_all_database(self, tmp_path):
+        """Test a database built by create_all before migrations upgrades after stamping."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        try:
+            with engine.begin() as conn:
+                config = alembic_config(conn)
+                command.upgrade(config, "0001")
+                # Indexes create_all added before migrations existed
+                conn.exec_driver_sql("CREATE INDEX ix_months_user_period ON months (user_id, year, month)")
+                conn.exec_driver_sql(
+                    "CREATE INDEX ix_daily_expenses_month_date ON daily_expenses (month_id, date, id)"
+                )
+                command.upgrade(config, "head")
+            with engine.connect() as conn:
+                assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+        finally:
+            engine.dispose()
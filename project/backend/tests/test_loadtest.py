@@ -0,0 +1,73 @@
+"""
+Tests for the load-test harness (benchmarks/loadtest.py), driven in-process.
+"""
+import argparse
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app import bootstrap, seed
+from app.database import create_db_engine, get_db
+from app.main import create_app
+from benchmarks import loadtest
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    """An app on its own bootstrapped SQLite file, seeded with three load-test users.
+
+    The shared test engine is a single StaticPool connection, which cannot
+    serve concurrent requests.
+    """
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'loadtest.db'}")
+    bootstrap.bootstrap(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as db:
+        seed.generate(db, users=3, months=1, expenses=20, prefix=loadtest.PREFIX, password=loadtest.PASSWORD)
+
+    def file_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = create_app(async_mode=False)
+    app.dependency_overrides[get_db] = file_db
+    yield app
+    engine.dispose()
+
+
+class TestHelpers:
+    def test_percentile_nearest_rank(self):
+        ordered = [float(n) for n in range(1, 101)]
+
+        assert loadtest.percentile(ordered, 50) == 50
+        assert loadtest.percentile(ordered, 99) == 99
+        assert loadtest.percentile([7.0], 95) == 7
+        assert loadtest.percentile([], 50) is None
+
+    def test_parse_mix(self):
+        assert loadtest.parse_mix("balance=3,login") == {"balance": 3.0, "login": 1.0}
+        with pytest.raises(argparse.ArgumentTypeError):
+            loadtest.parse_mix("balance=1,transfer=2")
+        with pytest.raises(argparse.ArgumentTypeError):
+            loadtest.parse_mix("balance=0")
+
+
+class TestRun:
+    def test_reports_every_route_in_the_mix(self, file_app):
+        mix = {action: 1 for action in loadtest.ACTIONS}
+
+        report = asyncio.run(loadtest.run(
+            "http://loadtest", users=3, concurrency=6, duration=1.5, mix=mix,
+            transport=httpx.ASGITransport(app=file_app),
+        ))
+
+        assert report["total"]["errors"] == 0
+        assert report["total"]["requests"] == sum(r["requests"] for r in report["routes"].values())
+        assert "POST /api/auth/login" in report["routes"]
+        for summary in report["routes"].values():
+            assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"] <= summary["max_ms"]
@@ -0,0 +1,121 @@
+"""
+Tests for the /metrics endpoint and request/query instrumentation.
+"""
+import pytest
+from sqlalchemy import text
+
+from app import metrics
+from app.auth.hashing import hashing_pool
+from tests.conftest import create_month, engine
+
+
+@pytest.fixture
+def instrumented():
+    """Report the test engine's statements like the app's engines do."""
+    metrics.instrument_engine(engine, "test")
+
+
+class TestRequestMetrics:
+    def test_routes_are_labelled_by_template(self, authenticated_client):
+        labels = ("GET", "/api/months/{month_id}", "200")
+        before = metrics.http_requests.value(labels)
+        first, second = create_month(authenticated_client, month=5), create_month(authenticated_client, month=6)
+
+        authenticated_client.get(f"/api/months/{first}")
+        authenticated_client.get(f"/api/months/{second}")
+
+        assert metrics.http_requests.value(labels) == before + 2
+        assert f"/api/months/{first}" not in metrics.registry.render()
+
+    def test_status_and_unmatched_paths(self, client):
+        not_found = ("GET", "unmatched", "404")
+        unauthorized = ("GET", "/api/months", "401")
+        before = metrics.http_requests.value(not_found), metrics.http_requests.value(unauthorized)
+
+        client.get("/api/no-such-route")
+        client.get("/api/months")
+
+        assert metrics.http_requests.value(not_found) == before[0] + 1
+        assert metrics.http_requests.value(unauthorized) == before[1] + 1
+
+    def test_latency_recorded_and_in_flight_released(self, client):
+        labels = ("GET", "/health")
+        before = metrics.http_latency.count(labels)
+
+        client.get("/health")
+
+        assert metrics.http_latency.count(labels) == before + 1
+        assert metrics.http_in_flight.value(labels) == 0
+
+
+class TestQueryMetrics:
+    def test_request_query_count_matches_statements(self, authenticated_client, instrumented, sql_profile):
+        month_id = create_month(authenticated_client)
+        labels = ("GET", "/api/months/{month_id}")
+        count_before, seconds_before = metrics.http_queries.sum(labels), metrics.http_db_time.sum(labels)
+        sql_profile.clear()
+
+        authenticated_client.get(f"/api/months/{month_id}")
+
+        assert metrics.http_queries.sum(labels) - count_before == sql_profile.count > 0
+        assert metrics.http_db_time.sum(labels) > seconds_before
+
+    def test_queries_outside_requests_count_for_the_engine_only(self, db_session, instrumented):
+        before = metrics.db_queries.value(("test",))
+
+        db_session.execute(text("SELECT 1"))
+
+        assert metrics.db_queries.value(("test",)) == before + 1
+        assert metrics.current_request.get() is None
+
+
+class TestExposition:
+    def test_endpoint_serves_text_format(self, client):
+        client.get("/health")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+        assert "# TYPE cache_hits_total counter" in body
+        assert 'cache_hits_total{cache="responses"}' in body
+
+    def test_worker_label_on_every_series(self, client, monkeypatch):
+        monkeypatch.setattr(metrics, "_constant_pairs", [])
+        metrics.set_worker(2)
+
+        body = client.get("/metrics").text
+
+        samples = [line for line in body.splitlines() if line and not line.startswith("#")]
+        assert samples and all('{worker="2"' in line for line in samples)
+
+    def test_hashing_pool_is_exported(self, client):
+        client.post("/api/auth/register", json={"email": "metrics@example.com", "password": "password123"})
+
+        body = client.get("/metrics").text
+
+        assert "# TYPE password_hashing_rejected_total counter" in body
+        assert f"password_hashing_capacity {hashing_pool.capacity}" in body
+        assert "password_hashing_total 0\n" not in body
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram("test_seconds", "Test.", ["route"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, ("/x",))
+
+        lines = histogram.render()
+
+        assert 'test_seconds_bucket{route="/x",le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{route="/x",le="1"} 3' in lines
+        assert 'test_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+        assert 'test_seconds_count{route="/x"} 4' in lines
+        assert 'test_seconds_sum{route="/x"} 4.05' in lines
+
+    def test_label_values_are_escaped(self):
+        counter = metrics.Counter("test_total", "Test.", ["path"])
+        counter.inc(('a"b\\c',))
+
+        assert 'test_total{path="a\\"b\\\\c"} 1' in counter.render()
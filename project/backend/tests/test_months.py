@@ -302,6 +302,49 @@ class TestMonthBalance:
         assert "daily_budget" in data
         assert "balance" in data
 
+    def test_get_balance_daily_series(self, authenticated_client):
+        """Test per-day totals and cumulative spending in balance."""
+        create_response = authenticated_client.post(
+            "/api/months",
+            json={"year": 2024, "month": 2}
+        )
+        month_id = create_response.json()["id"]
+
+        authenticated_client.post(
+            f"/api/months/{month_id}/incomes",
+            json={"name": "Salary", "amount": 2900}
+        )
+        for day, amount in [("2024-02-01", 40), ("2024-02-01", 60), ("2024-02-03", 25)]:
+            authenticated_client.post(
+                f"/api/months/{month_id}/daily-expenses",
+                json={"date": day, "description": "Groceries", "amount": amount}
+            )
+
+        response = authenticated_client.get(f"/api/months/{month_id}/balance")
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["days_in_month"] == 29
+        assert data["daily_budget"] == 100
+        assert data["actual_spent"] == 125
+        assert len(data["daily_balances"]) == 29
+
+        first, second, third = data["daily_balances"][:3]
+        assert first["date"] == "2024-02-01"
+        assert first["spent"] == 100
+        assert first["balance"] == 0
+        assert second["spent"] == 0
+        assert second["cumulative_spent"] == 100
+        assert third["spent"] == 25
+        assert third["cumulative_spent"] == 125
+        assert third["balance"] == 175
+        assert data["daily_balances"][-1]["cumulative_spent"] == 125
+
+    def test_get_balance_not_found(self, authenticated_client):
+        """Test getting balance for non-existent month."""
+        response = authenticated_client.get("/api/months/9999/balance")
+        assert response.status_code == 404
+
 
 class TestMonthAnalytics:
     """Tests for month analytics."""
@@ -343,3 +386,425 @@ class TestMonthAnalytics:
         assert "categories" in data
         assert "total" in data
         assert data["total"] == 150
+
+
+class TestMonthRange:
+    """Tests for the multi-month range summary."""
+
+    def _create_month(self, client, year, month, income=0, spent=0):
+        month_id = client.post(
+            "/api/months", json={"year": year, "month": month, "savings_percent": 10}
+        ).json()["id"]
+        if income:
+            client.post(f"/api/months/{month_id}/incomes", json={"name": "Salary", "amount": income})
+        if spent:
+            client.post(
+                f"/api/months/{month_id}/daily-expenses",
+                json={"date": f"{year}-{month:02d}-01", "description": "Groceries", "amount": spent}
+            )
+        return month_id
+
+    def test_get_range(self, authenticated_client):
+        """Test range returns per-month totals in chronological order."""
+        self._create_month(authenticated_client, 2023, 12, income=1000, spent=100)
+        self._create_month(authenticated_client, 2024, 1, income=2000, spent=300)
+        self._create_month(authenticated_client, 2024, 2, income=3000)
+        self._create_month(authenticated_client, 2024, 3, income=4000)
+
+        response = authenticated_client.get("/api/months/range?from=2023-12&to=2024-02")
+        assert response.status_code == 200
+        data = response.json()
+        assert [(m["year"], m["month"]) for m in data] == [(2023, 12), (2024, 1), (2024, 2)]
+
+        january = data[1]
+        assert january["total_income"] == 2000
+        assert january["savings_amount"] == 200
+        assert january["actual_spent"] == 300
+        assert january["end_balance"] == 1500
+        assert january["balance"] == 1500
+
+    def test_get_range_matches_balance(self, authenticated_client):
+        """Test range values agree with the per-month balance endpoint."""
+        month_id = self._create_month(authenticated_client, 2024, 5, income=5000, spent=250)
+
+        balance = authenticated_client.get(f"/api/months/{month_id}/balance").json()
+        trend = authenticated_client.get("/api/months/range").json()[0]
+        for key in ("total_income", "total_fixed_expenses", "savings_amount", "actual_spent", "balance"):
+            assert trend[key] == balance[key]
+
+    def test_get_range_isolated_per_user(self, authenticated_client, second_auth_cookies):
+        """Test range only includes the current user's months."""
+        self._create_month(authenticated_client, 2024, 1, income=1000)
+        authenticated_client.cookies.set("access_token", second_auth_cookies["access_token"])
+
+        response = authenticated_client.get("/api/months/range")
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_get_range_invalid_period(self, authenticated_client):
+        """Test malformed and inverted periods are rejected."""
+        assert authenticated_client.get("/api/months/range?from=2024-13").status_code == 422
+        assert authenticated_client.get("/api/months/range?from=2024-03&to=2024-01").status_code == 400
+
+
+class TestResponseCache:
+    """Tests for versioned caching of balance and analytics."""
+
+    def _create_month(self, client):
+        return client.post("/api/months", json={"year": 2024, "month": 5}).json()["id"]
+
+    def test_balance_etag_not_modified(self, authenticated_client):
+        """Test If-None-Match with the current ETag returns 304."""
+        month_id = self._create_month(authenticated_client)
+
+        response = authenticated_client.get(f"/api/months/{month_id}/balance")
+        etag = response.headers["ETag"]
+
+        cached = authenticated_client.get(
+            f"/api/months/{month_id}/balance", headers={"If-None-Match": etag}
+        )
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == etag
+
+    def test_writes_change_etag(self, authenticated_client):
+        """Test expense and savings changes produce fresh responses."""
+        month_id = self._create_month(authenticated_client)
+        first = authenticated_client.get(f"/api/months/{month_id}/analytics")
+
+        authenticated_client.post(
+            f"/api/months/{month_id}/daily-expenses",
+            json={"date": "2024-05-01", "description": "Bus", "amount": 30, "category": "Транспорт"}
+        )
+        second = authenticated_client.get(
+            f"/api/months/{month_id}/analytics", headers={"If-None-Match": first.headers["ETag"]}
+        )
+        assert second.status_code == 200
+        assert second.json()["total"] == 30
+
+        balance = authenticated_client.get(f"/api/months/{month_id}/balance")
+        authenticated_client.put(f"/api/months/{month_id}", json={"savings_percent": 50})
+        updated = authenticated_client.get(f"/api/months/{month_id}/balance")
+        assert updated.headers["ETag"] != balance.headers["ETag"]
+
+    def test_recreated_month_with_reused_id(self, authenticated_client, db_session):
+        """Test a month recreated under a deleted month's id gets fresh responses."""
+        from app import models
+
+        client = authenticated_client
+        month_id = self._create_month(client)
+        client.post(
+            f"/api/months/{month_id}/daily-expenses",
+            json={"date": "2024-05-01", "description": "Bus", "amount": 30, "category": "Транспорт"}
+        )
+        old = client.get(f"/api/months/{month_id}/analytics")
+        db_session.delete(db_session.get(models.Month, month_id))
+        db_session.commit()
+
+        assert self._create_month(client) == month_id
+        client.post(
+            f"/api/months/{month_id}/daily-expenses",
+            json={"date": "2024-05-01", "description": "Bus", "amount": 10, "category": "Транспорт"}
+        )
+        new = client.get(f"/api/months/{month_id}/analytics", headers={"If-None-Match": old.headers["ETag"]})
+        assert new.status_code == 200
+        assert new.headers["ETag"] != old.headers["ETag"]
+        assert new.json()["total"] == 10
+
+    def test_repeat_reads_hit_cache(self, authenticated_client):
+        """Test unchanged months are served from the cache."""
+        from app.cache import response_cache
+
+        month_id = self._create_month(authenticated_client)
+        authenticated_client.get(f"/api/months/{month_id}/balance")
+        hits = response_cache.hits
+        response = authenticated_client.get(f"/api/months/{month_id}/balance")
+        assert response.status_code == 200
+        assert response_cache.hits == hits + 1
+
+
+class TestBulkDailyExpenses:
+    """Tests for bulk daily expense creation."""
+
+    def test_bulk_create(self, authenticated_client):
+        """Test creating many expenses with category detection."""
+        month_id = authenticated_client.post(
+            "/api/months", json={"year": 2024, "month": 5}
+        ).json()["id"]
+
+        items = [
+            {"date": "2024-05-01", "description": "Такси домой", "amount": 300},
+            {"date": "2024-05-01", "description": "Продукты", "amount": 1200, "category": "Еда"},
+            {"date": "2024-05-02", "description": "Что-то", "amount": 50},
+        ]
+        response = authenticated_client.post(
+            f"/api/months/{month_id}/daily-expenses/bulk", json={"items": items}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["errors"] == []
+        assert [e["description"] for e in data["created"]] == ["Такси домой", "Продукты", "Что-то"]
+        assert [e["category"] for e in data["created"]] == ["Такси", "Еда", "Прочее"]
+        assert all(e["month_id"] == month_id for e in data["created"])
+
+        listed = authenticated_client.get(f"/api/months/{month_id}/daily-expenses").json()
+        assert len(listed) == 3
+        balance = authenticated_client.get(f"/api/months/{month_id}/balance").json()
+        assert balance["actual_spent"] == 1550
+
+    def test_bulk_create_reports_invalid_items(self, authenticated_client):
+        """Test invalid items are reported by index and valid ones created."""
+        month_id = authenticated_client.post(
+            "/api/months", json={"year": 2024, "month": 5}
+        ).json()["id"]
+
+        items = [
+            {"date": "2024-05-01", "description": "Кино", "amount": 500},
+            {"date": "not-a-date", "description": "Bad", "amount": 10},
+            {"description": "Missing fields"},
+            "not an object",
+        ]
+        response = authenticated_client.post(
+            f"/api/months/{month_id}/daily-expenses/bulk", json={"items": items}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["created"]) == 1
+        assert [error["index"] for error in data["errors"]] == [1, 2, 3]
+        assert data["errors"][1]["errors"][0]["type"] == "missing"
+
+    def test_bulk_create_month_not_found(self, authenticated_client):
+        """Test bulk create on a non-existent month."""
+        response = authenticated_client.post(
+            "/api/months/9999/daily-expenses/bulk", json={"items": []}
+        )
+        assert response.status_code == 404
+
+
+class TestPagination:
+    """Tests for keyset pagination of months and daily expenses."""
+
+    @staticmethod
+    def collect(client, url):
+        items, pages = [], 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            items += response.json()
+            pages += 1
+            cursor = response.headers.get("x-next-cursor")
+            url = f"{url.split('&after=')[0]}&after={cursor}" if cursor else None
+        return items, pages
+
+    def test_months_pages(self, authenticated_client):
+        """Test paging through months newest first."""
+        for year, month in [(2023, 11), (2023, 12), (2024, 1), (2024, 2), (2024, 3)]:
+            authenticated_client.post("/api/months", json={"year": year, "month": month})
+
+        months, pages = self.collect(authenticated_client, "/api/months?limit=2")
+        assert [(m["year"], m["month"]) for m in months] == [
+            (2024, 3), (2024, 2), (2024, 1), (2023, 12), (2023, 11)
+        ]
+        assert pages == 3
+
+    def test_daily_expenses_pages(self, authenticated_client):
+        """Test (date, id) paging keeps same-day expenses in insertion order."""
+        month_id = authenticated_client.post("/api/months", json={"year": 2024, "month": 5}).json()["id"]
+        items = [
+            {"date": f"2024-05-{day:02d}", "description": f"e{i}", "amount": 10}
+            for i, day in enumerate([3, 1, 3, 2, 3, 1, 2])
+        ]
+        authenticated_client.post(f"/api/months/{month_id}/daily-expenses/bulk", json={"items": items})
+
+        everything = authenticated_client.get(f"/api/months/{month_id}/daily-expenses").json()
+        assert "x-next-cursor" not in authenticated_client.get(
+            f"/api/months/{month_id}/daily-expenses?limit=7"
+        ).headers
+
+        paged, pages = self.collect(authenticated_client, f"/api/months/{month_id}/daily-expenses?limit=3")
+        assert paged == everything
+        assert pages == 3
+        assert [e["description"] for e in paged] == ["e1", "e5", "e3", "e6", "e0", "e2", "e4"]
+
+    def test_daily_expense_filters(self, authenticated_client):
+        """Test date range and category filters."""
+        month_id = authenticated_client.post("/api/months", json={"year": 2024, "month": 5}).json()["id"]
+        items = [
+            {"date": "2024-05-01", "description": "a", "amount": 1, "category": "Еда"},
+            {"date": "2024-05-10", "description": "b", "amount": 1, "category": "Такси"},
+            {"date": "2024-05-20", "description": "c", "amount": 1, "category": "Еда"},
+        ]
+        authenticated_client.post(f"/api/months/{month_id}/daily-expenses/bulk", json={"items": items})
+
+        url = f"/api/months/{month_id}/daily-expenses"
+        ranged = authenticated_client.get(f"{url}?date_from=2024-05-05&date_to=2024-05-20").json()
+        assert [e["description"] for e in ranged] == ["b", "c"]
+        food = authenticated_client.get(f"{url}?category=Еда").json()
+        assert [e["description"] for e in food] == ["a", "c"]
+
+    def test_invalid_cursor(self, authenticated_client):
+        """Test a malformed cursor is a 400, not a 500."""
+        response = authenticated_client.get("/api/months?limit=2&after=not-a-cursor")
+        assert response.status_code == 400
+        response = authenticated_client.get("/api/months?limit=0")
+        assert response.status_code == 422
+
+
+
+def conforms(value, schema: dict, components: dict) -> bool:
+    """Whether `value` matches the (type/properties/items/$ref) subset of JSON schema docs/openapi.json uses."""
+    if "$ref" in schema:
+        return conforms(value, components[schema["$ref"].rsplit("/", 1)[1]], components)
+    kind = schema.get("type")
+    if kind == "object":
+        return isinstance(value, dict) and all(
+            name not in value or conforms(value[name], prop, components)
+            for name, prop in schema.get("properties", {}).items()
+        )
+    if kind == "array":
+        return isinstance(value, list) and all(conforms(item, schema.get("items", {}), components) for item in value)
+    types = {"integer": int, "number": (int, float), "string": str, "boolean": bool}
+    return kind is None or (isinstance(value, types[kind]) and not (kind != "boolean" and isinstance(value, bool)))
+
+
+class TestFastJson:
+    """Tests for the orjson fast path of the month detail and balance."""
+
+    @pytest.fixture
+    def openapi_doc(self):
+        import json
+        import os
+
+        path = os.path.join(os.path.dirname(__file__), "..", "..", "docs", "openapi.json")
+        with open(path) as f:
+            return json.load(f)
+
+    def _fill_month(self, client):
+        month_id = client.post("/api/months", json={"year": 2024, "month": 5, "savings_percent": 10}).json()["id"]
+        client.post(f"/api/months/{month_id}/incomes", json={"name": "Salary", "amount": 3000})
+        client.post(f"/api/months/{month_id}/fixed-expenses", json={"name": "Rent", "amount": 1000})
+        client.post(f"/api/months/{month_id}/daily-expenses/bulk", json={"items": [
+            {"date": f"2024-05-{day:02d}", "description": "Обед", "amount": day * 1.5}
+            for day in range(1, 29)
+        ]})
+        return month_id
+
+    def _both_modes(self, client, monkeypatch, path):
+        from app import serialization
+        from app.cache import response_cache
+
+        monkeypatch.setattr(serialization, "FAST_JSON", False)
+        model = client.get(path)
+        response_cache.clear()
+        monkeypatch.setattr(serialization, "FAST_JSON", True)
+        fast = client.get(path)
+        assert model.status_code == fast.status_code == 200
+        return model, fast
+
+    def test_month_detail_matches_models(self, authenticated_client, monkeypatch, openapi_doc):
+        """Test the fast month payload equals the response-model output."""
+        month_id = self._fill_month(authenticated_client)
+        model, fast = self._both_modes(authenticated_client, monkeypatch, f"/api/months/{month_id}")
+
+        assert fast.json() == model.json()
+        assert fast.headers["content-type"] == "application/json"
+        assert len(fast.json()["daily_expenses"]) == 28
+        assert conforms(fast.json(), {"$ref": "#/components/schemas/Month"}, openapi_doc["components"]["schemas"])
+
+    def test_balance_matches_models(self, authenticated_client, monkeypatch, openapi_doc):
+        """Test the fast balance equals the response-model output and keeps the ETag."""
+        month_id = self._fill_month(authenticated_client)
+        model, fast = self._both_modes(authenticated_client, monkeypatch, f"/api/months/{month_id}/balance")
+
+        assert fast.json() == model.json()
+        assert fast.headers["ETag"] == model.headers["ETag"]
+        schema = {"$ref": "#/components/schemas/BalanceResponse"}
+        assert conforms(fast.json(), schema, openapi_doc["components"]["schemas"])
+
+    def test_balance_cached_encoded(self, authenticated_client):
+        """Test the cached balance is stored as encoded JSON and served from it."""
+        from app.cache import response_cache
+
+        month_id = self._fill_month(authenticated_client)
+        first = authenticated_client.get(f"/api/months/{month_id}/balance")
+        key = next(iter(response_cache.backend._data))
+        assert isinstance(response_cache.backend.get(key), bytes)
+
+        second = authenticated_client.get(f"/api/months/{month_id}/balance")
+        assert second.content == first.content
+        assert second.headers["ETag"] == first.headers["ETag"]
+
+    def test_other_users_month_not_found(self, client, second_user, test_user):
+        """Test the fast path still requires the month to belong to the user."""
+        from app.auth.security import create_access_token
+
+        client.cookies.set("access_token", create_access_token(data={"sub": str(test_user.id)}))
+        month_id = client.post("/api/months", json={"year": 2024, "month": 5}).json()["id"]
+        client.cookies.set("access_token", create_access_token(data={"sub": str(second_user.id)}))
+        assert client.get(f"/api/months/{month_id}").status_code == 404
+
+
+class TestQueryCounts:
+    """Pins the number of SQL statements each month endpoint runs.
+
+    The principal is cached by a warm-up request, so the counts cover only
+    the month (resolved once by its loader) and the endpoint's own work.
+    """
+
+    CASES = [
+        ("GET", "/api/months/{month}", None, 4),
+        ("PUT", "/api/months/{month}", {"savings_percent": 5}, 5),
+        ("GET", "/api/months/{month}/incomes", None, 2),
+        ("POST", "/api/months/{month}/incomes", {"name": "Bonus", "amount": 10}, 5),
+        ("GET", "/api/months/{month}/fixed-expenses", None, 2),
+        ("GET", "/api/months/{month}/daily-expenses", None, 2),
+        ("POST", "/api/months/{month}/daily-expenses", {"date": "2024-05-02", "description": "Кофе", "amount": 5}, 7),
+        ("GET", "/api/months/{month}/balance", None, 2),
+        ("GET", "/api/months/{month}/analytics", None, 2),
+        ("PUT", "/api/incomes/{income}", {"amount": 20}, 5),
+        ("DELETE", "/api/incomes/{income}", None, 4),
+        ("PUT", "/api/daily-expenses/{expense}", {"amount": 20}, 12),
+        ("DELETE", "/api/daily-expenses/{expense}", None, 8),
+    ]
+
+    @pytest.mark.parametrize("method, path, body, expected", CASES)
+    def test_statement_count(self, authenticated_client, sql_profile, method, path, body, expected):
+        """Test the endpoint runs exactly the expected number of statements."""
+        client = authenticated_client
+        month = client.post("/api/months", json={"year": 2024, "month": 5}).json()["id"]
+        income = client.post(f"/api/months/{month}/incomes", json={"name": "Salary", "amount": 1000}).json()["id"]
+        client.post(f"/api/months/{month}/fixed-expenses", json={"name": "Rent", "amount": 300})
+        expense = client.post(f"/api/months/{month}/daily-expenses", json={
+            "date": "2024-05-01", "description": "Обед", "amount": 15
+        }).json()["id"]
+        sql_profile.clear()
+
+        response = client.request(method, path.format(month=month, income=income, expense=expense), json=body)
+        assert response.status_code == 200
+        assert sql_profile.count == expected, sql_profile.report()
+
+    def test_month_resolved_once(self, authenticated_client, sql_profile):
+        """Test a month sub-route selects the month only once."""
+        month = authenticated_client.post("/api/months", json={"year": 2024, "month": 5}).json()["id"]
+        sql_profile.clear()
+
+        authenticated_client.post(f"/api/months/{month}/daily-expenses", json={
+            "date": "2024-05-01", "description": "Обед", "amount": 15
+        })
+        assert sum(1 for s, _ in sql_profile.statements if "FROM months" in s) == 1
+
+    def test_foreign_row_is_one_query(self, authenticated_client, second_user, sql_profile):
+        """Test rejecting another user's row takes a single JOIN query."""
+        from app.auth.security import create_access_token
+
+        month = authenticated_client.post("/api/months", json={"year": 2024, "month": 5}).json()["id"]
+        income = authenticated_client.post(
+            f"/api/months/{month}/incomes", json={"name": "Salary", "amount": 1000}
+        ).json()["id"]
+        authenticated_client.cookies.set("access_token", create_access_token(data={"sub": str(second_user.id)}))
+        authenticated_client.get("/api/months")
+        sql_profile.clear()
+
+        response = authenticated_client.put(f"/api/incomes/{income}", json={"amount": 1})
+        assert response.status_code == 404
+        assert sql_profile.count == 1
+        assert "JOIN months" in sql_profile.statements[0][0]
@@ -0,0 +1,157 @@
+"""
+Tests for the sampling profiler and its admin-only entry points.
+"""
+import re
+import threading
+import time
+from collections import Counter
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import profiler
+from app.database import get_db
+from app.main import create_app
+from tests.conftest import override_get_db
+
+COLLAPSED_LINE = re.compile(r"^[^;\n]+(;[^;\n]+)* \d+$")
+
+
+def spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(i * i for i in range(500))
+
+
+@pytest.fixture
+def profiling_app(monkeypatch, client, test_user):
+    """An app built with test_user allowed to profile."""
+    monkeypatch.setattr(profiler, "ALLOWED_USERS", frozenset({test_user.id}))
+    app = create_app(async_mode=False)
+    app.dependency_overrides[get_db] = override_get_db
+    return app
+
+
+@pytest.fixture
+def admin_client(profiling_app, auth_cookies):
+    with TestClient(profiling_app) as admin:
+        admin.cookies.set("access_token", auth_cookies["access_token"])
+        yield admin
+
+
+@pytest.fixture
+def other_client(profiling_app, second_auth_cookies):
+    with TestClient(profiling_app) as other:
+        other.cookies.set("access_token", second_auth_cookies["access_token"])
+        yield other
+
+
+class TestSampler:
+    def test_samples_busy_threads(self):
+        sampler = profiler.Sampler(interval=0.002).start()
+        worker = threading.Thread(target=spin, args=(0.2,))
+        worker.start()
+        worker.join()
+        samples = sampler.stop()
+
+        assert sampler.ticks > 0
+        assert any("spin (tests/test_profiler.py:" in frame for stack in samples for frame in stack)
+
+    def test_idle_threads_are_left_out(self):
+        release = threading.Event()
+        waiter = threading.Thread(target=release.wait)
+        waiter.start()
+        sampler = profiler.Sampler(interval=0.002).start()
+        time.sleep(0.05)
+        samples = sampler.stop()
+        release.set()
+        waiter.join()
+
+        assert not any(stack[-1].startswith("wait (") for stack in samples)
+
+    def test_collapsed_format(self):
+        samples = Counter({("main (a.py:1)", "work (b.py:5)"): 3, ("main (a.py:1)",): 1})
+
+        lines = profiler.collapsed(samples).splitlines()
+
+        assert lines == ["main (a.py:1) 1", "main (a.py:1);work (b.py:5) 3"]
+        assert all(COLLAPSED_LINE.match(line) for line in lines)
+
+    def test_html_flame_graph(self):
+        samples = Counter({("main (a.py:1)", "work <b> (b.py:5)"): 3})
+
+        page = profiler.flamegraph_html(samples, "GET /x")
+
+        assert page.startswith("<!DOCTYPE html>")
+        assert "work &lt;b&gt; (b.py:5)" in page
+        assert "3 samples" in page
+
+
+class TestRequestProfile:
+    def test_allowed_user_gets_the_profile_instead_of_the_response(self, admin_client):
+        response = admin_client.get("/api/months?profile=1")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.headers["x-profile-status"] == "200"
+        assert int(response.headers["x-profile-samples"]) >= 0
+        assert all(COLLAPSED_LINE.match(line) for line in response.text.splitlines())
+
+    def test_html_report(self, admin_client):
+        response = admin_client.get("/api/months?profile=html")
+
+        assert response.headers["content-type"].startswith("text/html")
+        assert "GET /api/months" in response.text
+
+    def test_other_users_get_the_normal_response(self, other_client):
+        response = other_client.get("/api/months?profile=1")
+
+        assert response.status_code == 200
+        assert response.json() == []
+        assert "x-profile-status" not in response.headers
+
+    def test_deactivated_allowed_user_is_not_profiled(self, admin_client, db_session, test_user):
+        test_user.is_active = False
+        db_session.commit()
+
+        response = admin_client.get("/api/months?profile=1")
+
+        assert response.status_code == 401
+        assert "x-profile-status" not in response.headers
+
+
+class TestProcessProfile:
+    def test_allowed_user_samples_the_process(self, admin_client):
+        worker = threading.Thread(target=spin, args=(0.3,))
+        worker.start()
+        response = admin_client.get("/api/admin/profile?seconds=0.2&interval=0.002")
+        worker.join()
+
+        assert response.status_code == 200
+        assert "attachment" in response.headers["content-disposition"]
+        assert ".folded" in response.headers["content-disposition"]
+        assert "spin (tests/test_profiler.py:" in response.text
+
+    def test_other_users_are_forbidden(self, other_client):
+        response = other_client.get("/api/admin/profile?seconds=0.1")
+
+        assert response.status_code == 403
+
+    def test_one_profile_at_a_time(self, admin_client):
+        profiler.acquire()
+        try:
+            response = admin_client.get("/api/admin/profile?seconds=0.1")
+        finally:
+            profiler.release()
+
+        assert response.status_code == 409
+
+
+class TestDisabled:
+    def test_nothing_installed_without_allowed_users(self, authenticated_client):
+        assert not profiler.enabled()
+
+        assert authenticated_client.get("/api/admin/profile?seconds=0.1").status_code == 404
+        response = authenticated_client.get("/api/months?profile=1")
+        assert response.json() == []
+        assert not any(m.cls is profiler.ProfilerMiddleware for m in authenticated_client.app.user_middleware)
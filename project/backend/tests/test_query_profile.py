@@ -0,0 +1,121 @@
+"""
+Tests for per-request SQL profiling, N+1 detection and the max_queries fixture.
+"""
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models, query_profile
+from app.database import get_db
+from app.main import create_app
+from tests.conftest import create_month, engine, override_get_db
+
+
+@pytest.fixture
+def profiled_client(monkeypatch, client, auth_cookies):
+    """A client on an app built with SQL_PROFILE=header."""
+    monkeypatch.setattr(query_profile, "MODE", "header")
+    query_profile.instrument_engine(engine)
+    app = create_app(async_mode=False)
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as profiled:
+        profiled.cookies.set("access_token", auth_cookies["access_token"])
+        yield profiled
+
+
+class TestStatementShape:
+    def test_collapses_literals_and_in_lists(self):
+        shape = query_profile.statement_shape(
+            "SELECT months.id FROM months\n WHERE months.id IN (?, ?, ?) AND name = 'x' LIMIT 10"
+        )
+
+        assert shape == "SELECT months.id FROM months WHERE months.id IN (?) AND name = ? LIMIT ?"
+
+    def test_keeps_numbered_identifiers(self):
+        shape = query_profile.statement_shape("SELECT months_1.id FROM months AS months_1 WHERE months_1.id = %(id_1)s")
+
+        assert shape == "SELECT months_1.id FROM months AS months_1 WHERE months_1.id = %(id_1)s"
+
+
+class TestDetection:
+    def test_lazy_loads_in_a_loop_are_flagged(self, authenticated_client, db_session):
+        for month in range(1, 5):
+            create_month(authenticated_client, month=month)
+        db_session.expire_all()
+
+        with query_profile.capture(engine) as profile:
+            for month in db_session.query(models.Month).all():
+                month.incomes
+
+        repeated = profile.repeated()
+        assert len(repeated) == 1
+        shape, (count, _) = next(iter(repeated.items()))
+        assert "FROM incomes" in shape and count == 4
+        assert "probable N+1" in profile.report()
+
+    def test_distinct_statements_are_not_flagged(self, authenticated_client):
+        month_id = create_month(authenticated_client)
+
+        with query_profile.capture(engine) as profile:
+            authenticated_client.get(f"/api/months/{month_id}")
+
+        assert profile.count > 0
+        assert profile.repeated() == {}
+
+
+class TestRequestProfiling:
+    def test_header_mode_profiles_only_requests_asking_for_it(self, profiled_client, sql_profile):
+        month_id = create_month(profiled_client)
+
+        plain = profiled_client.get(f"/api/months/{month_id}")
+        sql_profile.clear()
+        profiled = profiled_client.get(f"/api/months/{month_id}", headers={"X-SQL-Profile": "1"})
+
+        assert query_profile.HEADER not in plain.headers
+        summary = profiled.headers[query_profile.HEADER]
+        assert summary.startswith(f"queries={sql_profile.count}; time_ms=")
+        assert summary.endswith("n_plus_one=0")
+
+    def test_all_mode_logs_every_request(self, monkeypatch, profiled_client, caplog):
+        monkeypatch.setattr(query_profile, "MODE", "all")
+
+        with caplog.at_level(logging.INFO, logger="app.query_profile"):
+            response = profiled_client.get("/api/months")
+
+        assert query_profile.HEADER in response.headers
+        assert any(record.getMessage().startswith("GET /api/months queries=") for record in caplog.records)
+
+    def test_off_by_default(self, authenticated_client):
+        response = authenticated_client.get("/api/months", headers={"X-SQL-Profile": "1"})
+
+        assert query_profile.HEADER not in response.headers
+
+
+class TestMaxQueries:
+    def test_fails_over_the_limit_with_a_report(self, authenticated_client, max_queries):
+        with pytest.raises(AssertionError, match="expected at most 0 queries"):
+            with max_queries(0):
+                authenticated_client.get("/api/months")
+
+    def test_list_queries_do_not_grow_with_rows(self, authenticated_client, max_queries):
+        with max_queries(2) as few:
+            authenticated_client.get("/api/months")
+        for month in range(1, 13):
+            create_month(authenticated_client, month=month)
+
+        with max_queries(few.count):
+            authenticated_client.get("/api/months")
+
+    def test_month_detail_queries_do_not_grow_with_rows(self, authenticated_client, max_queries):
+        month_id = create_month(authenticated_client)
+        with max_queries(4):
+            authenticated_client.get(f"/api/months/{month_id}")
+        for day in range(1, 21):
+            authenticated_client.post(f"/api/months/{month_id}/incomes", json={"name": f"Income {day}", "amount": 100})
+            authenticated_client.post(f"/api/months/{month_id}/daily-expenses", json={
+                "date": f"2024-05-{day:02d}", "description": "Кофе", "amount": 150
+            })
+
+        with max_queries(4):
+            authenticated_client.get(f"/api/months/{month_id}")
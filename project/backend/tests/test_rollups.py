@@ -0,0 +1,145 @@
+"""
+Tests for incrementally maintained month rollups.
+"""
+import pytest
+from app import models, rollups
+from tests.conftest import add_expense, create_month
+
+
+class TestRollupMaintenance:
+    """Tests that crud writes keep rollups in sync with raw rows."""
+
+    def test_month_created_with_empty_totals(self, authenticated_client, db_session):
+        """Test a new month gets a zeroed totals row."""
+        month_id = create_month(authenticated_client)
+
+        totals = rollups.get_month_totals(db_session, month_id)
+        assert totals == {"total_income": 0, "total_fixed": 0, "total_spent": 0}
+
+    def test_writes_update_rollups(self, authenticated_client, db_session):
+        """Test create, update and delete of all row types."""
+        month_id = create_month(authenticated_client)
+
+        income_id = authenticated_client.post(
+            f"/api/months/{month_id}/incomes", json={"name": "Salary", "amount": 5000}
+        ).json()["id"]
+        authenticated_client.put(f"/api/incomes/{income_id}", json={"amount": 6000})
+        fixed_id = authenticated_client.post(
+            f"/api/months/{month_id}/fixed-expenses", json={"name": "Rent", "amount": 1500}
+        ).json()["id"]
+        authenticated_client.delete(f"/api/fixed-expenses/{fixed_id}")
+
+        first = add_expense(authenticated_client, month_id, "2024-05-01", 100)
+        add_expense(authenticated_client, month_id, "2024-05-01", 50, "Транспорт")
+        third = add_expense(authenticated_client, month_id, "2024-05-02", 30)
+        authenticated_client.put(
+            f"/api/daily-expenses/{first}",
+            json={"category": "Транспорт", "amount": 120}
+        )
+        authenticated_client.delete(f"/api/daily-expenses/{third}")
+
+        assert rollups.get_month_totals(db_session, month_id) == {
+            "total_income": 6000, "total_fixed": 0, "total_spent": 170
+        }
+        daily = rollups.get_daily_totals(db_session, month_id)
+        assert {d.isoformat(): amount for d, amount in daily.items()} == {"2024-05-01": 170}
+        assert rollups.get_category_totals(db_session, month_id) == {"Транспорт": 170}
+        assert rollups.verify(db_session) == []
+
+    def test_balance_and_analytics_read_rollups(self, authenticated_client):
+        """Test endpoints reflect rollup totals."""
+        month_id = create_month(authenticated_client)
+        add_expense(authenticated_client, month_id, "2024-05-01", 100)
+        add_expense(authenticated_client, month_id, "2024-05-02", 60, "Транспорт")
+
+        balance = authenticated_client.get(f"/api/months/{month_id}/balance").json()
+        assert balance["actual_spent"] == 160
+        assert balance["daily_balances"][1]["cumulative_spent"] == 160
+
+        analytics = authenticated_client.get(f"/api/months/{month_id}/analytics").json()
+        assert analytics["total"] == 160
+        assert [c["name"] for c in analytics["categories"]] == ["Еда", "Транспорт"]
+
+
+class TestRollupRebuild:
+    """Tests for verify/rebuild and months without rollups."""
+
+    def test_verify_reports_drift_and_rebuild_fixes_it(self, authenticated_client, db_session):
+        """Test tampered rollups are detected and repaired."""
+        month_id = create_month(authenticated_client)
+        add_expense(authenticated_client, month_id, "2024-05-01", 100)
+
+        db_session.query(models.MonthTotals).update({models.MonthTotals.total_spent: 1})
+        db_session.query(models.CategoryTotals).delete()
+        db_session.commit()
+
+        fields = {drift["field"] for drift in rollups.verify(db_session)}
+        assert "total_spent" in fields
+        assert "category_totals[Еда].amount" in fields
+
+        assert rollups.rebuild(db_session) == 1
+        assert rollups.verify(db_session) == []
+
+    def test_month_without_rollups(self, authenticated_client, db_session):
+        """Test legacy months are read from raw rows and rolled up on write."""
+        month_id = create_month(authenticated_client)
+        add_expense(authenticated_client, month_id, "2024-05-01", 100)
+        for model in (models.MonthTotals, models.DailyTotals, models.CategoryTotals):
+            db_session.query(model).delete()
+        db_session.commit()
+
+        balance = authenticated_client.get(f"/api/months/{month_id}/balance").json()
+        assert balance["actual_spent"] == 100
+        analytics = authenticated_client.get(f"/api/months/{month_id}/analytics").json()
+        assert analytics["total"] == 100
+
+        expense_id = add_expense(authenticated_client, month_id, "2024-05-02", 40)
+        authenticated_client.put(f"/api/daily-expenses/{expense_id}", json={"amount": 50})
+
+        assert rollups.get_month_totals(db_session, month_id)["total_spent"] == 150
+        assert rollups.verify(db_session) == []
+
+
+class TestBump:
+    """Tests for adding to per-date and per-category rows."""
+
+    @pytest.fixture(params=["upsert", "savepoint"])
+    def month_id(self, request, monkeypatch, authenticated_client):
+        if request.param == "savepoint":
+            monkeypatch.setattr(rollups, "_UPSERT_INSERTS", {})
+        return create_month(authenticated_client)
+
+    def test_new_and_existing_keys(self, db_session, month_id):
+        keys = {"month_id": month_id, "category": "Еда"}
+        rollups._bump(db_session, models.CategoryTotals, keys, 10, 1)
+        rollups._bump(db_session, models.CategoryTotals, keys, 5, 1)
+        db_session.commit()
+
+        assert rollups.get_category_totals(db_session, month_id) == {"Еда": 15}
+
+    def test_key_inserted_by_another_writer(self, authenticated_client, db_session, monkeypatch):
+        """Test the savepoint fallback adds to a row inserted after its update found none."""
+        monkeypatch.setattr(rollups, "_UPSERT_INSERTS", {})
+        month_id = create_month(authenticated_client)
+        keys = {"month_id": month_id, "category": "Еда"}
+        query = db_session.query
+
+        class RacingQuery:
+            def __init__(self, *entities):
+                self.query = query(*entities)
+
+            def filter_by(self, **kwargs):
+                self.query = self.query.filter_by(**kwargs)
+                return self
+
+            def update(self, *args, **kwargs):
+                # Finds nothing, then the other writer's insert lands
+                monkeypatch.setattr(db_session, "query", query)
+                db_session.execute(models.CategoryTotals.__table__.insert().values(**keys, amount=10, count=1))
+                return 0
+
+        monkeypatch.setattr(db_session, "query", RacingQuery)
+        rollups._bump(db_session, models.CategoryTotals, keys, 5, 1)
+        db_session.commit()
+
+        assert rollups.get_category_totals(db_session, month_id) == {"Еда": 15}
@@ -0,0 +1,55 @@
+"""
+Tests for the synthetic data generator.
+"""
+import pytest
+
+from app import models, rollups, seed
+
+
+def generate(db, **kwargs):
+    return seed.generate(db, **{"users": 2, "months": 2, "expenses": 40, "seed": 3, **kwargs})
+
+
+class TestGenerate:
+    def test_creates_users_months_and_expenses(self, db_session):
+        user_ids = generate(db_session)
+
+        assert len(user_ids) == 2
+        assert db_session.query(models.Month).count() == 4
+        assert db_session.query(models.DailyExpense).count() == 160
+        emails = {u.email for u in db_session.query(models.User).filter(models.User.id.in_(user_ids))}
+        assert emails == {"seed0@example.com", "seed1@example.com"}
+
+    def test_rollups_match_raw_rows(self, db_session):
+        generate(db_session)
+
+        assert rollups.verify(db_session) == []
+
+    def test_descriptions_are_categorized(self, db_session):
+        generate(db_session)
+
+        categories = [c for (c,) in db_session.query(models.DailyExpense.category)]
+        other = categories.count("Прочее")
+        assert 0 < other < len(categories) / 2
+        assert len(set(categories)) > 3
+
+    def test_same_seed_same_data(self, db_session):
+        generate(db_session, prefix="a")
+        generate(db_session, prefix="b")
+
+        def expenses(prefix):
+            return (
+                db_session.query(models.DailyExpense.date, models.DailyExpense.description, models.DailyExpense.amount)
+                .join(models.Month).join(models.User)
+                .filter(models.User.email.like(f"{prefix}%"))
+                .order_by(models.DailyExpense.id)
+                .all()
+            )
+
+        assert expenses("a") == expenses("b")
+
+    def test_existing_prefix_is_rejected(self, db_session):
+        generate(db_session, users=1)
+
+        with pytest.raises(ValueError):
+            generate(db_session, users=1)
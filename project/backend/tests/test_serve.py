@@ -0,0 +1,116 @@
+"""
+Tests for the pre-forked production server.
+"""
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import pytest
+
+from app import bootstrap
+from app.database import create_db_engine
+from app.serve import pool_sizes
+from benchmarks.loadtest import _free_port
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="app.serve needs fork()")
+
+
+class TestPoolSizes:
+    def test_budget_is_split_across_workers(self):
+        assert pool_sizes(20, workers=4, engines=1) == (2, 3)
+
+    def test_async_mode_has_two_pools_per_worker(self):
+        assert pool_sizes(20, workers=4, engines=2) == (1, 1)
+
+    def test_budget_smaller_than_pool_count(self):
+        with pytest.raises(ValueError):
+            pool_sizes(3, workers=4, engines=1)
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Start `python -m app.serve` on a bootstrapped SQLite file; yields (process, base URL)."""
+    database_url = f"sqlite:///{tmp_path / 'serve.db'}"
+    engine = create_db_engine(database_url)
+    bootstrap.bootstrap(engine)
+    engine.dispose()
+    processes = []
+
+    def start(*args, env=None):
+        port = _free_port()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "app.serve", "--port", str(port), "--log-level", "info", *args],
+            cwd=BACKEND_DIR, env={**os.environ, **(env or {}), "DATABASE_URL": database_url},
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        processes.append(process)
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            assert process.poll() is None, process.stdout.read()
+            try:
+                if httpx.get(f"{base_url}/ready").is_success:
+                    return process, base_url
+            except httpx.TransportError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError("app.serve did not become ready")
+
+    yield start
+    for process in processes:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def stop(process) -> str:
+    process.send_signal(signal.SIGTERM)
+    output, _ = process.communicate(timeout=30)
+    return output
+
+
+class TestServe:
+    def test_recycles_workers_and_keeps_serving(self, server):
+        process, base_url = server("--workers", "2", "--max-requests", "5", "--max-requests-jitter", "0")
+
+        statuses = [httpx.get(f"{base_url}/ready").status_code for _ in range(40)]
+
+        assert statuses == [200] * 40
+        output = stop(process)
+        assert process.returncode == 0
+        assert "recycled" in output
+
+    def test_metrics_are_labelled_by_worker(self, server):
+        process, base_url = server("--workers", "2")
+
+        body = httpx.get(f"{base_url}/metrics").text
+
+        assert 'http_requests_total{worker="' in body
+        stop(process)
+
+    def test_shutdown_drains_in_flight_requests(self, server):
+        """Test a request running when SIGTERM arrives still gets its response."""
+        process, base_url = server("--workers", "1", env={"PROFILER_USERS": "1"})
+        with httpx.Client(base_url=base_url) as client:
+            client.post("/api/auth/register", json={"email": "serve@example.com", "password": "password123"})
+            result = {}
+
+            def slow_request():
+                # The profile endpoint samples for the requested number of seconds
+                result["response"] = client.get("/api/admin/profile", params={"seconds": 2})
+
+            thread = threading.Thread(target=slow_request)
+            thread.start()
+            time.sleep(0.5)
+            process.send_signal(signal.SIGTERM)
+            thread.join(timeout=30)
+
+        assert result["response"].status_code == 200
+        process.communicate(timeout=30)
+        assert process.returncode == 0